@@ -0,0 +1,106 @@
+-- Indexes used by the API (ORM does not run create_all; apply after CreateTablesAndInsertDraft.sql)
+
+-- GET /contracts: keyset pagination and filters
+CREATE INDEX IF NOT EXISTS ix_contract_status_id ON Contract (Status, ContractID);
+CREATE INDEX IF NOT EXISTS ix_contract_customer_id ON Contract (CustomerID, ContractID);
+CREATE INDEX IF NOT EXISTS ix_contract_startdate_id ON Contract (StartDate, ContractID);
+CREATE INDEX IF NOT EXISTS ix_contract_status_startdate_id ON Contract (Status, StartDate, ContractID);
+CREATE INDEX IF NOT EXISTS ix_contract_enddate_id ON Contract (EndDate, ContractID);
+
+-- Batched loading of contract children
+CREATE INDEX IF NOT EXISTS ix_contractcar_contractid ON ContractCar (ContractID);
+CREATE INDEX IF NOT EXISTS ix_returnreceipt_contractid ON ReturnReceipt (ContractID);
+
+-- Contract status reconciler: last processed ReturnID, shared by workers and restarts
+CREATE TABLE IF NOT EXISTS ReconcilerCheckpoint (
+    Name VARCHAR(50) PRIMARY KEY,
+    LastID INT NOT NULL DEFAULT 0,
+    UpdatedAt TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- GET /payments/export: date-range filter
+CREATE INDEX IF NOT EXISTS ix_contractpayment_paymentdate_id ON ContractPayment (PaymentDate, PaymentID);
+
+-- GET /cars/availability: overlap search on the booked period (NULL bounds = open-ended)
+CREATE INDEX IF NOT EXISTS ix_contract_period_gist ON Contract USING gist (daterange(StartDate, EndDate, '[]'));
+CREATE INDEX IF NOT EXISTS ix_contractcar_carid ON ContractCar (CarID);
+CREATE INDEX IF NOT EXISTS ix_car_ownerbranch_id ON Car (OwnerBranchID, CarID);
+
+-- GET /customers/by-phone, /customers/by-citizen-id: expression indexes on the normalized value
+CREATE INDEX IF NOT EXISTS ix_customer_phone_key ON Customer ((CASE WHEN (regexp_replace(Phone, '\D', '', 'g') ~ '^84\d{9}$') THEN '0' || substr(regexp_replace(Phone, '\D', '', 'g'), 3) ELSE regexp_replace(Phone, '\D', '', 'g') END));
+CREATE INDEX IF NOT EXISTS ix_customer_citizenid_key ON Customer (btrim(CitizenID));
+
+-- GET /search: trigram GiST indexes (serve `col % q`, `col ILIKE '%q%'` and the KNN order `ORDER BY col <-> q`,
+-- so each search branch stops after its top rows); replace the earlier GIN *_trgm indexes
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+DROP INDEX IF EXISTS ix_customer_fullname_trgm, ix_customer_phone_trgm, ix_customer_email_trgm,
+    ix_car_licenseplate_trgm, ix_contract_notes_trgm;
+CREATE INDEX IF NOT EXISTS ix_customer_fullname_gist ON Customer USING gist (FullName gist_trgm_ops);
+CREATE INDEX IF NOT EXISTS ix_customer_phone_gist ON Customer USING gist (btrim(Phone) gist_trgm_ops);
+CREATE INDEX IF NOT EXISTS ix_customer_email_gist ON Customer USING gist (Email gist_trgm_ops);
+CREATE INDEX IF NOT EXISTS ix_employee_fullname_gist ON Employee USING gist (FullName gist_trgm_ops);
+CREATE INDEX IF NOT EXISTS ix_employee_phone_gist ON Employee USING gist (btrim(Phone) gist_trgm_ops);
+CREATE INDEX IF NOT EXISTS ix_employee_email_gist ON Employee USING gist (Email gist_trgm_ops);
+CREATE INDEX IF NOT EXISTS ix_car_licenseplate_gist ON Car USING gist (LicensePlate gist_trgm_ops);
+CREATE INDEX IF NOT EXISTS ix_contract_notes_gist ON Contract USING gist (Notes gist_trgm_ops);
+
+-- Name uniqueness enforced by the database (duplicate writes -> 409, no check-then-insert)
+ALTER TABLE UserAccount ADD COLUMN IF NOT EXISTS Username VARCHAR(50);
+-- Accounts created before the column get a placeholder username (rename through PUT /users/{id})
+UPDATE UserAccount SET Username = 'user' || UserID WHERE Username IS NULL OR btrim(Username) = '';
+ALTER TABLE UserAccount ALTER COLUMN Username SET NOT NULL;
+-- Existing duplicates would fail the unique indexes: every copy but the lowest id gets ' #<id>' appended
+UPDATE Branch t SET BranchName = left(t.BranchName, 100 - length(' #' || t.BranchID)) || ' #' || t.BranchID
+FROM Branch d WHERE d.BranchName = t.BranchName AND d.BranchID < t.BranchID;
+UPDATE Role t SET RoleName = left(t.RoleName, 50 - length(' #' || t.RoleID)) || ' #' || t.RoleID
+FROM Role d WHERE d.RoleName = t.RoleName AND d.RoleID < t.RoleID;
+UPDATE CarBrand t SET BrandName = left(t.BrandName, 100 - length(' #' || t.BrandID)) || ' #' || t.BrandID
+FROM CarBrand d WHERE d.BrandName = t.BrandName AND d.BrandID < t.BrandID;
+UPDATE UserAccount t SET Username = left(t.Username, 50 - length(' #' || t.UserID)) || ' #' || t.UserID
+FROM UserAccount d WHERE d.Username = t.Username AND d.UserID < t.UserID;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_branch_branchname ON Branch (BranchName);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_role_rolename ON Role (RoleName);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_carbrand_brandname ON CarBrand (BrandName);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_useraccount_username ON UserAccount (Username);
+
+-- Row versions for ETag / If-None-Match on GET /contracts and /cars (bumped by the app on every UPDATE)
+ALTER TABLE Contract ADD COLUMN IF NOT EXISTS RowVersion INTEGER NOT NULL DEFAULT 1;
+ALTER TABLE Car ADD COLUMN IF NOT EXISTS RowVersion INTEGER NOT NULL DEFAULT 1;
+
+-- GET /fleet/summary aggregates (maintained by the contract endpoints and the reconciler).
+-- After creating them, fill once from car/contract with POST /fleet/summary/rebuild.
+CREATE TABLE IF NOT EXISTS FleetCarCount (
+    BranchID INT NOT NULL,          -- 0: car without owner branch
+    Status VARCHAR(100) NOT NULL,   -- '': car without status
+    CarCount INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (BranchID, Status)
+);
+CREATE TABLE IF NOT EXISTS FleetContractCount (
+    BranchID INT NOT NULL,
+    EndDate DATE NOT NULL,          -- 9999-12-31: contract without EndDate
+    ActiveCount INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (BranchID, EndDate)
+);
+CREATE INDEX IF NOT EXISTS ix_fleetcontractcount_live ON FleetContractCount (BranchID, EndDate, ActiveCount) WHERE ActiveCount <> 0;
+
+-- Contract balance ledger: PaidAmount is kept by POST /contracts/{id}/payments; backfilled once here
+ALTER TABLE Contract ADD COLUMN IF NOT EXISTS PaidAmount NUMERIC(15,2) NOT NULL DEFAULT 0;
+UPDATE Contract c SET PaidAmount = p.Total
+FROM (SELECT ContractID, COALESCE(SUM(Amount), 0) AS Total FROM ContractPayment GROUP BY ContractID) p
+WHERE p.ContractID = c.ContractID AND c.PaidAmount <> p.Total;
+ALTER TABLE Contract ADD COLUMN IF NOT EXISTS BalanceDue NUMERIC(15,2)
+    GENERATED ALWAYS AS (COALESCE(TotalAmount, 0) - PaidAmount) STORED;
+CREATE INDEX IF NOT EXISTS ix_contract_balancedue_open ON Contract (ContractID, BalanceDue) WHERE BalanceDue > 0;
+
+-- Outbox of contract side effects (car release, auto return receipts), drained by app.jobs workers
+CREATE TABLE IF NOT EXISTS OutboxJob (
+    JobID SERIAL PRIMARY KEY,
+    Kind VARCHAR(50) NOT NULL,
+    Payload JSON NOT NULL,
+    CreatedAt TIMESTAMPTZ NOT NULL DEFAULT now(),
+    RunAfter TIMESTAMPTZ NOT NULL DEFAULT now(),
+    Attempts INT NOT NULL DEFAULT 0,
+    LastError VARCHAR(500),
+    DeadAt TIMESTAMPTZ
+);
+CREATE INDEX IF NOT EXISTS ix_outboxjob_ready ON OutboxJob (RunAfter, JobID) WHERE DeadAt IS NULL;
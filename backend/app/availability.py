@@ -0,0 +1,33 @@
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import Select, exists, func, literal_column, select
+
+from .models import Car, Contract, ContractCar
+
+
+# Contracts in these states no longer hold their cars
+INACTIVE_CONTRACT_STATUSES = ("canceled", "cancelled", "completed")
+
+
+def contract_period():
+    # Inclusive date range of a contract; NULL bounds mean open-ended.
+    # Matches the ix_contract_period_gist expression index.
+    return func.daterange(Contract.StartDate, Contract.EndDate, literal_column("'[]'"))
+
+
+def overlapping_bookings(start: date, end: date):
+    # Correlated to Car: active contract lines for the car overlapping [start, end]
+    return exists().where(
+        ContractCar.CarID == Car.CarID,
+        ContractCar.ContractID == Contract.ContractID,
+        contract_period().op("&&")(func.daterange(start, end, literal_column("'[]'"))),
+        func.lower(func.coalesce(Contract.Status, "")).not_in(INACTIVE_CONTRACT_STATUSES),
+    )
+
+
+def available_cars_query(start: date, end: date, branch_id: Optional[int] = None) -> Select:
+    query = select(Car).where(~overlapping_bookings(start, end))
+    if branch_id is not None:
+        query = query.where(Car.OwnerBranchID == branch_id)
+    return query
@@ -0,0 +1,194 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from .database import SessionLocal
+from .pagination import NEXT_CURSOR_HEADER, TOTAL_ESTIMATE_HEADER, PageParams, decode_cursor, encode_cursor
+
+
+# Other workers' writes are picked up when the snapshot is older than this
+CATALOG_MAX_AGE_SECONDS = float(os.getenv("CATALOG_MAX_AGE_SECONDS", "300"))
+# A table whose loader failed is retried after this, doubling per failure up to the max age
+CATALOG_RETRY_SECONDS = float(os.getenv("CATALOG_RETRY_SECONDS", "5"))
+CATALOG_VERSION_HEADER = "X-Catalog-Version"
+
+logger = logging.getLogger(__name__)
+
+
+class CatalogTable:
+    def __init__(self, name: str, key: str, loader: Callable[[Session], Sequence[BaseModel]]):
+        self.name = name
+        self.key = key
+        self.loader = loader
+        self.loaded_at: Optional[float] = None
+        self.failures = 0
+        self.retry_at = 0.0
+        self.error: Optional[str] = None
+
+
+class Catalog:
+    """In-process snapshot of the small reference tables (branches, roles, brands, ...).
+
+    Each router registers a loader returning its out-schema rows; the snapshot is
+    loaded at startup and patched by the router's own writes, so list endpoints are
+    served without touching the database. Rows are kept ordered by `key` and the
+    snapshot is replaced, never mutated, so readers need no lock. `version` is a
+    content hash: equal across workers holding the same data.
+
+    Tables load independently: a table whose loader fails keeps its last good rows
+    (or answers 503 if it never loaded) and is not retried before its backoff ends,
+    while the other tables are served and refreshed as usual.
+    """
+
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        max_age: float = CATALOG_MAX_AGE_SECONDS,
+        retry: float = CATALOG_RETRY_SECONDS,
+    ):
+        self._session_factory = session_factory
+        self.max_age = max_age
+        self.retry = retry
+        self._tables: Dict[str, CatalogTable] = {}
+        self._rows: Dict[str, Tuple[BaseModel, ...]] = {}
+        self.version: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def register(self, name: str, key: str, loader: Callable[[Session], Sequence[BaseModel]]) -> None:
+        self._tables[name] = CatalogTable(name, key, loader)
+
+    def load(self) -> None:
+        # Every table, backoff ignored (startup); failures are logged per table, not raised
+        with self._lock:
+            self._load(list(self._tables.values()))
+
+    def _load(self, tables: List[CatalogTable]) -> None:
+        # Caller holds the lock, so a write patched in meanwhile is not overwritten by older rows
+        if not tables:
+            return
+        rows = dict(self._rows)
+        db = self._session_factory()
+        try:
+            for table in tables:
+                try:
+                    rows[table.name] = self._sorted(table, table.loader(db))
+                except Exception as exc:
+                    db.rollback()
+                    self._failed(table, exc)
+                else:
+                    table.loaded_at = time.time()
+                    table.failures = 0
+                    table.error = None
+        finally:
+            db.close()
+        self._publish(rows)
+
+    def _failed(self, table: CatalogTable, exc: Exception) -> None:
+        table.failures += 1
+        delay = min(self.retry * 2 ** (table.failures - 1), self.max_age)
+        table.retry_at = time.time() + delay
+        table.error = f"{type(exc).__name__}: {exc}".splitlines()[0]
+        logger.warning("catalog table %s failed to load (retry in %.0fs): %s", table.name, delay, table.error)
+
+    def _stale(self, table: CatalogTable) -> bool:
+        now = time.time()
+        if now < table.retry_at:
+            return False
+        return table.loaded_at is None or now - table.loaded_at > self.max_age
+
+    def _sorted(self, table: CatalogTable, rows) -> Tuple[BaseModel, ...]:
+        return tuple(sorted(rows, key=lambda r: getattr(r, table.key)))
+
+    def _publish(self, rows: Dict[str, Tuple[BaseModel, ...]]) -> None:
+        payload = {name: [r.model_dump(mode="json") for r in items] for name, items in sorted(rows.items())}
+        digest = hashlib.sha1(json.dumps(payload, sort_keys=True, separators=(",", ":")).encode())
+        self._rows = rows
+        self.version = digest.hexdigest()[:16]
+
+    def refresh_if_stale(self, names: Optional[Iterable[str]] = None) -> None:
+        tables = [self._tables[n] for n in names] if names is not None else list(self._tables.values())
+        if any(self._stale(t) for t in tables):
+            with self._lock:
+                self._load([t for t in tables if self._stale(t)])
+
+    def rows(self, name: str) -> Tuple[BaseModel, ...]:
+        self.refresh_if_stale((name,))
+        rows = self._rows.get(name)
+        if rows is None:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=f"Catalog {name} is unavailable")
+        return rows
+
+    def upsert(self, name: str, row: BaseModel) -> None:
+        # Called after the router's commit; a snapshot that was never loaded is left to load()
+        table = self._tables[name]
+        with self._lock:
+            if name not in self._rows:
+                return
+            key = getattr(row, table.key)
+            others = [r for r in self._rows[name] if getattr(r, table.key) != key]
+            self._publish({**self._rows, name: self._sorted(table, others + [row])})
+
+    def remove(self, name: str, key: Any) -> None:
+        table = self._tables[name]
+        with self._lock:
+            if name not in self._rows:
+                return
+            rows = tuple(r for r in self._rows[name] if getattr(r, table.key) != key)
+            self._publish({**self._rows, name: rows})
+
+    def get(self, name: str, key: Any) -> Optional[BaseModel]:
+        table = self._tables[name]
+        return next((r for r in self.rows(name) if getattr(r, table.key) == key), None)
+
+    def page(
+        self,
+        name: str,
+        page: PageParams,
+        match: Optional[Callable[[BaseModel], bool]] = None,
+    ) -> Tuple[List[BaseModel], Dict[str, str]]:
+        # Same cursor format and headers as Keyset pagination on the primary key
+        key = self._tables[name].key
+        rows = [r for r in self.rows(name) if match is None or match(r)]
+        headers = {CATALOG_VERSION_HEADER: self.version}
+        if page.with_total:
+            headers[TOTAL_ESTIMATE_HEADER] = str(len(rows))
+        if page.cursor:
+            try:
+                after = int(decode_cursor(page.cursor, 1)[0])
+            except (TypeError, ValueError):
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+            rows = [r for r in rows if getattr(r, key) > after]
+        if len(rows) > page.limit:
+            rows = rows[: page.limit]
+            headers[NEXT_CURSOR_HEADER] = encode_cursor(getattr(rows[-1], key))
+        return rows, headers
+
+    def snapshot(self) -> Dict[str, Any]:
+        # Tables that never loaded are left out (listed in status()["errors"])
+        self.refresh_if_stale()
+        return {"version": self.version, **{name: list(items) for name, items in self._rows.items()}}
+
+    def status(self) -> Dict[str, Any]:
+        loaded = [t.loaded_at for t in self._tables.values() if t.loaded_at is not None]
+        return {
+            "version": self.version,
+            "seconds_since_load": (time.time() - min(loaded)) if loaded else None,
+            "rows": {name: len(items) for name, items in self._rows.items()},
+            "errors": {t.name: t.error for t in self._tables.values() if t.error},
+        }
+
+
+def icontains(value: Optional[str], search: str) -> bool:
+    # In-memory twin of ILIKE '%search%'
+    return search.lower() in (value or "").lower()
+
+
+catalog = Catalog()
@@ -1,9 +1,15 @@
 import os
-from typing import Generator
+import threading
+import time
+from collections import deque
+from typing import AsyncGenerator, Generator
 
 from dotenv import load_dotenv
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from urllib.parse import quote_plus
 
 
@@ -22,11 +28,120 @@ else:
     PG_DB = os.getenv("POSTGRES_DB", "Car_rental")
     DATABASE_URL = f"postgresql+psycopg2://{PG_USER}:{quote_plus(PG_PASSWORD)}@{PG_HOST}:{PG_PORT}/{PG_DB}"
 
+# Async driver for the async routers; defaults to the same database via asyncpg
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", "").strip()
+if not ASYNC_DATABASE_URL:
+    _url = make_url(DATABASE_URL)
+    if _url.get_backend_name() == "postgresql":
+        _url = _url.set(drivername="postgresql+asyncpg")
+    ASYNC_DATABASE_URL = _url.render_as_string(hide_password=False)
+
+# Connection pool (per engine; the sync and async engines each get one)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "-1"))  # seconds, -1 (default) disables
+# "true": SELECT 1 on every checkout; "false": rely on DB_POOL_RECYCLE and reconnect on error
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").strip().lower() in {"1", "true", "yes"}
+# Server-side timeouts in milliseconds, 0 disables (Postgres only)
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+DB_IDLE_IN_TX_TIMEOUT_MS = int(os.getenv("DB_IDLE_IN_TX_TIMEOUT_MS", "0"))
+
+
+class PoolWaitStats:
+    # Time spent waiting for a pooled connection at checkout
+    def __init__(self, window: int = 1024):
+        self._lock = threading.Lock()
+        self._recent: deque = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._recent.append(seconds)
+            self.count += 1
+            self.total += seconds
+            self.max = max(self.max, seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            recent = sorted(self._recent)
+            count, total, max_ = self.count, self.total, self.max
+        p99 = recent[min(len(recent) - 1, int(len(recent) * 0.99))] if recent else 0.0
+        return {
+            "checkouts": count,
+            "avg_ms": round(total / count * 1000, 3) if count else 0.0,
+            "p99_ms": round(p99 * 1000, 3),
+            "max_ms": round(max_ * 1000, 3),
+        }
+
+
+class TimedQueuePool(QueuePool):
+    wait_stats = PoolWaitStats()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            self.wait_stats.record(time.perf_counter() - started)
+
+
+class TimedAsyncQueuePool(AsyncAdaptedQueuePool):
+    wait_stats = PoolWaitStats()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            self.wait_stats.record(time.perf_counter() - started)
+
+
+def _engine_options(url: str, poolclass, is_async: bool) -> dict:
+    options = {"pool_pre_ping": DB_POOL_PRE_PING}
+    if make_url(url).get_backend_name() != "postgresql":
+        return options
+    options.update(
+        poolclass=poolclass,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+    )
+    settings = {}
+    if DB_STATEMENT_TIMEOUT_MS > 0:
+        settings["statement_timeout"] = str(DB_STATEMENT_TIMEOUT_MS)
+    if DB_IDLE_IN_TX_TIMEOUT_MS > 0:
+        settings["idle_in_transaction_session_timeout"] = str(DB_IDLE_IN_TX_TIMEOUT_MS)
+    if settings:
+        if is_async:
+            options["connect_args"] = {"server_settings": settings}
+        else:
+            options["connect_args"] = {"options": " ".join(f"-c {k}={v}" for k, v in settings.items())}
+    return options
+
+
+def pool_status(pool) -> dict:
+    if not isinstance(pool, QueuePool):
+        return {"pool": type(pool).__name__}
+    status = {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(0, pool.overflow()),
+        "max_overflow": pool._max_overflow,
+    }
+    if isinstance(pool, (TimedQueuePool, TimedAsyncQueuePool)):
+        status["checkout_wait"] = pool.wait_stats.snapshot()
+    return status
+
 
 Base = declarative_base()
 
 
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+engine = create_engine(DATABASE_URL, **_engine_options(DATABASE_URL, TimedQueuePool, is_async=False))
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
 
@@ -38,3 +153,13 @@ def get_db() -> Generator:
         db.close()
 
 
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL, **_engine_options(ASYNC_DATABASE_URL, TimedAsyncQueuePool, is_async=True)
+)
+# expire_on_commit=False: attributes must not lazy-load (implicit IO) after commit
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+
+async def get_async_db() -> AsyncGenerator:
+    async with AsyncSessionLocal() as db:
+        yield db
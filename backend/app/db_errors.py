@@ -0,0 +1,35 @@
+from typing import Optional
+
+from sqlalchemy.exc import IntegrityError
+
+
+# Postgres SQLSTATE codes raised by constraint-backed writes
+UNIQUE_VIOLATION = "23505"
+FOREIGN_KEY_VIOLATION = "23503"
+
+
+def integrity_code(exc: IntegrityError) -> Optional[str]:
+    # psycopg2 exposes .pgcode; the asyncpg adapter sets both .pgcode and .sqlstate
+    code = getattr(exc.orig, "pgcode", None) or getattr(exc.orig, "sqlstate", None)
+    if code:
+        return code
+    # SQLite (local runs) has no SQLSTATE, only the message
+    message = str(exc.orig)
+    if message.startswith("UNIQUE constraint failed"):
+        return UNIQUE_VIOLATION
+    if message.startswith("FOREIGN KEY constraint failed"):
+        return FOREIGN_KEY_VIOLATION
+    return None
+
+
+def integrity_constraint(exc: IntegrityError) -> Optional[str]:
+    # Name of the violated constraint: psycopg2 has it in .diag, the asyncpg adapter
+    # keeps the asyncpg exception (with .constraint_name) as its cause; None on SQLite
+    diag = getattr(exc.orig, "diag", None)
+    if diag is not None:
+        return diag.constraint_name
+    for error in (exc.orig, exc.orig.__cause__):
+        name = getattr(error, "constraint_name", None)
+        if name:
+            return name
+    return None
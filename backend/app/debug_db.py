@@ -0,0 +1,150 @@
+import html as _html
+import time
+from typing import Iterator, List, Optional
+
+from sqlalchemy import text
+
+from .database import engine
+
+
+PAGE_SIZE = 500
+
+_HEAD = """
+<html><head><meta charset=\"utf-8\"><title>DB Dump</title>
+<style>
+body{font-family: -apple-system, BlinkMacSystemFont, Segoe UI, Roboto, Oxygen, Ubuntu, Cantarell, Helvetica, Arial, 'Apple Color Emoji','Segoe UI Emoji','Segoe UI Symbol'}
+table{border-collapse:collapse; margin:12px 0; width:100%;}
+th,td{border:1px solid #ddd; padding:6px; font-family: ui-monospace, SFMono-Regular, Menlo, Monaco, Consolas, 'Liberation Mono', 'Courier New', monospace;}
+th{background:#fafafa; text-align:left}
+h2{margin-top:28px}
+.meta{color:#666; font-size:13px}
+</style></head><body>
+<h1>Database Dump</h1>
+"""
+
+
+def _esc(value) -> str:
+    return _html.escape(str(value))
+
+
+def _error(label: str, exc: Exception) -> str:
+    return f"<pre style=\"color:#b00\">{label} error: {_esc(exc)}</pre>"
+
+
+def _tables(conn) -> List[tuple]:
+    # Planner estimate from pg_class instead of COUNT(*); -1 means never analyzed (PG14+)
+    return conn.execute(
+        text(
+            """
+            SELECT c.relname AS table_name, c.reltuples::bigint AS estimate
+            FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = 'public' AND c.relkind IN ('r', 'p')
+            ORDER BY c.relname
+            """
+        )
+    ).all()
+
+
+def _primary_key(conn, table_name: str) -> List[str]:
+    return conn.execute(
+        text(
+            """
+            SELECT a.attname
+            FROM pg_index i
+            JOIN pg_class c ON c.oid = i.indrelid
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
+            WHERE n.nspname = 'public' AND c.relname = :table_name AND i.indisprimary
+            ORDER BY array_position(i.indkey::int2[], a.attnum)
+            """
+        ),
+        {"table_name": table_name},
+    ).scalars().all()
+
+
+def _set_budget(conn, deadline: float) -> None:
+    # Bound each statement by what is left of the per-table budget (transaction-local)
+    remaining_ms = max(1, int((deadline - time.monotonic()) * 1000))
+    conn.execute(text("SELECT set_config('statement_timeout', :ms, true)"), {"ms": str(remaining_ms)})
+
+
+def _render_table(conn, table_name: str, estimate: int, exact: bool, max_rows: Optional[int], max_seconds: float) -> Iterator[str]:
+    quote = conn.dialect.identifier_preparer.quote
+    deadline = time.monotonic() + max_seconds
+    yield f"<h2>{_esc(table_name)}</h2>"
+
+    if exact:
+        try:
+            _set_budget(conn, deadline)
+            count = conn.execute(text(f"SELECT COUNT(*) FROM {quote(table_name)}")).scalar_one()
+            yield f"<div class=\"meta\">count: {count}</div>"
+        except Exception as exc:
+            conn.rollback()
+            yield _error("COUNT", exc)
+    else:
+        yield f"<div class=\"meta\">count (estimate): {estimate if estimate >= 0 else 'unknown'}</div>"
+
+    pk = _primary_key(conn, table_name)
+    order_by = ", ".join(quote(col) for col in pk)
+    headers: Optional[List[str]] = None
+    last_key: Optional[tuple] = None
+    emitted = 0
+    truncated = False
+    while max_rows is None or emitted < max_rows:
+        if time.monotonic() >= deadline:
+            truncated = True
+            break
+        page = PAGE_SIZE if max_rows is None else min(PAGE_SIZE, max_rows - emitted)
+        params = {"limit": page}
+        where = ""
+        if last_key is not None:
+            where = f"WHERE ({order_by}) > ({', '.join(f':k{i}' for i in range(len(pk)))})"
+            params.update({f"k{i}": v for i, v in enumerate(last_key)})
+        sql = f"SELECT * FROM {quote(table_name)} {where}"
+        if pk:
+            sql += f" ORDER BY {order_by}"
+        try:
+            _set_budget(conn, deadline)
+            rows = conn.execute(text(sql + " LIMIT :limit"), params).mappings().all()
+        except Exception as exc:
+            conn.rollback()
+            yield _error("SELECT", exc)
+            truncated = True
+            break
+        if not rows:
+            break
+        if headers is None:
+            headers = list(rows[0].keys())
+            yield "<table><thead><tr>" + "".join(f"<th>{_esc(h)}</th>" for h in headers) + "</tr></thead><tbody>"
+        yield "".join(
+            "<tr>" + "".join(f"<td>{_esc(r.get(h))}</td>" for h in headers) + "</tr>" for r in rows
+        )
+        emitted += len(rows)
+        if not pk or len(rows) < page:
+            # Without a primary key there is no stable keyset to continue from
+            truncated = not pk and len(rows) == page
+            break
+        last_key = tuple(rows[-1][col] for col in pk)
+    conn.rollback()
+
+    if headers is None:
+        yield "<div class=\"meta\">(no rows)</div>"
+        return
+    yield "</tbody></table>"
+    if truncated:
+        yield f"<div class=\"meta\">truncated after {emitted} rows</div>"
+
+
+def iter_debug_db_html(all: bool, limit: int, exact: bool, max_seconds: float) -> Iterator[str]:
+    with engine.connect() as conn:
+        tables = _tables(conn)
+        conn.rollback()
+        yield _HEAD
+        yield (
+            f"<div class=\"meta\">tables: {len(tables)} | limit={limit} | all={all} | "
+            f"exact={exact} | max_seconds/table={max_seconds}</div>"
+        )
+        for table_name, estimate in tables:
+            yield from _render_table(conn, table_name, estimate, exact, None if all else limit, max_seconds)
+        yield "</body></html>"
@@ -0,0 +1,26 @@
+import hashlib
+import json
+from typing import Any, Iterable, Mapping, Optional
+
+from fastapi import Response, status
+
+
+def make_etag(kind: str, versions: Iterable[Any]) -> str:
+    # Strong ETag from the (id, version, ...) tuples of the rows in a response body.
+    # Row versions only grow, so a changed row or a changed page membership changes the tag.
+    raw = json.dumps([kind, [list(v) for v in versions]], separators=(",", ":"), default=str)
+    return '"' + hashlib.sha1(raw.encode()).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    # If-None-Match uses the weak comparison (RFC 9110 13.1.2): W/"x" matches "x"
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = (t.strip() for t in if_none_match.split(","))
+    return etag in (t[2:] if t.startswith("W/") else t for t in tags)
+
+
+def not_modified(etag: str, headers: Optional[Mapping[str, str]] = None) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={**(headers or {}), "ETag": etag})
@@ -0,0 +1,62 @@
+import csv
+import io
+import json
+import os
+from datetime import date
+from decimal import Decimal
+from typing import Iterator, Literal
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select
+
+from .database import engine
+
+
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "2000"))
+
+ExportFormat = Literal["csv", "ndjson"]
+
+_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Unsupported type: {type(value).__name__}")
+
+
+def iter_export(stmt: Select, fmt: ExportFormat, chunk_rows: int = EXPORT_CHUNK_ROWS) -> Iterator[bytes]:
+    # Own connection: the request session is closed before the body is streamed.
+    # stream_results uses a server-side (named) cursor, so only one chunk is in memory.
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=chunk_rows).execute(stmt)
+        keys = list(result.keys())
+        if fmt == "csv":
+            buf = io.StringIO()
+            writer = csv.writer(buf)
+            writer.writerow(keys)
+            yield buf.getvalue().encode()
+            for rows in result.partitions():
+                buf.seek(0)
+                buf.truncate()
+                writer.writerows(rows)
+                yield buf.getvalue().encode()
+        else:
+            for rows in result.partitions():
+                yield "".join(
+                    json.dumps(dict(zip(keys, row)), default=_json_default, ensure_ascii=False) + "\n"
+                    for row in rows
+                ).encode()
+
+
+def export_response(stmt: Select, fmt: ExportFormat, basename: str) -> StreamingResponse:
+    return StreamingResponse(
+        iter_export(stmt, fmt),
+        media_type=_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{basename}.{fmt}"'},
+    )
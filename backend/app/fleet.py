@@ -0,0 +1,163 @@
+from collections import Counter
+from datetime import date
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import case, delete, func, insert, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from .availability import INACTIVE_CONTRACT_STATUSES
+from .models import Car, Contract, ContractCar, FleetCarCount, FleetContractCount
+
+
+NO_BRANCH = 0
+NO_END_DATE = date.max
+
+# Both dialects support INSERT ... ON CONFLICT DO UPDATE with the same construct
+_UPSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+# (Status, EndDate) of a contract before or after a write; None: row absent
+ContractState = Optional[Tuple[Optional[str], Optional[date]]]
+
+
+def is_active_contract(contract_status: Optional[str]) -> bool:
+    # Python twin of the availability filter on contract status
+    return (contract_status or "").lower() not in INACTIVE_CONTRACT_STATUSES
+
+
+def _branch(branch_id: Optional[int]) -> int:
+    return NO_BRANCH if branch_id is None else branch_id
+
+
+class FleetDelta:
+    """Changes one transaction makes to the fleet aggregates (fleetcarcount, fleetcontractcount).
+
+    Writers record the old and new car/contract states they already have from their
+    own statements, then `apply` adds the net counts with one upsert per table right
+    before commit, so the aggregates commit or roll back with the rows they describe.
+    """
+
+    def __init__(self):
+        self.cars: Counter = Counter()
+        self.contracts: Counter = Counter()
+
+    def car(self, branch_id: Optional[int], old_status: Optional[str], new_status: Optional[str]) -> None:
+        self.cars[(_branch(branch_id), old_status or "")] -= 1
+        self.cars[(_branch(branch_id), new_status or "")] += 1
+
+    def contract(self, branch_ids: Iterable[Optional[int]], old: ContractState, new: ContractState) -> None:
+        # A contract counts once for every branch owning one of its cars
+        branches = {_branch(b) for b in branch_ids} or {NO_BRANCH}
+        for state, sign in ((old, -1), (new, 1)):
+            if state is not None and is_active_contract(state[0]):
+                for branch_id in branches:
+                    self.contracts[(branch_id, state[1] or NO_END_DATE)] += sign
+
+    def _statements(self, dialect_name: str):
+        upsert = _UPSERTS[dialect_name]
+        for model, counter, count_column in (
+            (FleetCarCount, self.cars, FleetCarCount.CarCount),
+            (FleetContractCount, self.contracts, FleetContractCount.ActiveCount),
+        ):
+            key_columns = [model.__mapper__.get_property_by_column(c).key for c in model.__mapper__.primary_key]
+            # Sorted keys: concurrent writers lock aggregate rows in the same order
+            rows = [
+                {**dict(zip(key_columns, key)), count_column.key: n}
+                for key, n in sorted(counter.items())
+                if n
+            ]
+            if rows:
+                stmt = upsert(model)
+                count_name = count_column.property.columns[0].name
+                yield stmt.on_conflict_do_update(
+                    index_elements=list(model.__mapper__.primary_key),
+                    set_={count_name: count_column + stmt.excluded[count_name]},
+                ), rows
+
+    async def apply_async(self, db: AsyncSession) -> None:
+        for stmt, rows in self._statements(db.get_bind().dialect.name):
+            await db.execute(stmt, rows)
+
+    def apply(self, db: Session) -> None:
+        for stmt, rows in self._statements(db.get_bind().dialect.name):
+            db.execute(stmt, rows)
+
+
+def rebuild(db: Session) -> None:
+    # Recompute both aggregates from car/contract (O(cars + contracts)): initial backfill
+    # and repair after writes made outside the app. Caller commits.
+    if db.get_bind().dialect.name == "postgresql":
+        # Writers holding aggregate row locks finish first; later ones wait for the rebuild
+        db.execute(text("LOCK TABLE fleetcarcount, fleetcontractcount IN EXCLUSIVE MODE"))
+    db.execute(delete(FleetCarCount))
+    db.execute(delete(FleetContractCount))
+
+    cars = select(
+        func.coalesce(Car.OwnerBranchID, NO_BRANCH).label("branch_id"),
+        func.coalesce(Car.Status, "").label("status"),
+    ).subquery()
+    db.execute(
+        insert(FleetCarCount).from_select(
+            [FleetCarCount.BranchID, FleetCarCount.Status, FleetCarCount.CarCount],
+            select(cars.c.branch_id, cars.c.status, func.count()).group_by(cars.c.branch_id, cars.c.status),
+        )
+    )
+
+    contracts = (
+        select(
+            Contract.ContractID,
+            func.coalesce(Car.OwnerBranchID, NO_BRANCH).label("branch_id"),
+            func.coalesce(Contract.EndDate, NO_END_DATE).label("end_date"),
+        )
+        .outerjoin(ContractCar, ContractCar.ContractID == Contract.ContractID)
+        .outerjoin(Car, Car.CarID == ContractCar.CarID)
+        .where(func.lower(func.coalesce(Contract.Status, "")).not_in(INACTIVE_CONTRACT_STATUSES))
+        .distinct()
+        .subquery()
+    )
+    db.execute(
+        insert(FleetContractCount).from_select(
+            [FleetContractCount.BranchID, FleetContractCount.EndDate, FleetContractCount.ActiveCount],
+            select(contracts.c.branch_id, contracts.c.end_date, func.count()).group_by(
+                contracts.c.branch_id, contracts.c.end_date
+            ),
+        )
+    )
+
+
+def summary(db: Session, today: Optional[date] = None) -> List[dict]:
+    # Reads only live aggregate rows: O(branches x car statuses + branches x open end dates)
+    today = today or date.today()
+    branches: dict = {}
+
+    def entry(branch_id: int) -> dict:
+        return branches.setdefault(
+            branch_id,
+            {
+                "branch_id": None if branch_id == NO_BRANCH else branch_id,
+                "cars_by_status": {},
+                "cars_total": 0,
+                "active_contracts": 0,
+                "overdue_contracts": 0,
+            },
+        )
+
+    for branch_id, car_status, n in db.execute(
+        select(FleetCarCount.BranchID, FleetCarCount.Status, FleetCarCount.CarCount).where(FleetCarCount.CarCount != 0)
+    ):
+        row = entry(branch_id)
+        row["cars_by_status"][car_status] = n
+        row["cars_total"] += n
+
+    overdue = case((FleetContractCount.EndDate < today, FleetContractCount.ActiveCount), else_=0)
+    for branch_id, active, late in db.execute(
+        select(FleetContractCount.BranchID, func.sum(FleetContractCount.ActiveCount), func.sum(overdue))
+        .where(FleetContractCount.ActiveCount != 0)
+        .group_by(FleetContractCount.BranchID)
+    ):
+        row = entry(branch_id)
+        row["active_contracts"] = int(active or 0)
+        row["overdue_contracts"] = int(late or 0)
+
+    return [branches[k] for k in sorted(branches)]
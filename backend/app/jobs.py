@@ -0,0 +1,286 @@
+import logging
+import os
+import threading
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import delete, exists, func, insert, literal_column, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from .availability import INACTIVE_CONTRACT_STATUSES
+from .database import SessionLocal
+from .fleet import FleetDelta
+from .models import Car, Contract, ContractCar, OutboxJob, ReturnReceipt
+
+
+logger = logging.getLogger(__name__)
+
+
+JOBS_ENABLED = os.getenv("JOBS_ENABLED", "true").strip().lower() not in {"0", "false", "no"}
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_BATCH_SIZE = int(os.getenv("JOB_BATCH_SIZE", "100"))
+# Idle workers poll this often; enqueuing requests wake one up right after commit
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "1"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_RETRY_SECONDS = float(os.getenv("JOB_RETRY_SECONDS", "5"))  # doubled after every failed attempt
+
+RELEASE_CARS = "release_cars"
+AUTO_RETURN_RECEIPT = "auto_return_receipt"
+READY_CAR_STATUS = "Ready"
+
+# kind -> handler(db, payloads); runs one batch in the claiming transaction, must be idempotent
+JobHandler = Callable[[Session, List[dict]], None]
+
+
+def _job_rows(jobs) -> List[dict]:
+    return [{"Kind": kind, "Payload": payload} for kind, payload in jobs]
+
+
+async def enqueue_async(db: AsyncSession, *jobs) -> None:
+    # (kind, payload) pairs, one INSERT; commits or rolls back with the caller's transaction
+    if jobs:
+        await db.execute(insert(OutboxJob), _job_rows(jobs))
+
+
+def enqueue(db: Session, *jobs) -> None:
+    if jobs:
+        db.execute(insert(OutboxJob), _job_rows(jobs))
+
+
+class JobQueue:
+    """Worker pool draining the outboxjob table.
+
+    Each pass claims up to `batch_size` ready jobs with FOR UPDATE SKIP LOCKED (so
+    workers never share a job), runs one handler call per kind and deletes the jobs
+    in the same transaction. A failing batch is retried job by job; a failing job is
+    delayed with exponential backoff and marked dead after `max_attempts`.
+    """
+
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        workers: int = JOB_WORKERS,
+        batch_size: int = JOB_BATCH_SIZE,
+        poll_interval: float = JOB_POLL_SECONDS,
+        max_attempts: int = JOB_MAX_ATTEMPTS,
+        retry_delay: float = JOB_RETRY_SECONDS,
+    ):
+        self._session_factory = session_factory
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self.poll_interval = poll_interval
+        self.max_attempts = max(1, max_attempts)
+        self.retry_delay = retry_delay
+        self._handlers: Dict[str, JobHandler] = {}
+        self.processed = 0
+        self.failed = 0
+        self.last_error: Optional[str] = None
+        self._counter_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def register(self, kind: str, handler: JobHandler) -> None:
+        self._handlers[kind] = handler
+
+    def notify(self) -> None:
+        self._wake.set()
+
+    def _count(self, processed: int = 0, failed: int = 0, error: Optional[str] = None) -> None:
+        with self._counter_lock:
+            self.processed += processed
+            self.failed += failed
+            if error is not None:
+                self.last_error = error
+
+    def _claim(self, db: Session) -> list:
+        return db.execute(
+            select(OutboxJob.JobID, OutboxJob.Kind, OutboxJob.Payload, OutboxJob.Attempts)
+            .where(OutboxJob.DeadAt.is_(None), OutboxJob.RunAfter <= func.now())
+            .order_by(OutboxJob.JobID)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        ).all()
+
+    def _run(self, db: Session, jobs: list) -> None:
+        by_kind: Dict[str, list] = defaultdict(list)
+        for job in jobs:
+            by_kind[job.Kind].append(job)
+        for kind in sorted(by_kind):
+            handler = self._handlers.get(kind)
+            if handler is None:
+                raise LookupError(f"no handler for job kind {kind!r}")
+            handler(db, [job.Payload for job in by_kind[kind]])
+        db.execute(delete(OutboxJob).where(OutboxJob.JobID.in_([job.JobID for job in jobs])))
+
+    def _fail(self, db: Session, job, error: str) -> None:
+        attempts = job.Attempts + 1
+        values = {"Attempts": attempts, "LastError": error[:500]}
+        if attempts >= self.max_attempts:
+            values["DeadAt"] = func.now()
+            logger.error("job %s (%s) dead after %d attempts: %s", job.JobID, job.Kind, attempts, error)
+        else:
+            delay = self.retry_delay * 2 ** (attempts - 1)
+            values["RunAfter"] = func.now() + literal_column(f"interval '{delay} seconds'")
+        db.execute(update(OutboxJob).where(OutboxJob.JobID == job.JobID).values(**values))
+
+    def run_once(self) -> int:
+        # One batch; returns the number of jobs claimed (0: queue empty or all locked)
+        db = self._session_factory()
+        try:
+            jobs = self._claim(db)
+            if not jobs:
+                db.commit()
+                return 0
+            try:
+                self._run(db, jobs)
+                db.commit()
+                self._count(processed=len(jobs))
+                return len(jobs)
+            except Exception as exc:
+                db.rollback()
+                logger.warning("job batch of %d failed, retrying one by one: %s", len(jobs), exc)
+            for job in jobs:
+                # Re-claim: another worker may have taken the job since the rollback
+                claimed = db.execute(
+                    select(OutboxJob.JobID, OutboxJob.Kind, OutboxJob.Payload, OutboxJob.Attempts)
+                    .where(OutboxJob.JobID == job.JobID, OutboxJob.DeadAt.is_(None))
+                    .with_for_update(skip_locked=True)
+                ).one_or_none()
+                if claimed is None:
+                    db.commit()
+                    continue
+                try:
+                    self._run(db, [claimed])
+                    db.commit()
+                    self._count(processed=1)
+                except Exception as exc:
+                    db.rollback()
+                    self._fail(db, claimed, str(exc))
+                    db.commit()
+                    self._count(failed=1, error=str(exc))
+            return len(jobs)
+        finally:
+            db.close()
+
+    def drain(self) -> int:
+        # Run batches until no ready job is left (tests, shutdown, manual catch-up)
+        total = 0
+        while True:
+            n = self.run_once()
+            total += n
+            if n == 0:
+                return total
+
+    def stats(self) -> dict:
+        db = self._session_factory()
+        try:
+            live = OutboxJob.DeadAt.is_(None)
+            depth, ready, oldest = db.execute(
+                select(
+                    func.count(),
+                    func.count().filter(OutboxJob.RunAfter <= func.now()),
+                    func.extract("epoch", func.now() - func.min(OutboxJob.CreatedAt)),
+                ).where(live)
+            ).one()
+            dead = db.execute(select(func.count()).where(OutboxJob.DeadAt.is_not(None))).scalar_one()
+        finally:
+            db.close()
+        return {
+            "depth": depth,
+            "ready": ready,
+            "dead": dead,
+            "lag_seconds": float(oldest) if oldest is not None else 0.0,
+            "processed": self.processed,
+            "failed": self.failed,
+            "workers": sum(t.is_alive() for t in self._threads),
+            "last_error": self.last_error,
+        }
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                if self.run_once() >= self.batch_size:
+                    continue  # more may be ready: no wait
+            except Exception:
+                logger.exception("job queue pass failed")
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+    def start(self) -> None:
+        if any(t.is_alive() for t in self._threads):
+            return
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._loop, name=f"job-worker-{i}", daemon=True) for i in range(self.workers)
+        ]
+        for t in self._threads:
+            t.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        for t in self._threads:
+            t.join(timeout=self.poll_interval + 1)
+        self._threads = []
+
+
+# Contract side effects moved out of PUT /contracts/{id} and POST /contracts/{id}/return
+
+
+def release_cars(db: Session, payloads: List[dict]) -> None:
+    # Cars of the given contracts back to "Ready", except cars still held by another
+    # active contract; old status from the locked CTE rows keeps the fleet car counts exact.
+    # Car ids come from the payload: the contract lines may be gone (contract deleted)
+    # by the time the job runs. Jobs queued without them fall back to the lines.
+    contract_ids = {p["contract_id"] for p in payloads}
+    car_ids = {car_id for p in payloads for car_id in p.get("car_ids", ())}
+    by_lines = {p["contract_id"] for p in payloads if "car_ids" not in p}
+    cars = Car.CarID.in_(car_ids)
+    if by_lines:
+        cars = cars | Car.CarID.in_(select(ContractCar.CarID).where(ContractCar.ContractID.in_(by_lines)))
+    held = exists().where(
+        ContractCar.CarID == Car.CarID,
+        ContractCar.ContractID == Contract.ContractID,
+        Contract.ContractID.not_in(contract_ids),
+        func.lower(func.coalesce(Contract.Status, "")).not_in(INACTIVE_CONTRACT_STATUSES),
+    )
+    old = (
+        select(Car.CarID, Car.OwnerBranchID, Car.Status)
+        .where(cars, ~held)
+        .order_by(Car.CarID)
+        .with_for_update()
+        .cte("old_car")
+    )
+    released = db.execute(
+        update(Car)
+        .where(Car.CarID == old.c.CarID)
+        .values(Status=READY_CAR_STATUS, RowVersion=Car.RowVersion + 1)
+        .returning(old.c.OwnerBranchID, old.c.Status)
+        .execution_options(synchronize_session=False)
+    ).all()
+    fleet = FleetDelta()
+    for branch_id, car_status in released:
+        fleet.car(branch_id, car_status, READY_CAR_STATUS)
+    fleet.apply(db)
+
+
+def auto_return_receipt(db: Session, payloads: List[dict]) -> None:
+    # Return receipt for contracts closed without one, dated at the contract EndDate
+    contract_ids = {p["contract_id"] for p in payloads}
+    db.execute(
+        insert(ReturnReceipt).from_select(
+            [ReturnReceipt.ContractID, ReturnReceipt.ReturnDate, ReturnReceipt.Notes],
+            select(Contract.ContractID, Contract.EndDate, literal_column("'Auto-created on status update'"))
+            .where(
+                Contract.ContractID.in_(contract_ids),
+                ~exists().where(ReturnReceipt.ContractID == Contract.ContractID),
+            ),
+        )
+    )
+
+
+job_queue = JobQueue()
+job_queue.register(RELEASE_CARS, release_cars)
+job_queue.register(AUTO_RETURN_RECEIPT, auto_return_receipt)
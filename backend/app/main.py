@@ -1,18 +1,62 @@
-from fastapi import FastAPI, HTTPException, status
+import logging
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException, Query, Response, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, PlainTextResponse, StreamingResponse
 from sqlalchemy import text
 
-from .database import Base, engine
+from .catalog import CATALOG_VERSION_HEADER, catalog
+from .database import Base, async_engine, engine, pool_status
+from .debug_db import iter_debug_db_html
+from .pagination import NEXT_CURSOR_HEADER, TOTAL_ESTIMATE_HEADER
+from .jobs import JOBS_ENABLED, job_queue
+from .metrics import PROMETHEUS_CONTENT_TYPE, MetricsMiddleware, instrument_engine, pool_collector, registry
+from .reconciler import RECONCILER_ENABLED, reconciler
 from .routers.contracts import router as contracts_router
+from .routers.payments import router as payments_router
 from .routers.car import router as cars_router
 from .routers.car import router_alias as vehicles_router
 from .routers.branch import router as branches_router
 from .routers.cartype import router as cartypes_router
+from .routers.customer import router as customers_router
+from .routers.employee import router as employees_router
+from .routers.fleet import router as fleet_router
+from .routers.role import router as roles_router
+from .routers.carbrand import router as carbrands_router
+from .routers.useraccount import router as users_router
+from .routers.reports import router as reports_router
+from .routers.search import router as search_router
+from .routers.surcharge import router as surcharges_router
+
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Reference data for /branches, /roles, /car-brands, /car-types, /surcharges;
+    # if the database is not reachable yet the first request loads it instead
+    try:
+        catalog.load()
+    except Exception:
+        logger.exception("catalog preload failed")
+    # Background sync of contract status from return receipts (keeps GET /contracts read-only)
+    if RECONCILER_ENABLED:
+        reconciler.start()
+    # Workers for contract side effects queued in the outboxjob table
+    if JOBS_ENABLED:
+        job_queue.start()
+    try:
+        yield
+    finally:
+        job_queue.stop()
+        reconciler.stop()
+        await async_engine.dispose()
 
 
 def create_app() -> FastAPI:
-    app = FastAPI(title="HoaProject2 - Car Rental API")
+    app = FastAPI(title="HoaProject2 - Car Rental API", lifespan=lifespan)
 
     # Khởi tạo metadata ORM nếu cần (không ép create_all để tránh khác schema thực tế)
     # Base.metadata.create_all(bind=engine)
@@ -24,13 +68,30 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=[NEXT_CURSOR_HEADER, TOTAL_ESTIMATE_HEADER, CATALOG_VERSION_HEADER, "ETag"],
     )
 
+    # Per-route latency, SQL statements per request and N+1 flags, served on /metrics
+    instrument_engine(engine, "sync")
+    instrument_engine(async_engine.sync_engine, "async")
+    registry.collector(pool_collector({"sync": engine.pool, "async": async_engine.sync_engine.pool}))
+    app.add_middleware(MetricsMiddleware)
+
     app.include_router(contracts_router)
+    app.include_router(payments_router)
     app.include_router(cars_router)
     app.include_router(vehicles_router)
     app.include_router(branches_router)
     app.include_router(cartypes_router)
+    app.include_router(customers_router)
+    app.include_router(employees_router)
+    app.include_router(fleet_router)
+    app.include_router(roles_router)
+    app.include_router(carbrands_router)
+    app.include_router(users_router)
+    app.include_router(reports_router)
+    app.include_router(search_router)
+    app.include_router(surcharges_router)
 
     @app.get("/")
     def root():
@@ -40,12 +101,42 @@ def create_app() -> FastAPI:
                 "/contracts",
                 "/cars",
                 "/car-types",
+                "/customers",
+                "/employees",
+                "/fleet/summary",
+                "/reports/revenue",
+                "/reports/payments",
+                "/roles",
+                "/car-brands",
+                "/users",
+                "/search",
+                "/surcharges",
+                "/catalog",
                 "/health",
+                "/metrics",
                 "/docs",
                 "/redoc",
             ],
         }
 
+    @app.get("/catalog")
+    def get_catalog(response: Response):
+        # Whole reference-data snapshot in one response
+        snapshot = catalog.snapshot()
+        response.headers[CATALOG_VERSION_HEADER] = snapshot["version"]
+        return snapshot
+
+    @app.get("/catalog/version")
+    def catalog_version():
+        # Cheap poll: refetch the lists only when the version changes
+        catalog.refresh_if_stale()
+        return catalog.status()
+
+    @app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+    def metrics():
+        # Prometheus text exposition format
+        return PlainTextResponse(registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
     @app.get("/health")
     def health():
         return {"status": "ok"}
@@ -62,74 +153,46 @@ def create_app() -> FastAPI:
                 detail=f"db_error: {exc}",
             )
 
-    @app.get("/_debug/db", response_class=HTMLResponse)
-    def debug_db(all: bool = False, limit: int = 200):
-        # Render HTML danh sách toàn bộ bảng và dữ liệu (giới hạn theo limit nếu all=False)
-        import html as _html
-
-        with engine.connect() as conn:
-            tables = conn.execute(
-                text(
-                    """
-                    SELECT table_name
-                    FROM information_schema.tables
-                    WHERE table_schema = 'public' AND table_type = 'BASE TABLE'
-                    ORDER BY table_name
-                    """
-                )
-            ).scalars().all()
-
-            parts: list[str] = []
-            parts.append(
-                """
-                <html><head><meta charset=\"utf-8\"><title>DB Dump</title>
-                <style>
-                body{font-family: -apple-system, BlinkMacSystemFont, Segoe UI, Roboto, Oxygen, Ubuntu, Cantarell, Helvetica, Arial, 'Apple Color Emoji','Segoe UI Emoji','Segoe UI Symbol'}
-                table{border-collapse:collapse; margin:12px 0; width:100%;}
-                th,td{border:1px solid #ddd; padding:6px; font-family: ui-monospace, SFMono-Regular, Menlo, Monaco, Consolas, 'Liberation Mono', 'Courier New', monospace;}
-                th{background:#fafafa; text-align:left}
-                h2{margin-top:28px}
-                .meta{color:#666; font-size:13px}
-                </style></head><body>
-                <h1>Database Dump</h1>
-                """
+    @app.get("/health/pool")
+    def health_pool():
+        return {
+            "sync": pool_status(engine.pool),
+            "async": pool_status(async_engine.sync_engine.pool),
+        }
+
+    @app.get("/health/reconciler")
+    def health_reconciler():
+        try:
+            return reconciler.lag()
+        except Exception as exc:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=f"db_error: {exc}",
             )
-            parts.append(f"<div class=\"meta\">tables: {len(tables)} | limit={limit} | all={all}</div>")
-
-            for table_name in tables:
-                try:
-                    count = conn.execute(text(f'SELECT COUNT(*) FROM "{table_name}"')).scalar_one()
-                except Exception as exc:
-                    parts.append(f"<h2>{_html.escape(table_name)}</h2><div class=\"meta\">count: n/a</div>")
-                    parts.append(f"<pre style=\"color:#b00\">COUNT error: {_html.escape(str(exc))}</pre>")
-                    continue
-
-                parts.append(f"<h2>{_html.escape(table_name)}</h2>")
-                parts.append(f"<div class=\"meta\">count: {count}</div>")
-
-                try:
-                    if all:
-                        rows = conn.execute(text(f'SELECT * FROM "{table_name}"')).mappings().all()
-                    else:
-                        rows = conn.execute(
-                            text(f'SELECT * FROM "{table_name}" LIMIT :limit'), {"limit": limit}
-                        ).mappings().all()
-                except Exception as exc:
-                    parts.append(f"<pre style=\"color:#b00\">SELECT error: {_html.escape(str(exc))}</pre>")
-                    continue
-
-                if not rows:
-                    parts.append("<div class=\"meta\">(no rows)</div>")
-                    continue
-
-                headers = list(rows[0].keys())
-                parts.append("<table><thead><tr>" + "".join(f"<th>{_html.escape(str(h))}</th>" for h in headers) + "</tr></thead><tbody>")
-                for r in rows:
-                    parts.append("<tr>" + "".join(f"<td>{_html.escape(str(r.get(h)))}</td>" for h in headers) + "</tr>")
-                parts.append("</tbody></table>")
-
-            parts.append("</body></html>")
-            return HTMLResponse("".join(parts))
+
+    @app.get("/health/jobs")
+    def health_jobs():
+        # Queue depth, lag of the oldest pending job, dead jobs and worker counters
+        try:
+            return job_queue.stats()
+        except Exception as exc:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=f"db_error: {exc}",
+            )
+
+    @app.get("/_debug/db", response_class=HTMLResponse)
+    def debug_db(
+        all: bool = False,
+        limit: int = Query(200, ge=0),
+        exact: bool = Query(False, description="COUNT(*) instead of pg_class.reltuples estimates"),
+        max_seconds: float = Query(5.0, gt=0, description="Time budget per table"),
+    ):
+        # Stream HTML danh sách bảng và dữ liệu (giới hạn theo limit nếu all=False)
+        return StreamingResponse(
+            iter_debug_db_html(all=all, limit=limit, exact=exact, max_seconds=max_seconds),
+            media_type="text/html; charset=utf-8",
+        )
     return app
 
 
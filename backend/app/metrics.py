@@ -0,0 +1,294 @@
+import bisect
+import logging
+import os
+import threading
+import time
+from collections import Counter as TallyCounter
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+
+from .database import pool_status
+
+
+logger = logging.getLogger(__name__)
+
+
+# A statement repeated this many times in one request is flagged as a likely N+1 pattern
+N_PLUS_ONE_THRESHOLD = int(os.getenv("METRICS_N_PLUS_ONE_THRESHOLD", "5"))
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(**labels: str) -> Labels:
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(labels) + ([extra] if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._lock = threading.Lock()
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}", *self.samples()]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str):
+        super().__init__(name, documentation)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = _labels(**labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(k)} {_format_value(v)}" for k, v in values]
+
+
+class Histogram(Metric):
+    """Cumulative-bucket histogram; observe() is O(log buckets) under a short lock."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last: +Inf), sum, count]
+        self._series: Dict[Labels, list] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = _labels(**labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            series = sorted((k, (list(v[0]), v[1], v[2])) for k, v in self._series.items())
+        lines = []
+        for key, (counts, total, count) in series:
+            cumulative = 0
+            for bound, n in zip((*self.buckets, float("inf")), counts):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{_format_labels(key, ('le', _format_value(float(bound))))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[Metric] = []
+        self._collectors: List = []
+
+    def add(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def collector(self, fn):
+        # fn() -> lines of gauges read at scrape time (pool state, queue counters, ...)
+        self._collectors.append(fn)
+        return fn
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for fn in self._collectors:
+            try:
+                lines.extend(fn())
+            except Exception:
+                logger.exception("metrics collector %s failed", getattr(fn, "__name__", fn))
+        return "\n".join(lines) + "\n"
+
+
+def gauge_lines(name: str, documentation: str, values: Sequence[Tuple[Labels, float]]) -> List[str]:
+    return [
+        f"# HELP {name} {documentation}",
+        f"# TYPE {name} gauge",
+        *(f"{name}{_format_labels(k)} {_format_value(v)}" for k, v in values),
+    ]
+
+
+registry = Registry()
+
+http_request_duration = registry.add(Histogram(
+    "http_request_duration_seconds", "Request latency by route template", LATENCY_BUCKETS
+))
+http_request_statements = registry.add(Histogram(
+    "http_request_db_statements", "SQL statements executed per request", COUNT_BUCKETS
+))
+http_request_db_time = registry.add(Histogram(
+    "http_request_db_seconds", "Time spent in SQL statements per request", LATENCY_BUCKETS
+))
+http_n_plus_one = registry.add(Counter(
+    "http_request_n_plus_one_total",
+    f"Requests repeating one SQL statement at least {N_PLUS_ONE_THRESHOLD} times (likely N+1)",
+))
+db_query_duration = registry.add(Histogram(
+    "db_query_duration_seconds", "Duration of single SQL statements (requests and background workers)", QUERY_BUCKETS
+))
+
+
+class RequestStats:
+    __slots__ = ("statements", "db_seconds", "by_statement")
+
+    def __init__(self):
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.by_statement: TallyCounter = TallyCounter()
+
+
+# Set by MetricsMiddleware for the request being served; copied into threadpool calls
+# and greenlets, and mutated in place, so sync and async routers both report into it
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+_instrumented: set = set()
+
+
+def instrument_engine(engine, name: str) -> None:
+    # Sync Engine, or AsyncEngine.sync_engine; safe to call more than once
+    if engine in _instrumented:
+        return
+    _instrumented.add(engine)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get("metrics_started")
+        if not started:
+            return
+        elapsed = time.perf_counter() - started.pop()
+        db_query_duration.observe(elapsed, engine=name)
+        stats = _current.get()
+        if stats is not None:
+            stats.statements += 1
+            stats.db_seconds += elapsed
+            stats.by_statement[statement] += 1
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        # A failed statement never reaches after_cursor_execute
+        started = context.connection.info.get("metrics_started") if context.connection is not None else None
+        if started:
+            started.pop()
+
+
+def pool_collector(pools: Dict[str, object]):
+    # Scrape-time gauges from app.database.pool_status for each named pool
+    def collect() -> List[str]:
+        statuses = {name: pool_status(pool) for name, pool in pools.items()}
+        lines: List[str] = []
+        for field, documentation in (
+            ("size", "Configured pool size"),
+            ("checked_out", "Connections in use"),
+            ("idle", "Idle pooled connections"),
+            ("overflow", "Connections open beyond the pool size"),
+        ):
+            lines += gauge_lines(
+                f"db_pool_{field}",
+                documentation,
+                [(_labels(engine=name), st[field]) for name, st in statuses.items() if field in st],
+            )
+        waits = [(name, st["checkout_wait"]) for name, st in statuses.items() if "checkout_wait" in st]
+        for field, metric, documentation, scale in (
+            ("checkouts", "db_pool_checkouts", "Connection checkouts since start", 1),
+            ("avg_ms", "db_pool_checkout_wait_avg_seconds", "Mean wait for a pooled connection", 0.001),
+            ("p99_ms", "db_pool_checkout_wait_p99_seconds", "p99 wait for a pooled connection (recent checkouts)", 0.001),
+            ("max_ms", "db_pool_checkout_wait_max_seconds", "Longest wait for a pooled connection", 0.001),
+        ):
+            lines += gauge_lines(metric, documentation, [(_labels(engine=name), w[field] * scale) for name, w in waits])
+        return lines
+
+    return collect
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware: request latency, SQL statement count/time and N+1 flags per route.
+
+    Routes are labelled by their template (/contracts/{contract_id}), requests that match
+    no route by "unmatched", so label cardinality stays bounded.
+    """
+
+    def __init__(self, app, n_plus_one_threshold: int = N_PLUS_ONE_THRESHOLD):
+        self.app = app
+        self.n_plus_one_threshold = n_plus_one_threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = RequestStats()
+        token = _current.set(stats)
+        status_code = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_code[0] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            _current.reset(token)
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            self._record(scope["method"], route, str(status_code[0]), elapsed, stats)
+
+    def _record(self, method: str, route: str, status_code: str, elapsed: float, stats: RequestStats) -> None:
+        http_request_duration.observe(elapsed, method=method, route=route, status=status_code)
+        http_request_statements.observe(stats.statements, method=method, route=route)
+        http_request_db_time.observe(stats.db_seconds, method=method, route=route)
+        if stats.by_statement:
+            statement, repeats = stats.by_statement.most_common(1)[0]
+            if repeats >= self.n_plus_one_threshold:
+                http_n_plus_one.inc(method=method, route=route)
+                logger.warning(
+                    "possible N+1 on %s %s: statement run %d times: %s",
+                    method, route, repeats, " ".join(statement.split())[:200],
+                )
@@ -2,19 +2,44 @@ from datetime import date
 from typing import Optional
 
 from sqlalchemy import (
+    DDL,
     Boolean,
     CheckConstraint,
     Column,
+    Computed,
     Date,
+    DateTime,
     ForeignKey,
+    Index,
     Integer,
+    JSON,
     Numeric,
     String,
+    event,
+    func,
     text,
 )
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql.elements import Grouping
 
 from .database import Base
+from .normalize import citizen_id_key, phone_key, phone_text
+
+
+# GET /search: trigram GiST indexes serve `col % q`, `col ILIKE '%q%'` and `ORDER BY col <-> q`
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
+
+def trgm_index(name: str, column: str, expression=None) -> Index:
+    # `expression` (labeled `column`) indexes a derived value instead, e.g. phone_text(Phone)
+    target = column if expression is None else expression.label(column)
+    return Index(name, target, postgresql_using="gist", postgresql_ops={column: "gist_trgm_ops"}).ddl_if(
+        dialect="postgresql"
+    )
 
 
 class Customer(Base):
@@ -29,6 +54,16 @@ class Customer(Base):
     RegistrationDate = Column("registrationdate", Date, server_default=text("CURRENT_DATE"), nullable=True)
     IsDeleted = Column("isdeleted", Boolean, server_default=text("FALSE"))
 
+    __table_args__ = (
+        # Exact lookups of GET /customers/by-phone and /customers/by-citizen-id
+        # Grouping: a CASE index expression needs its own parentheses in CREATE INDEX
+        Index("ix_customer_phone_key", Grouping(phone_key(Phone))).ddl_if(dialect="postgresql"),
+        Index("ix_customer_citizenid_key", citizen_id_key(CitizenID)).ddl_if(dialect="postgresql"),
+        trgm_index("ix_customer_fullname_gist", "fullname"),
+        trgm_index("ix_customer_phone_gist", "phone", phone_text(Phone)),
+        trgm_index("ix_customer_email_gist", "email"),
+    )
+
     contracts = relationship("Contract", back_populates="customer")
 
 
@@ -40,6 +75,68 @@ class Branch(Base):
     Address = Column("address", String(200), nullable=True)
     Phone = Column("phone", String(15), nullable=True)
 
+    __table_args__ = (Index("uq_branch_branchname", "branchname", unique=True),)
+
+
+class Role(Base):
+    __tablename__ = "role"
+
+    RoleID = Column("roleid", Integer, primary_key=True, index=True)
+    RoleName = Column("rolename", String(50), nullable=False)
+
+    __table_args__ = (Index("uq_role_rolename", "rolename", unique=True),)
+
+
+class Employee(Base):
+    __tablename__ = "employee"
+
+    EmployeeID = Column("employeeid", Integer, primary_key=True, index=True)
+    FullName = Column("fullname", String(100), nullable=False)
+    BirthDate = Column("birthdate", Date, nullable=True)
+    Gender = Column("gender", String(10), nullable=True)
+    Phone = Column("phone", String(15), nullable=True)
+    Email = Column("email", String(100), nullable=True)
+    Address = Column("address", String(200), nullable=True)
+    Salary = Column("salary", Numeric(15, 2), nullable=True)
+    RoleID = Column("roleid", Integer, ForeignKey("role.roleid"), nullable=True)
+    BranchID = Column("branchid", Integer, ForeignKey("branch.branchid"), nullable=True)
+    IsDeleted = Column("isdeleted", Boolean, server_default=text("FALSE"))
+
+    __table_args__ = (
+        trgm_index("ix_employee_fullname_gist", "fullname"),
+        trgm_index("ix_employee_phone_gist", "phone", phone_text(Phone)),
+        trgm_index("ix_employee_email_gist", "email"),
+    )
+
+
+class UserAccount(Base):
+    __tablename__ = "useraccount"
+
+    UserID = Column("userid", Integer, primary_key=True, index=True)
+    RoleID = Column("roleid", Integer, ForeignKey("role.roleid"), nullable=False)
+    Username = Column("username", String(50), nullable=False)
+    PasswordHash = Column("passwordhash", String(100), nullable=False)
+
+    __table_args__ = (Index("uq_useraccount_username", "username", unique=True),)
+
+
+class CarBrand(Base):
+    __tablename__ = "carbrand"
+
+    BrandID = Column("brandid", Integer, primary_key=True, index=True)
+    BrandName = Column("brandname", String(100), nullable=False)
+
+    __table_args__ = (Index("uq_carbrand_brandname", "brandname", unique=True),)
+
+
+class CarType(Base):
+    __tablename__ = "cartype"
+
+    TypeID = Column("typeid", Integer, primary_key=True, index=True)
+    TypeName = Column("typename", String(100), nullable=True)
+    Description = Column("description", String(200), nullable=True)
+    RentalPrice = Column("rentalprice", Numeric(15, 2), nullable=True)
+
 
 class Car(Base):
     __tablename__ = "car"
@@ -49,6 +146,14 @@ class Car(Base):
     DailyRate = Column("dailyrate", Numeric(15, 2), nullable=True)
     HourlyRate = Column("hourlyrate", Numeric(15, 2), nullable=True)
     Status = Column("status", String(100), nullable=True)
+    OwnerBranchID = Column("ownerbranchid", Integer, ForeignKey("branch.branchid"), nullable=True)
+    # Bumped by every UPDATE of the row; ETag source for GET /cars and contracts listing the car
+    RowVersion = Column("rowversion", Integer, nullable=False, server_default=text("1"))
+
+    __table_args__ = (
+        Index("ix_car_ownerbranch_id", "ownerbranchid", "carid"),
+        trgm_index("ix_car_licenseplate_gist", "licenseplate"),
+    )
 
     contract_cars = relationship("ContractCar", back_populates="car")
 
@@ -63,17 +168,38 @@ class Contract(Base):
     TotalAmount = Column("totalamount", Numeric(15, 2), nullable=True)
     Status = Column("status", String(100), nullable=True)
     Notes = Column("notes", String(200), nullable=True)
+    # Bumped by every UPDATE of the row; ETag source for GET /contracts
+    RowVersion = Column("rowversion", Integer, nullable=False, server_default=text("1"))
+    # Running sum of contractpayment.amount, kept in the payment transaction by add_payment
+    PaidAmount = Column("paidamount", Numeric(15, 2), nullable=False, server_default=text("0"))
+    BalanceDue = Column("balancedue", Numeric(15, 2), Computed("coalesce(totalamount, 0) - paidamount", persisted=True))
 
     __table_args__ = (
         CheckConstraint(
             "enddate IS NULL OR startdate IS NULL OR enddate >= startdate",
             name="ck_contract_date_range",
         ),
+        # Keyset pagination / filters of GET /contracts
+        Index("ix_contract_status_id", "status", "contractid"),
+        Index("ix_contract_customer_id", "customerid", "contractid"),
+        Index("ix_contract_startdate_id", "startdate", "contractid"),
+        Index("ix_contract_status_startdate_id", "status", "startdate", "contractid"),
+        Index("ix_contract_enddate_id", "enddate", "contractid"),
+        # GET /contracts/outstanding: range scan over contracts with a balance due only
+        Index("ix_contract_balancedue_open", "contractid", "balancedue", postgresql_where=text("balancedue > 0")),
+        # Car availability: overlap (&&) search over the booked period
+        Index(
+            "ix_contract_period_gist",
+            func.daterange(text("startdate"), text("enddate"), text("'[]'")),
+            postgresql_using="gist",
+        ).ddl_if(dialect="postgresql"),
+        trgm_index("ix_contract_notes_gist", "notes"),
     )
 
     customer = relationship("Customer", back_populates="contracts")
     contract_cars = relationship("ContractCar", back_populates="contract")
     payments = relationship("ContractPayment", back_populates="contract")
+    surcharges = relationship("ContractSurcharge", viewonly=True)
 
 
 class ContractCar(Base):
@@ -86,6 +212,11 @@ class ContractCar(Base):
     ReturnMileage = Column("returnmileage", Integer, nullable=True)
     CarCondition = Column("carcondition", String(100), nullable=True)
 
+    __table_args__ = (
+        Index("ix_contractcar_contractid", "contractid"),
+        Index("ix_contractcar_carid", "carid"),
+    )
+
     contract = relationship("Contract", back_populates="contract_cars")
     car = relationship("Car", back_populates="contract_cars")
 
@@ -101,6 +232,8 @@ class ContractPayment(Base):
     Notes = Column("notes", String(200), nullable=True)
     PaymentType = Column("paymenttype", Integer, nullable=True)
 
+    __table_args__ = (Index("ix_contractpayment_paymentdate_id", "paymentdate", "paymentid"),)
+
     contract = relationship("Contract", back_populates="payments")
 
 
@@ -142,4 +275,64 @@ class ReturnReceipt(Base):
     ReceiverEmployeeID = Column("receiveremployeeid", Integer, nullable=True)
     ReceiverBranchID = Column("receiverbranchid", Integer, nullable=True)
     ReturnDate = Column("returndate", Date, nullable=True)
-    Notes = Column("notes", String(200), nullable=True)
\ No newline at end of file
+    Notes = Column("notes", String(200), nullable=True)
+
+    __table_args__ = (Index("ix_returnreceipt_contractid", "contractid"),)
+
+
+# High-water marks of background passes (app.reconciler), shared by every worker and restart
+class ReconcilerCheckpoint(Base):
+    __tablename__ = "reconcilercheckpoint"
+
+    Name = Column("name", String(50), primary_key=True)
+    LastID = Column("lastid", Integer, nullable=False, server_default=text("0"))
+    UpdatedAt = Column("updatedat", DateTime(timezone=True), nullable=False, server_default=func.now())
+
+# GET /fleet/summary aggregates, kept up to date by app.fleet.FleetDelta in the writing transaction
+class FleetCarCount(Base):
+    __tablename__ = "fleetcarcount"
+
+    BranchID = Column("branchid", Integer, primary_key=True)  # 0: car without owner branch
+    Status = Column("status", String(100), primary_key=True)  # '': car without status
+    CarCount = Column("carcount", Integer, nullable=False, server_default=text("0"))
+
+
+class FleetContractCount(Base):
+    __tablename__ = "fleetcontractcount"
+
+    # Active contracts per branch of their cars, bucketed by EndDate so overdue counts
+    # follow the calendar without rewriting rows (9999-12-31: no EndDate)
+    BranchID = Column("branchid", Integer, primary_key=True)
+    EndDate = Column("enddate", Date, primary_key=True)
+    ActiveCount = Column("activecount", Integer, nullable=False, server_default=text("0"))
+
+    # Buckets drop to 0 once their contracts end; GET /fleet/summary reads only live ones
+    __table_args__ = (
+        Index(
+            "ix_fleetcontractcount_live",
+            "branchid",
+            "enddate",
+            "activecount",
+            postgresql_where=text("activecount <> 0"),
+        ),
+    )
+
+
+# Durable queue of side effects written in the request transaction, run by app.jobs workers
+class OutboxJob(Base):
+    __tablename__ = "outboxjob"
+
+    JobID = Column("jobid", Integer, primary_key=True)
+    Kind = Column("kind", String(50), nullable=False)
+    Payload = Column("payload", JSON, nullable=False)
+    CreatedAt = Column("createdat", DateTime(timezone=True), nullable=False, server_default=func.now())
+    # Not claimed before this time (retry backoff)
+    RunAfter = Column("runafter", DateTime(timezone=True), nullable=False, server_default=func.now())
+    Attempts = Column("attempts", Integer, nullable=False, server_default=text("0"))
+    LastError = Column("lasterror", String(500), nullable=True)
+    # Set after the last failed attempt; dead jobs stay for inspection and are never claimed
+    DeadAt = Column("deadat", DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_outboxjob_ready", "runafter", "jobid", postgresql_where=text("deadat IS NULL")),
+    )
@@ -0,0 +1,40 @@
+import re
+from typing import Optional
+
+from sqlalchemy import case, func, literal_column
+
+
+# Vietnamese numbers: 0 + 9 digits locally, 84 + 9 digits with the country prefix
+_COUNTRY_PREFIX = "84"
+_LOCAL_DIGITS = 9
+
+
+def normalize_phone(value: Optional[str]) -> str:
+    digits = re.sub(r"\D", "", value or "")
+    if digits.startswith(_COUNTRY_PREFIX) and len(digits) == len(_COUNTRY_PREFIX) + _LOCAL_DIGITS:
+        digits = "0" + digits[len(_COUNTRY_PREFIX):]
+    return digits
+
+
+def normalize_citizen_id(value: Optional[str]) -> str:
+    return (value or "").strip()
+
+
+def phone_key(column):
+    # SQL twin of normalize_phone. Constants are literal (not bound) so the expression
+    # matches the ix_customer_phone_key index text with every driver.
+    digits = func.regexp_replace(column, literal_column(r"'\D'"), literal_column("''"), literal_column("'g'"))
+    with_prefix = digits.op("~")(literal_column(rf"'^{_COUNTRY_PREFIX}\d{{{_LOCAL_DIGITS}}}$'"))
+    local = literal_column("'0'").concat(func.substr(digits, literal_column(str(len(_COUNTRY_PREFIX) + 1))))
+    return case((with_prefix, local), else_=digits)
+
+
+def phone_text(column):
+    # CHAR(15) column as text without the padding: gist_trgm_ops does not take character,
+    # so the *_phone_gist indexes and GET /search use this expression
+    return func.btrim(column)
+
+
+def citizen_id_key(column):
+    # CHAR(12) column: compare on the trimmed text value (matches ix_customer_citizenid_key)
+    return func.btrim(column)
@@ -0,0 +1,135 @@
+import base64
+import json
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Query, status
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+TOTAL_ESTIMATE_HEADER = "X-Total-Count-Estimate"
+
+
+def encode_cursor(*values: Any) -> str:
+    # Opaque keyset cursor: urlsafe base64 of the JSON list of sort-key values
+    raw = json.dumps(list(values), default=str, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        values = None
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return values
+
+
+@dataclass
+class PageParams:
+    limit: int
+    cursor: Optional[str]
+    with_total: bool
+
+
+def page_params(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description=f"Opaque cursor from the {NEXT_CURSOR_HEADER} header"),
+    with_total: bool = Query(False, description=f"Add the planner's row estimate as {TOTAL_ESTIMATE_HEADER}"),
+) -> PageParams:
+    # Shared list-endpoint parameters: Depends(page_params)
+    return PageParams(limit=limit, cursor=cursor, with_total=with_total)
+
+
+def _parse_key(column, value: Any) -> Any:
+    python_type = column.type.python_type
+    if value is None:
+        raise ValueError("NULL sort key")
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    if python_type is int:
+        return int(value)
+    return value
+
+
+class Keyset:
+    # Seek pagination on a unique, non-NULL column tuple (ends with the primary key):
+    # every page is an index range scan starting after the previous page's last key,
+    # so page N costs the same as page 1 (OFFSET reads and discards all earlier rows).
+    def __init__(self, *columns):
+        self.columns: Tuple = columns
+
+    def apply(self, query, page: PageParams):
+        # Works for both select() and legacy Session.query() objects
+        if page.cursor:
+            values = decode_cursor(page.cursor, len(self.columns))
+            try:
+                values = [_parse_key(c, v) for c, v in zip(self.columns, values)]
+            except (TypeError, ValueError):
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+            if len(self.columns) == 1:
+                query = query.filter(self.columns[0] > values[0])
+            else:
+                query = query.filter(tuple_(*self.columns) > tuple_(*values))
+        # One extra row tells whether a next page exists
+        return query.order_by(*self.columns).limit(page.limit + 1)
+
+    def page(self, rows: Sequence, page: PageParams, headers: Optional[Dict[str, str]] = None):
+        headers = dict(headers or {})
+        rows = list(rows)
+        if len(rows) > page.limit:
+            rows = rows[: page.limit]
+            last = rows[-1]
+            headers[NEXT_CURSOR_HEADER] = encode_cursor(*(getattr(last, c.key) for c in self.columns))
+        return rows, headers
+
+
+class _ExplainJson(Executable, ClauseElement):
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(_ExplainJson, "postgresql")
+def _compile_explain_json(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+def _count_statement(query, dialect):
+    query = getattr(query, "statement", query).order_by(None)
+    if dialect.name == "postgresql":
+        # Planner estimate for the filtered query; no table scan
+        return _ExplainJson(query)
+    return select(func.count()).select_from(query.subquery())
+
+
+def _count_value(value: Any) -> int:
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str):
+        value = json.loads(value)
+    return int(value[0]["Plan"]["Plan Rows"])
+
+
+def estimate_total(db: Session, query) -> Dict[str, str]:
+    # `query` is the filtered statement before Keyset.apply (no cursor/limit)
+    value = db.execute(_count_statement(query, db.get_bind().dialect)).scalar()
+    return {TOTAL_ESTIMATE_HEADER: str(_count_value(value))}
+
+
+async def estimate_total_async(db: AsyncSession, query) -> Dict[str, str]:
+    value = (await db.execute(_count_statement(query, db.get_bind().dialect))).scalar()
+    return {TOTAL_ESTIMATE_HEADER: str(_count_value(value))}
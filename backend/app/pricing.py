@@ -0,0 +1,161 @@
+import math
+import os
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import Car, Surcharge
+
+
+# Rates edited in the database are picked up when the cached tables are older than this
+PRICING_CACHE_SECONDS = float(os.getenv("PRICING_CACHE_SECONDS", "300"))
+HOURS_PER_DAY = 24
+CENT = Decimal("0.01")
+
+# (DailyRate, HourlyRate) of a car
+CarRate = Tuple[Optional[Decimal], Optional[Decimal]]
+
+
+class PricingError(ValueError):
+    pass
+
+
+def rental_hours(start: datetime, end: datetime) -> int:
+    # Started hours are billed as whole hours
+    if (start.tzinfo is None) != (end.tzinfo is None):
+        raise PricingError("StartTime và EndTime phải cùng có hoặc cùng không có múi giờ")
+    if end <= start:
+        raise PricingError("Thời gian trả xe phải sau thời gian nhận xe")
+    return math.ceil((end - start) / timedelta(hours=1))
+
+
+def car_amount(hours: int, rate: CarRate) -> Decimal:
+    """Whole days at DailyRate plus the remaining hours at HourlyRate, never more
+    than one more day; a car without HourlyRate bills a started day as a full day."""
+    daily, hourly = rate
+    days, rest = divmod(hours, HOURS_PER_DAY)
+    if daily is None and hourly is None:
+        raise PricingError("Xe chưa có đơn giá thuê")
+    if daily is None:
+        return hours * hourly
+    if hourly is None:
+        return (days + (rest > 0)) * daily
+    return days * daily + min(rest * hourly, daily)
+
+
+def price_lines(hours: Sequence[int], rates: Sequence[CarRate]) -> List[Decimal]:
+    # Column-wise pass over every car line of every candidate booking
+    return [car_amount(h, r).quantize(CENT) for h, r in zip(hours, rates)]
+
+
+class RateTable:
+    """In-process copy of car and surcharge rates used by the quote engine.
+
+    Both tables are read in full (two small SELECTs) and reused for `max_age`
+    seconds; ids missing from the copy, e.g. cars added since, are read on demand.
+    Snapshots are replaced, never mutated, so concurrent requests need no lock.
+    """
+
+    def __init__(self, max_age: float = PRICING_CACHE_SECONDS):
+        self.max_age = max_age
+        self.cars: Dict[int, CarRate] = {}
+        self.surcharges: Dict[int, Optional[Decimal]] = {}
+        self.loaded_at: Optional[float] = None
+
+    def invalidate(self) -> None:
+        self.loaded_at = None
+
+    async def load(self, db: AsyncSession) -> None:
+        cars = await db.execute(select(Car.CarID, Car.DailyRate, Car.HourlyRate))
+        surcharges = await db.execute(select(Surcharge.SurchargeID, Surcharge.UnitPrice))
+        self.cars = {car_id: (daily, hourly) for car_id, daily, hourly in cars}
+        self.surcharges = dict(surcharges.all())
+        self.loaded_at = time.time()
+
+    async def lookup(
+        self, db: AsyncSession, car_ids: Iterable[int], surcharge_ids: Iterable[int]
+    ) -> Tuple[Dict[int, CarRate], Dict[int, Optional[Decimal]]]:
+        if self.loaded_at is None or time.time() - self.loaded_at > self.max_age:
+            await self.load(db)
+        cars, surcharges = self.cars, self.surcharges
+        missing_cars = set(car_ids) - cars.keys()
+        missing_surcharges = set(surcharge_ids) - surcharges.keys()
+        if missing_cars:
+            rows = await db.execute(
+                select(Car.CarID, Car.DailyRate, Car.HourlyRate).where(Car.CarID.in_(missing_cars))
+            )
+            cars = {**cars, **{car_id: (daily, hourly) for car_id, daily, hourly in rows}}
+            self.cars = cars
+        if missing_surcharges:
+            rows = await db.execute(
+                select(Surcharge.SurchargeID, Surcharge.UnitPrice).where(Surcharge.SurchargeID.in_(missing_surcharges))
+            )
+            surcharges = {**surcharges, **dict(rows.all())}
+            self.surcharges = surcharges
+        return cars, surcharges
+
+
+rate_table = RateTable()
+
+
+def quote(
+    bookings: Sequence[Tuple[datetime, datetime, Sequence[int], Sequence[Tuple[int, int]]]],
+    cars: Dict[int, CarRate],
+    surcharges: Dict[int, Optional[Decimal]],
+) -> List[dict]:
+    """Price (start, end, car_ids, [(surcharge_id, quantity)]) bookings.
+
+    Invalid bookings get `error` instead of amounts; the car lines of all valid
+    bookings are priced together by `price_lines`.
+    """
+    results: List[dict] = [{"index": i, "ok": False} for i in range(len(bookings))]
+    line_owner: List[int] = []
+    line_hours: List[int] = []
+    line_cars: List[int] = []
+    for i, (start, end, car_ids, items) in enumerate(bookings):
+        try:
+            hours = rental_hours(start, end)
+            for car_id in car_ids:
+                if car_id not in cars:
+                    raise PricingError(f"Không tìm thấy xe {car_id}")
+                if cars[car_id] == (None, None):
+                    raise PricingError(f"Xe {car_id} chưa có đơn giá thuê")
+            for surcharge_id, _ in items:
+                if surcharges.get(surcharge_id) is None:
+                    raise PricingError(f"Không tìm thấy đơn giá phụ phí {surcharge_id}")
+        except PricingError as exc:
+            results[i]["error"] = str(exc)
+            continue
+        results[i].update(
+            ok=True,
+            hours=hours,
+            cars=[],
+            surcharges=[
+                {
+                    "surcharge_id": surcharge_id,
+                    "unit_price": surcharges[surcharge_id],
+                    "quantity": quantity,
+                    "amount": (surcharges[surcharge_id] * quantity).quantize(CENT),
+                }
+                for surcharge_id, quantity in items
+            ],
+        )
+        line_owner.extend([i] * len(car_ids))
+        line_hours.extend([hours] * len(car_ids))
+        line_cars.extend(car_ids)
+
+    amounts = price_lines(line_hours, [cars[car_id] for car_id in line_cars])
+    for i, car_id, amount in zip(line_owner, line_cars, amounts):
+        daily, hourly = cars[car_id]
+        results[i]["cars"].append({"car_id": car_id, "daily_rate": daily, "hourly_rate": hourly, "amount": amount})
+
+    for r in results:
+        if r["ok"]:
+            r["cars_amount"] = sum((c["amount"] for c in r["cars"]), Decimal("0.00"))
+            r["surcharges_amount"] = sum((s["amount"] for s in r["surcharges"]), Decimal("0.00"))
+            r["total_amount"] = r["cars_amount"] + r["surcharges_amount"]
+    return results
@@ -0,0 +1,196 @@
+import logging
+import os
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from .database import SessionLocal
+from .fleet import FleetDelta
+from .models import Car, Contract, ContractCar, ReconcilerCheckpoint, ReturnReceipt
+
+
+logger = logging.getLogger(__name__)
+
+
+RECONCILER_ENABLED = os.getenv("RECONCILER_ENABLED", "true").strip().lower() not in {"0", "false", "no"}
+RECONCILER_INTERVAL_SECONDS = float(os.getenv("RECONCILER_INTERVAL_SECONDS", "5"))
+RECONCILER_BATCH_SIZE = int(os.getenv("RECONCILER_BATCH_SIZE", "500"))
+# ReturnIDs below the checkpoint re-checked every pass: an id is taken at INSERT, so a
+# receipt can commit after higher ids were already processed
+RECONCILER_LOOKBACK_IDS = int(os.getenv("RECONCILER_LOOKBACK_IDS", "1000"))
+CHECKPOINT_NAME = "contract_status"
+
+
+class ContractStatusReconciler:
+    """Mark contracts "Completed" once a ReturnReceipt exists for them.
+
+    Return receipts are processed in ReturnID order; the highest processed ReturnID
+    is stored in reconcilercheckpoint in the same transaction as the updates, so
+    restarts and other workers continue from it. The checkpoint row is locked with
+    SKIP LOCKED: one worker runs a batch at a time, the others skip the pass. Each
+    pass also completes contracts of receipts in the `lookback` ids below the
+    checkpoint that committed late.
+    """
+
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        interval: float = RECONCILER_INTERVAL_SECONDS,
+        batch_size: int = RECONCILER_BATCH_SIZE,
+        lookback: int = RECONCILER_LOOKBACK_IDS,
+    ):
+        self._session_factory = session_factory
+        self.interval = interval
+        self.batch_size = max(1, batch_size)
+        self.lookback = max(0, lookback)
+        # Last checkpoint read or written by this process (the table is authoritative)
+        self.checkpoint = 0
+        self.last_run_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _claim_checkpoint(self, db) -> Optional[int]:
+        # Locks the checkpoint row until commit; None while another worker holds it
+        db.execute(
+            pg_insert(ReconcilerCheckpoint).values(Name=CHECKPOINT_NAME).on_conflict_do_nothing()
+        )
+        return db.execute(
+            select(ReconcilerCheckpoint.LastID)
+            .where(ReconcilerCheckpoint.Name == CHECKPOINT_NAME)
+            .with_for_update(skip_locked=True)
+        ).scalar_one_or_none()
+
+    def _late_contracts(self, db, checkpoint: int) -> set:
+        # Receipts at or below the checkpoint whose contract is still not completed
+        return set(db.execute(
+            select(ReturnReceipt.ContractID)
+            .join(Contract, Contract.ContractID == ReturnReceipt.ContractID)
+            .where(
+                ReturnReceipt.ReturnID > checkpoint - self.lookback,
+                ReturnReceipt.ReturnID <= checkpoint,
+                func.lower(func.coalesce(Contract.Status, "")) != "completed",
+            )
+        ).scalars())
+
+    def run_once(self) -> int:
+        processed = 0
+        with self._lock:
+            db = self._session_factory()
+            try:
+                checkpoint = self._claim_checkpoint(db)
+                if checkpoint is not None and self.lookback:
+                    late = self._late_contracts(db, checkpoint)
+                    if late:
+                        self._complete(db, late)
+                        processed += len(late)
+                while checkpoint is not None:
+                    rows = db.execute(
+                        select(ReturnReceipt.ReturnID, ReturnReceipt.ContractID)
+                        .where(ReturnReceipt.ReturnID > checkpoint)
+                        .order_by(ReturnReceipt.ReturnID)
+                        .limit(self.batch_size)
+                    ).all()
+                    if rows:
+                        contract_ids = {r.ContractID for r in rows if r.ContractID is not None}
+                        if contract_ids:
+                            self._complete(db, contract_ids)
+                        checkpoint = rows[-1].ReturnID
+                        db.execute(
+                            update(ReconcilerCheckpoint)
+                            .where(ReconcilerCheckpoint.Name == CHECKPOINT_NAME)
+                            .values(LastID=checkpoint, UpdatedAt=func.now())
+                        )
+                    db.commit()
+                    self.checkpoint = checkpoint
+                    processed += len(rows)
+                    if len(rows) < self.batch_size:
+                        break
+                    checkpoint = self._claim_checkpoint(db)
+                db.commit()
+                self.last_run_at = time.time()
+                self.last_error = None
+            except Exception as exc:
+                db.rollback()
+                self.last_error = str(exc)
+                raise
+            finally:
+                db.close()
+        return processed
+
+    def _complete(self, db, contract_ids: set) -> None:
+        # Old Status/EndDate come back from the locked CTE rows for the fleet aggregates
+        old = (
+            select(Contract.ContractID, Contract.Status, Contract.EndDate)
+            .where(
+                Contract.ContractID.in_(contract_ids),
+                func.lower(func.coalesce(Contract.Status, "")) != "completed",
+            )
+            .with_for_update()
+            .cte("old_contract")
+        )
+        changed = db.execute(
+            update(Contract)
+            .where(Contract.ContractID == old.c.ContractID)
+            .values(Status="Completed", RowVersion=Contract.RowVersion + 1)
+            .returning(Contract.ContractID, Contract.Status, Contract.EndDate, old.c.Status, old.c.EndDate)
+            .execution_options(synchronize_session=False)
+        ).all()
+        if not changed:
+            return
+        branches: dict = {}
+        for contract_id, branch_id in db.execute(
+            select(ContractCar.ContractID, Car.OwnerBranchID)
+            .outerjoin(Car, Car.CarID == ContractCar.CarID)
+            .where(ContractCar.ContractID.in_([r[0] for r in changed]))
+        ):
+            branches.setdefault(contract_id, []).append(branch_id)
+        fleet = FleetDelta()
+        for contract_id, new_status, new_end, old_status, old_end in changed:
+            fleet.contract(branches.get(contract_id, []), (old_status, old_end), (new_status, new_end))
+        fleet.apply(db)
+
+    def lag(self) -> dict:
+        db = self._session_factory()
+        try:
+            stored = select(ReconcilerCheckpoint.LastID).where(ReconcilerCheckpoint.Name == CHECKPOINT_NAME)
+            checkpoint = db.execute(stored).scalar_one_or_none() or 0
+            pending = db.execute(
+                select(func.count()).select_from(ReturnReceipt).where(ReturnReceipt.ReturnID > checkpoint)
+            ).scalar_one()
+        finally:
+            db.close()
+        return {
+            "checkpoint": checkpoint,
+            "pending_receipts": pending,
+            "seconds_since_last_run": (time.time() - self.last_run_at) if self.last_run_at else None,
+            "last_error": self.last_error,
+        }
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("contract status reconciler pass failed")
+            self._stop.wait(self.interval)
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="contract-status-reconciler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+
+
+reconciler = ContractStatusReconciler()
@@ -0,0 +1,220 @@
+import os
+import threading
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, Literal, Optional, Sequence, Tuple
+
+from sqlalchemy import Date, cast, func, literal_column, select
+from sqlalchemy.orm import Session
+
+from .models import Car, Contract, ContractCar, ContractPayment
+
+
+Granularity = Literal["day", "week", "month"]
+RevenueDimension = Literal["branch"]
+PaymentDimension = Literal["branch", "method"]
+
+# Canceled contracts bring no revenue
+REVENUE_EXCLUDED_STATUSES = ("canceled", "cancelled")
+# Closed periods are cached; the age cap bounds staleness from writes made by other workers
+REPORT_CACHE_SECONDS = float(os.getenv("REPORT_CACHE_SECONDS", "3600"))
+# One entry per (report, granularity, grouping, closed period); the oldest go first
+REPORT_CACHE_MAX_ENTRIES = int(os.getenv("REPORT_CACHE_MAX_ENTRIES", "10000"))
+# Longest range a single request may cover, in periods (~13 months of days, 5 years of weeks, 10 of months)
+MAX_REPORT_PERIODS = {"day": 400, "week": 260, "month": 120}
+
+
+def period_start(d: date, granularity: Granularity) -> date:
+    # Python twin of date_trunc (weeks start on Monday, like Postgres)
+    if granularity == "week":
+        return d - timedelta(days=d.weekday())
+    if granularity == "month":
+        return d.replace(day=1)
+    return d
+
+
+def next_period(start: date, granularity: Granularity) -> date:
+    if granularity == "week":
+        return start + timedelta(days=7)
+    if granularity == "month":
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def period_count(date_from: date, date_to: date, granularity: Granularity) -> int:
+    # Periods touched by [date_from, date_to] once widened to whole periods
+    start, last = period_start(date_from, granularity), period_start(date_to, granularity)
+    if granularity == "month":
+        return (last.year - start.year) * 12 + last.month - start.month + 1
+    return (last - start).days // (7 if granularity == "week" else 1) + 1
+
+
+def contract_branch(contract_id):
+    # A contract belongs to the owner branch of its first car line (no double counting
+    # for contracts spanning branches); served by ix_contractcar_contractid
+    return (
+        select(Car.OwnerBranchID)
+        .join(ContractCar, ContractCar.CarID == Car.CarID)
+        .where(ContractCar.ContractID == contract_id)
+        .order_by(ContractCar.ContractCarID)
+        .limit(1)
+        .scalar_subquery()
+    )
+
+
+def _period(column, granularity: Granularity):
+    return cast(func.date_trunc(granularity, column), Date)
+
+
+def _group_keys(columns: Sequence) -> List:
+    # GROUP BY position: the period/branch expressions carry bound parameters, which
+    # Postgres cannot match between the SELECT list and a repeated GROUP BY expression
+    return [literal_column(str(i + 1)) for i in range(len(columns))]
+
+
+def _revenue_query(granularity: Granularity, dims: Sequence[str], start: date, end: date):
+    columns = [_period(Contract.StartDate, granularity).label("period")]
+    if "branch" in dims:
+        columns.append(contract_branch(Contract.ContractID).label("branch_id"))
+    return (
+        select(
+            *columns,
+            func.coalesce(func.sum(Contract.TotalAmount), 0).label("amount"),
+            func.count().label("count"),
+        )
+        .where(
+            Contract.StartDate >= start,
+            Contract.StartDate < end,
+            func.lower(func.coalesce(Contract.Status, "")).not_in(REVENUE_EXCLUDED_STATUSES),
+        )
+        .group_by(*_group_keys(columns))
+    )
+
+
+def _payments_query(granularity: Granularity, dims: Sequence[str], start: date, end: date):
+    columns = [_period(ContractPayment.PaymentDate, granularity).label("period")]
+    if "branch" in dims:
+        columns.append(contract_branch(ContractPayment.ContractID).label("branch_id"))
+    if "method" in dims:
+        columns.append(ContractPayment.PaymentMethod.label("payment_method"))
+    return (
+        select(
+            *columns,
+            func.coalesce(func.sum(ContractPayment.Amount), 0).label("amount"),
+            func.count().label("count"),
+        )
+        .where(ContractPayment.PaymentDate >= start, ContractPayment.PaymentDate < end)
+        .group_by(*_group_keys(columns))
+    )
+
+
+_QUERIES = {"revenue": _revenue_query, "payments": _payments_query}
+
+
+class ReportCache:
+    """Rows of closed periods (ended before today), keyed by report, grouping and period.
+
+    A period that has ended no longer changes through the normal write paths (payments
+    are dated today, new contracts start today or later), so its rows are kept until
+    `invalidate` is called by a write that reaches into the past, or they expire.
+    Entries are kept in insertion (= age) order, so expired ones and, past
+    `max_entries`, the oldest ones are dropped from the front.
+    """
+
+    def __init__(self, max_age: float = REPORT_CACHE_SECONDS, max_entries: int = REPORT_CACHE_MAX_ENTRIES):
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self._entries: Dict[Tuple, Tuple[float, List[dict]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple) -> Optional[List[dict]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.time() - entry[0] > self.max_age:
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+            return None
+        return entry[1]
+
+    def put(self, key: Tuple, rows: List[dict]) -> None:
+        now = time.time()
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (now, rows)
+            while self._entries:
+                oldest = next(iter(self._entries))
+                if len(self._entries) <= self.max_entries and now - self._entries[oldest][0] <= self.max_age:
+                    break
+                del self._entries[oldest]
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+report_cache = ReportCache()
+
+
+def invalidate_if_past(*days: Optional[date]) -> None:
+    # For writers: drop cached periods when a written contract dates before today
+    today = date.today()
+    if any(d is not None and d < today for d in days):
+        report_cache.invalidate()
+
+
+def _rows(db: Session, report: str, granularity: Granularity, dims: Sequence[str], start: date, end: date):
+    rows = []
+    for r in db.execute(_QUERIES[report](granularity, dims, start, end)).mappings():
+        row = dict(r)
+        row["amount"] = Decimal(row["amount"])
+        rows.append(row)
+    return rows
+
+
+def run_report(
+    db: Session,
+    report: str,
+    granularity: Granularity,
+    dims: Iterable[str],
+    date_from: date,
+    date_to: date,
+    today: Optional[date] = None,
+) -> List[dict]:
+    # The range is widened to whole periods; closed periods come from report_cache
+    # when every one of them is cached, otherwise they are re-read in one query.
+    today = today or date.today()
+    dims = tuple(sorted(set(dims)))
+    start = period_start(date_from, granularity)
+    end = next_period(period_start(date_to, granularity), granularity)
+    open_from = min(max(period_start(today, granularity), start), end)
+
+    closed: List[date] = []
+    p = start
+    while p < open_from:
+        closed.append(p)
+        p = next_period(p, granularity)
+
+    keys = [(report, granularity, dims, p) for p in closed]
+    cached = [report_cache.get(k) for k in keys]
+    rows: List[dict] = []
+    if any(c is None for c in cached):
+        by_period: Dict[date, List[dict]] = {p: [] for p in closed}
+        for row in _rows(db, report, granularity, dims, start, open_from):
+            by_period.setdefault(row["period"], []).append(row)
+        for key, p in zip(keys, closed):
+            report_cache.put(key, by_period[p])
+            rows.extend(by_period[p])
+    else:
+        for c in cached:
+            rows.extend(c)
+
+    if open_from < end:
+        rows.extend(_rows(db, report, granularity, dims, open_from, end))
+
+    def sort_key(row):
+        return (row["period"], *(("" if row.get(k) is None else str(row[k])) for k in ("branch_id", "payment_method")))
+
+    return sorted(rows, key=sort_key)
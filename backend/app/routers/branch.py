@@ -1,10 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Query
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
 
+from ..catalog import catalog, icontains
 from ..database import get_db
+from ..db_errors import UNIQUE_VIOLATION, integrity_code
 from ..models import Branch
+from ..pagination import PageParams, page_params
 from pydantic import BaseModel
 
 
@@ -34,89 +39,99 @@ class BranchOut(BranchBase):
         from_attributes = True
 
 
+def _branch_out(b: Branch) -> BranchOut:
+    # map model attributes to the snake_case fields expected by frontend
+    return BranchOut(
+        branch_id=b.BranchID,
+        branch_name=b.BranchName,
+        address=b.Address,
+        phone=b.Phone.strip() if b.Phone else b.Phone,
+    )
+
+
+# Schema field -> model attribute, for INSERT/UPDATE ... RETURNING
+_BRANCH_FIELDS = {"branch_name": "BranchName", "address": "Address", "phone": "Phone"}
+
+
+def _branch_values(payload: BaseModel) -> dict:
+    data = payload.model_dump(exclude_none=True)
+    if "branch_name" in data:
+        data["branch_name"] = data["branch_name"].strip()
+    return {_BRANCH_FIELDS[k]: v for k, v in data.items()}
+
+
+def _write_branch(db: Session, stmt) -> Optional[Branch]:
+    # uq_branch_branchname rejects duplicates in the same round trip (no check-then-write race)
+    try:
+        return db.execute(stmt).scalar_one_or_none()
+    except IntegrityError as exc:
+        db.rollback()
+        if integrity_code(exc) == UNIQUE_VIOLATION:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Branch name already exists")
+        raise
+
+
+catalog.register("branches", "branch_id", lambda db: [_branch_out(x) for x in db.query(Branch)])
+
 router = APIRouter(prefix="/branches", tags=["branches"])
 
 
 @router.get("/", response_model=List[BranchOut])
 def list_branches(
-    skip: int = 0,
-    limit: int = 50,
+    response: Response,
+    page: PageParams = Depends(page_params),
     search: Optional[str] = Query(None, description="Filter by branch name (icontains)"),
-    db: Session = Depends(get_db),
 ):
-    query = db.query(Branch)
-    if search:
-        query = query.filter(Branch.branch_name.ilike(f"%{search}%"))
-    branches = query.order_by(Branch.branch_id).offset(skip).limit(limit).all()
-    return branches
+    # Served from the in-process catalog snapshot (app.catalog)
+    match = (lambda x: icontains(x.branch_name, search)) if search else None
+    rows, headers = catalog.page("branches", page, match)
+    response.headers.update(headers)
+    return rows
 
 
 @router.get("/{branch_id}", response_model=BranchOut)
 def get_branch(branch_id: int, db: Session = Depends(get_db)):
-    branch = db.query(Branch).filter(Branch.branch_id == branch_id).first()
+    branch = db.query(Branch).filter(Branch.BranchID == branch_id).first()
     if not branch:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Branch not found")
-    return branch
+    return _branch_out(branch)
 
 
 @router.post("/", response_model=BranchOut, status_code=status.HTTP_201_CREATED)
 def create_branch(payload: BranchCreate, db: Session = Depends(get_db)):
-    # Optional: uniqueness by name within address
-    existing = (
-        db.query(Branch)
-        .filter(Branch.branch_name == payload.branch_name.strip())
-        .first()
-    )
-    if existing:
-        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Branch name already exists")
-
-    branch = Branch(
-        branch_name=payload.branch_name.strip(),
-        address=payload.address,
-        phone=payload.phone,
-    )
-    db.add(branch)
+    branch = _write_branch(db, insert(Branch).values(**_branch_values(payload)).returning(Branch))
+    # Build the response before commit expires the RETURNING row
+    out = _branch_out(branch)
     db.commit()
-    db.refresh(branch)
-    return branch
+    catalog.upsert("branches", out)
+    return out
 
 
 @router.put("/{branch_id}", response_model=BranchOut)
 def update_branch(branch_id: int, payload: BranchUpdate, db: Session = Depends(get_db)):
-    branch = db.query(Branch).filter(Branch.branch_id == branch_id).first()
+    values = _branch_values(payload)
+    if values:
+        stmt = update(Branch).where(Branch.BranchID == branch_id).values(**values).returning(Branch)
+    else:
+        stmt = select(Branch).where(Branch.BranchID == branch_id)
+    branch = _write_branch(db, stmt)
     if not branch:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Branch not found")
-
-    if payload.branch_name is not None:
-        new_name = payload.branch_name.strip()
-        exists = (
-            db.query(Branch)
-            .filter(Branch.branch_name == new_name, Branch.branch_id != branch_id)
-            .first()
-        )
-        if exists:
-            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Branch name already exists")
-        branch.branch_name = new_name
-
-    if payload.address is not None:
-        branch.address = payload.address
-
-    if payload.phone is not None:
-        branch.phone = payload.phone
-
-    db.add(branch)
+    out = _branch_out(branch)
     db.commit()
-    db.refresh(branch)
-    return branch
+    catalog.upsert("branches", out)
+    return out
 
 
 @router.delete("/{branch_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_branch(branch_id: int, db: Session = Depends(get_db)):
-    branch = db.query(Branch).filter(Branch.branch_id == branch_id).first()
-    if not branch:
+    deleted = db.execute(
+        delete(Branch).where(Branch.BranchID == branch_id).returning(Branch.BranchID)
+    ).scalar_one_or_none()
+    if deleted is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Branch not found")
-    db.delete(branch)
     db.commit()
+    catalog.remove("branches", branch_id)
     return None
 
 
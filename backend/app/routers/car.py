@@ -1,9 +1,16 @@
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
+from datetime import date
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 
-from ..database import get_db
+from ..availability import available_cars_query
+from ..database import get_async_db
+from ..etag import etag_matches, make_etag, not_modified
 from ..models import Car
+from ..pagination import Keyset, PageParams, estimate_total_async, page_params
+from ..serialization import json_response
 from pydantic import BaseModel
 
 
@@ -18,56 +25,84 @@ class CarOut(BaseModel):
         from_attributes = True
 
 
+def _car_row(c: Car) -> dict:
+    # CarOut as a plain dict for json_response; map attribute names to snake_case expected by frontend
+    return {
+        "car_id": c.CarID,
+        "license_plate": c.LicensePlate,
+        "daily_rate": float(c.DailyRate or 0),
+        "hourly_rate": float(c.HourlyRate or 0),
+        "status": c.Status,
+    }
+
+
+def _car_etag(cars) -> str:
+    return make_etag("car", ((c.CarID, c.RowVersion) for c in cars))
+
+
+_CAR_KEYSET = Keyset(Car.CarID)
+
+
+async def _car_page(db: AsyncSession, query, page: PageParams, if_none_match: Optional[str] = None):
+    headers = await estimate_total_async(db, query) if page.with_total else {}
+    items = (await db.execute(_CAR_KEYSET.apply(query, page))).scalars().all()
+    items, headers = _CAR_KEYSET.page(items, page, headers)
+    headers["ETag"] = etag = _car_etag(items)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, headers)
+    return json_response([_car_row(c) for c in items], headers=headers)
+
+
 router = APIRouter(prefix="/cars", tags=["cars"])
 
 
 @router.get("/", response_model=List[CarOut])
-def list_cars(
-    skip: int = 0,
-    limit: int = 100,
+async def list_cars(
+    page: PageParams = Depends(page_params),
     search: Optional[str] = Query(None, description="Filter by license plate/status (icontains)"),
-    db: Session = Depends(get_db),
+    branch_id: Optional[int] = Query(None, description="Only cars owned by this branch"),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    query = db.query(Car)
+    query = select(Car)
     if search:
         like = f"%{search}%"
-        query = query.filter((Car.LicensePlate.ilike(like)) | (Car.Status.ilike(like)))
-    items = (
-        query.order_by(Car.CarID)
-        .offset(max(0, skip))
-        .limit(max(1, min(500, limit)))
-        .all()
-    )
-    # map attribute names to snake_case expected by frontend
-    result: List[CarOut] = []
-    for c in items:
-        result.append(
-            CarOut(
-                car_id=c.CarID,
-                license_plate=c.LicensePlate,
-                daily_rate=float(c.DailyRate or 0),
-                hourly_rate=float(c.HourlyRate or 0),
-                status=c.Status,
-            )
-        )
-    return result
+        query = query.where((Car.LicensePlate.ilike(like)) | (Car.Status.ilike(like)))
+    if branch_id is not None:
+        query = query.where(Car.OwnerBranchID == branch_id)
+    return await _car_page(db, query, page, if_none_match)
+
+
+@router.get("/availability", response_model=List[CarOut])
+async def list_available_cars(
+    start: date = Query(..., description="First rental day (inclusive)"),
+    end: date = Query(..., description="Last rental day (inclusive)"),
+    branch_id: Optional[int] = Query(None, description="Only cars owned by this branch"),
+    page: PageParams = Depends(page_params),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    if end < start:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="end must be on or after start")
+    return await _car_page(db, available_cars_query(start, end, branch_id), page, if_none_match)
 
 
 @router.get("/{car_id}", response_model=CarOut)
-def get_car(car_id: int, db: Session = Depends(get_db)):
-    c = db.query(Car).filter(Car.CarID == car_id).first()
+async def get_car(
+    car_id: int,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    c = await db.get(Car, car_id)
     if not c:
         # Return 404 in a RESTful handler by raising, but keep it simple here
         from fastapi import HTTPException, status as _status
 
         raise HTTPException(status_code=_status.HTTP_404_NOT_FOUND, detail="Car not found")
-    return CarOut(
-        car_id=c.CarID,
-        license_plate=c.LicensePlate,
-        daily_rate=float(c.DailyRate or 0),
-        hourly_rate=float(c.HourlyRate or 0),
-        status=c.Status,
-    )
+    etag = _car_etag([c])
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    return json_response(_car_row(c), headers={"ETag": etag})
 
 
 # Alias router exposing the same endpoints under /vehicles
@@ -75,17 +110,22 @@ router_alias = APIRouter(prefix="/vehicles", tags=["vehicles"])
 
 
 @router_alias.get("/", response_model=List[CarOut])
-def list_vehicles(
-    skip: int = 0,
-    limit: int = 100,
+async def list_vehicles(
+    page: PageParams = Depends(page_params),
     search: Optional[str] = Query(None, description="Filter by plate/status (icontains)"),
-    db: Session = Depends(get_db),
+    branch_id: Optional[int] = Query(None, description="Only cars owned by this branch"),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    return list_cars(skip=skip, limit=limit, search=search, db=db)
+    return await list_cars(page=page, search=search, branch_id=branch_id, if_none_match=if_none_match, db=db)
 
 
 @router_alias.get("/{vehicle_id}", response_model=CarOut)
-def get_vehicle(vehicle_id: int, db: Session = Depends(get_db)):
-    return get_car(car_id=vehicle_id, db=db)
+async def get_vehicle(
+    vehicle_id: int,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await get_car(car_id=vehicle_id, if_none_match=if_none_match, db=db)
 
 
@@ -1,10 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Query
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
 
+from ..catalog import catalog, icontains
 from ..database import get_db
+from ..db_errors import UNIQUE_VIOLATION, integrity_code
 from ..models import CarBrand
+from ..pagination import PageParams, page_params
 from pydantic import BaseModel
 
 
@@ -30,74 +35,85 @@ class CarBrandOut(CarBrandBase):
         from_attributes = True
 
 
+def _brand_out(x: CarBrand) -> CarBrandOut:
+    # map model attributes to the snake_case fields expected by frontend
+    return CarBrandOut(brand_id=x.BrandID, brand_name=x.BrandName)
+
+
+def _write_brand(db: Session, stmt) -> Optional[CarBrand]:
+    # uq_carbrand_brandname rejects duplicates in the same round trip (no check-then-write race)
+    try:
+        return db.execute(stmt).scalar_one_or_none()
+    except IntegrityError as exc:
+        db.rollback()
+        if integrity_code(exc) == UNIQUE_VIOLATION:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Brand name already exists")
+        raise
+
+
+catalog.register("car_brands", "brand_id", lambda db: [_brand_out(x) for x in db.query(CarBrand)])
+
 router = APIRouter(prefix="/car-brands", tags=["car-brands"])
 
 
 @router.get("/", response_model=List[CarBrandOut])
 def list_car_brands(
-    skip: int = 0,
-    limit: int = 50,
+    response: Response,
+    page: PageParams = Depends(page_params),
     search: Optional[str] = Query(None, description="Filter by brand name (icontains)"),
-    db: Session = Depends(get_db),
 ):
-    query = db.query(CarBrand)
-    if search:
-        query = query.filter(CarBrand.brand_name.ilike(f"%{search}%"))
-    items = query.order_by(CarBrand.brand_id).offset(skip).limit(limit).all()
-    return items
+    # Served from the in-process catalog snapshot (app.catalog)
+    match = (lambda x: icontains(x.brand_name, search)) if search else None
+    rows, headers = catalog.page("car_brands", page, match)
+    response.headers.update(headers)
+    return rows
 
 
 @router.get("/{brand_id}", response_model=CarBrandOut)
 def get_car_brand(brand_id: int, db: Session = Depends(get_db)):
-    item = db.query(CarBrand).filter(CarBrand.brand_id == brand_id).first()
+    item = db.query(CarBrand).filter(CarBrand.BrandID == brand_id).first()
     if not item:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Car brand not found")
-    return item
+    return _brand_out(item)
 
 
 @router.post("/", response_model=CarBrandOut, status_code=status.HTTP_201_CREATED)
 def create_car_brand(payload: CarBrandCreate, db: Session = Depends(get_db)):
-    name = payload.brand_name.strip()
-    exists = db.query(CarBrand).filter(CarBrand.brand_name == name).first()
-    if exists:
-        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Brand name already exists")
-    item = CarBrand(brand_name=name)
-    db.add(item)
+    item = _write_brand(db, insert(CarBrand).values(BrandName=payload.brand_name.strip()).returning(CarBrand))
+    # Build the response before commit expires the RETURNING row
+    out = _brand_out(item)
     db.commit()
-    db.refresh(item)
-    return item
+    catalog.upsert("car_brands", out)
+    return out
 
 
 @router.put("/{brand_id}", response_model=CarBrandOut)
 def update_car_brand(brand_id: int, payload: CarBrandUpdate, db: Session = Depends(get_db)):
-    item = db.query(CarBrand).filter(CarBrand.brand_id == brand_id).first()
-    if not item:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Car brand not found")
-
     if payload.brand_name is not None:
-        new_name = payload.brand_name.strip()
-        exists = (
-            db.query(CarBrand)
-            .filter(CarBrand.brand_name == new_name, CarBrand.brand_id != brand_id)
-            .first()
+        stmt = (
+            update(CarBrand)
+            .where(CarBrand.BrandID == brand_id)
+            .values(BrandName=payload.brand_name.strip())
+            .returning(CarBrand)
         )
-        if exists:
-            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Brand name already exists")
-        item.brand_name = new_name
-
-    db.add(item)
+    else:
+        stmt = select(CarBrand).where(CarBrand.BrandID == brand_id)
+    item = _write_brand(db, stmt)
+    if not item:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Car brand not found")
+    out = _brand_out(item)
     db.commit()
-    db.refresh(item)
-    return item
+    catalog.upsert("car_brands", out)
+    return out
 
 
 @router.delete("/{brand_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_car_brand(brand_id: int, db: Session = Depends(get_db)):
-    item = db.query(CarBrand).filter(CarBrand.brand_id == brand_id).first()
-    if not item:
+    deleted = db.execute(
+        delete(CarBrand).where(CarBrand.BrandID == brand_id).returning(CarBrand.BrandID)
+    ).scalar_one_or_none()
+    if deleted is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Car brand not found")
-    db.delete(item)
     db.commit()
+    catalog.remove("car_brands", brand_id)
     return None
-
-
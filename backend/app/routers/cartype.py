@@ -1,26 +1,39 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Response
 from typing import List
 
-from ..database import get_db
+from ..catalog import catalog
+from ..models import CarType
+from ..pagination import PageParams, page_params
 from pydantic import BaseModel
 
 
 class CarTypeOut(BaseModel):
   type_id: int
   type_name: str | None = None
+  description: str | None = None
+  rental_price: float | None = None
 
   class Config:
     from_attributes = True
 
 
-router = APIRouter(prefix="/car-types", tags=["car-types"])
+def _car_type_out(t: CarType) -> CarTypeOut:
+  return CarTypeOut(
+    type_id=t.TypeID,
+    type_name=t.TypeName,
+    description=t.Description,
+    rental_price=float(t.RentalPrice) if t.RentalPrice is not None else None,
+  )
 
 
-@router.get("/", response_model=List[CarTypeOut])
-def list_car_types(db: Session = Depends(get_db)):
-  # The current DB model file does not define a CarType table.
-  # To keep the API working, return an empty list for now.
-  return []
+catalog.register("car_types", "type_id", lambda db: [_car_type_out(t) for t in db.query(CarType)])
 
+router = APIRouter(prefix="/car-types", tags=["car-types"])
 
+
+@router.get("/", response_model=List[CarTypeOut])
+def list_car_types(response: Response, page: PageParams = Depends(page_params)):
+  # Served from the in-process catalog snapshot (app.catalog)
+  rows, headers = catalog.page("car_types", page)
+  response.headers.update(headers)
+  return rows
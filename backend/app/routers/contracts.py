@@ -1,25 +1,41 @@
 from datetime import date
-from typing import List
+from decimal import Decimal
+from typing import List, Literal, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, status
+from sqlalchemy import func, insert, literal, select, update
+from sqlalchemy.exc import DBAPIError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
-from ..database import get_db
+from ..database import get_async_db
+from ..etag import etag_matches, make_etag, not_modified
+from ..fleet import FleetDelta, is_active_contract
+from ..jobs import AUTO_RETURN_RECEIPT, RELEASE_CARS, enqueue_async, job_queue
+from ..export import ExportFormat, export_response
+from ..pagination import Keyset, PageParams, estimate_total_async, page_params
+from ..pricing import quote, rate_table
+from ..reports import invalidate_if_past, report_cache
+from ..serialization import json_response
 from ..models import (
     Car,
     Contract,
     ContractCar,
     ContractPayment,
     ContractSurcharge,
+    Customer,
     DeliveryReceipt,
     ReturnReceipt,
+    Surcharge,
 )
 from ..schemas.contract import (
+    ContractBalance,
+    ContractBulkItemResult,
     ContractCreate,
+    ContractQuote,
+    ContractQuoteIn,
     ContractRead,
     ContractUpdate,
-    ContractCarItem,
     ContractSurchargeItem,
     DeliveryReceiptIn,
     ReturnReceiptIn,
@@ -28,221 +44,703 @@ from ..schemas.contract import (
 
 router = APIRouter(prefix="/contracts", tags=["contracts"])
 
+BULK_MAX_ITEMS = 500
+QUOTE_MAX_ITEMS = 1000
+UNAVAILABLE_CAR_STATUSES = {"rented"}
+RENTED_CAR_STATUS = "Rented"
+# PUT /contracts/{id} status values that close the contract and release its cars
+COMPLETED_STATUSES = {"completed", "returned", "done"}
+CANCELED_STATUSES = {"canceled", "cancelled"}
+LOCK_NOT_AVAILABLE = "55P03"  # Postgres SQLSTATE for FOR UPDATE NOWAIT conflicts
 
-def _contract_to_read(c: Contract, db: Session) -> ContractRead:
-    cars = [
-        ContractCarItem(CarID=cc.CarID, DailyRate=cc.car.DailyRate, Amount=cc.Amount)
-        for cc in (c.contract_cars or [])
-    ]
-    surcharges = [
-        ContractSurchargeItem(
-            SurchargeID=cs.SurchargeID, UnitPrice=cs.UnitPrice or 0, Quantity=cs.Quantity or 0
+
+# Eager-load strategy for ContractRead: one SELECT per relationship (IN batches),
+# independent of the number of contracts returned.
+_CONTRACT_READ_OPTIONS = (
+    selectinload(Contract.contract_cars).selectinload(ContractCar.car),
+    selectinload(Contract.surcharges),
+)
+
+
+async def _load_contract(db: AsyncSession, contract_id: int) -> Optional[Contract]:
+    return (await db.execute(
+        select(Contract)
+        .where(Contract.ContractID == contract_id)
+        .options(*_CONTRACT_READ_OPTIONS)
+        .execution_options(populate_existing=True)
+    )).scalars().first()
+
+
+def _surcharge_key(s: ContractSurchargeItem) -> int:
+    # Same defaulting as create_contract
+    return s.surcharge_id if s.surcharge_id is not None else 0
+
+
+async def _existing_ids(db: AsyncSession, column, ids: set) -> set:
+    if not ids:
+        return set()
+    return set((await db.execute(select(column).where(column.in_(ids)))).scalars())
+
+
+def _is_car_available(car_status: Optional[str]) -> bool:
+    return (car_status or "").strip().lower() not in UNAVAILABLE_CAR_STATUSES
+
+
+async def _reserve_cars(db: AsyncSession, car_ids: set) -> dict:
+    # Lock only the requested car rows, in CarID order; NOWAIT makes a concurrent
+    # booking of the same car fail fast with 409 instead of queueing on the lock.
+    if not car_ids:
+        return {}
+    try:
+        cars = (await db.execute(
+            select(Car)
+            .where(Car.CarID.in_(car_ids))
+            .order_by(Car.CarID)
+            .with_for_update(nowait=True)
+        )).scalars().all()
+    except DBAPIError as exc:
+        await db.rollback()
+        if getattr(exc.orig, "pgcode", None) == LOCK_NOT_AVAILABLE:
+            raise HTTPException(status_code=409, detail="Xe đang được đặt bởi giao dịch khác")
+        raise
+    missing = car_ids - {c.CarID for c in cars}
+    if missing:
+        await db.rollback()
+        raise HTTPException(status_code=404, detail=f"Không tìm thấy xe: {sorted(missing)}")
+    rented = sorted(c.CarID for c in cars if not _is_car_available(c.Status))
+    if rented:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail=f"Xe đã được thuê: {rented}")
+    return {c.CarID: c for c in cars}
+
+
+async def _mark_cars_rented(db: AsyncSession, car_ids: set) -> None:
+    if car_ids:
+        await db.execute(
+            update(Car)
+            .where(Car.CarID.in_(car_ids))
+            .values(Status=RENTED_CAR_STATUS, RowVersion=Car.RowVersion + 1)
+            .execution_options(synchronize_session=False)
+        )
+
+
+async def _contract_cars(db: AsyncSession, contract_id: int) -> list:
+    # (CarID, OwnerBranchID) of every car line: car ids for the release job, owner
+    # branches for the fleet contract counts
+    return (await db.execute(
+        select(ContractCar.CarID, Car.OwnerBranchID)
+        .outerjoin(Car, Car.CarID == ContractCar.CarID)
+        .where(ContractCar.ContractID == contract_id)
+    )).all()
+
+
+def _update_contract_returning_old(contract_id: int, values: dict, *returning):
+    # UPDATE ... RETURNING the new row plus (Status, EndDate) it had before, in one statement
+    old = (
+        select(Contract.ContractID, Contract.Status, Contract.EndDate)
+        .where(Contract.ContractID == contract_id)
+        .with_for_update()
+        .cte("old_contract")
+    )
+    return (
+        update(Contract)
+        .where(Contract.ContractID == old.c.ContractID)
+        .values(**values, RowVersion=Contract.RowVersion + 1)
+        .returning(*returning, old.c.Status, old.c.EndDate)
+    )
+
+
+# Schema field -> model attribute, for INSERT/UPDATE ... RETURNING
+_CONTRACT_FIELDS = {
+    "customer_id": "CustomerID",
+    "start_date": "StartDate",
+    "end_date": "EndDate",
+    "total_amount": "TotalAmount",
+    "status": "Status",
+    "notes": "Notes",
+}
+
+
+def _contract_values(payload) -> dict:
+    # None fields are left out (partial update)
+    data = payload.model_dump(include=set(_CONTRACT_FIELDS), exclude_none=True)
+    return {_CONTRACT_FIELDS[k]: v for k, v in data.items()}
+
+
+async def _insert_for_contract(db: AsyncSession, model, contract_id: int, values: dict):
+    # INSERT ... SELECT FROM contract WHERE contractid = :id RETURNING id: one statement,
+    # nothing inserted (None returned) when the contract does not exist
+    columns = model.__mapper__.columns
+    pk = model.__mapper__.primary_key[0]
+    stmt = insert(model).from_select(
+        [columns["ContractID"], *(columns[k] for k in values)],
+        select(Contract.ContractID, *(literal(v, columns[k].type) for k, v in values.items()))
+        .where(Contract.ContractID == contract_id),
+    )
+    return (await db.execute(stmt.returning(pk))).scalar_one_or_none()
+
+
+async def _contract_lines(db: AsyncSession, contract_id: int):
+    cars = (await db.execute(
+        select(ContractCar.CarID, Car.DailyRate, ContractCar.Amount, Car.OwnerBranchID)
+        .outerjoin(Car, Car.CarID == ContractCar.CarID)
+        .where(ContractCar.ContractID == contract_id)
+        .order_by(ContractCar.ContractCarID)
+    )).mappings().all()
+    surcharges = (await db.execute(
+        select(
+            ContractSurcharge.SurchargeID,
+            func.coalesce(ContractSurcharge.UnitPrice, 0).label("UnitPrice"),
+            func.coalesce(ContractSurcharge.Quantity, 0).label("Quantity"),
         )
-        for cs in db.execute(
-            select(ContractSurcharge).where(ContractSurcharge.ContractID == c.ContractID)
-        ).scalars().all()
-    ]
-    # Use field names (not aliases) when constructing pydantic models
-    return ContractRead(
-        id=c.ContractID,
-        customer_id=c.CustomerID,
-        start_date=c.StartDate,
-        end_date=c.EndDate,
-        total_amount=getattr(c, "TotalAmount", None),
-        status=getattr(c, "Status", None),
-        notes=getattr(c, "Notes", None),
-        cars=cars,
-        surcharges=surcharges,
+        .where(ContractSurcharge.ContractID == contract_id)
+        .order_by(ContractSurcharge.SurchargeID)
+    )).mappings().all()
+    return [dict(r) for r in cars], [dict(r) for r in surcharges]
+
+
+def _contract_fields(c: Contract, cars: list, surcharges: list) -> dict:
+    return {
+        "ContractID": c.ContractID,
+        "CustomerID": c.CustomerID,
+        "StartDate": c.StartDate,
+        "EndDate": c.EndDate,
+        "TotalAmount": getattr(c, "TotalAmount", None),
+        "Status": getattr(c, "Status", None),
+        "Notes": getattr(c, "Notes", None),
+        "Cars": cars,
+        "Surcharges": surcharges,
+    }
+
+
+def _contract_row(c: Contract) -> dict:
+    # ContractRead as a plain dict keyed by alias, for json_response (no model round trip)
+    return _contract_fields(
+        c,
+        [
+            {
+                "CarID": cc.CarID,
+                "DailyRate": cc.car.DailyRate if cc.car is not None else None,
+                "Amount": cc.Amount,
+            }
+            for cc in (c.contract_cars or [])
+        ],
+        [
+            {
+                "SurchargeID": cs.SurchargeID,
+                "UnitPrice": cs.UnitPrice or Decimal(0),
+                "Quantity": cs.Quantity or 0,
+            }
+            for cs in (c.surcharges or [])
+        ],
+    )
+
+
+def _contract_to_read(c: Contract, cars: list, surcharges: list) -> ContractRead:
+    return ContractRead.model_validate(_contract_fields(c, cars, surcharges))
+
+
+# ContractRead embeds each car's DailyRate, so the body also changes when one of its cars does
+_CAR_VERSIONS = (
+    select(func.coalesce(func.sum(Car.RowVersion), 0))
+    .join(ContractCar, ContractCar.CarID == Car.CarID)
+    .where(ContractCar.ContractID == Contract.ContractID)
+    .correlate(Contract)
+    .scalar_subquery()
+    .label("CarVersions")
+)
+
+
+def _contract_etag(contracts) -> str:
+    # From loaded contracts; must agree with the rows of _contract_versions
+    return make_etag(
+        "contract",
+        (
+            (c.ContractID, c.RowVersion, sum(cc.car.RowVersion for cc in c.contract_cars if cc.car is not None))
+            for c in contracts
+        ),
     )
 
 
+def _contract_versions(query):
+    # Version probe: the same rows as `query` without lines or cars, to answer 304 before loading them
+    return query.with_only_columns(Contract.ContractID, Contract.StartDate, Contract.RowVersion, _CAR_VERSIONS)
+
+
+def _versions_etag(rows) -> str:
+    return make_etag("contract", ((r.ContractID, r.RowVersion, r.CarVersions) for r in rows))
+
+
+# ContractBalance fields, labelled by alias
+_BALANCE_COLUMNS = tuple(
+    getattr(Contract, key).label(key)
+    for key in ("ContractID", "CustomerID", "Status", "TotalAmount", "PaidAmount", "BalanceDue")
+)
+
+_CONTRACT_KEYSETS = {
+    "id": Keyset(Contract.ContractID),
+    "start_date": Keyset(Contract.StartDate, Contract.ContractID),
+}
+
+
 @router.get("", response_model=List[ContractRead])
-def list_contracts(db: Session = Depends(get_db)):
-    contracts = db.execute(select(Contract)).scalars().all()
-    # Auto-sync status to Completed if return receipt exists
-    changed = False
-    for c in contracts:
-        rr = db.execute(select(ReturnReceipt).where(ReturnReceipt.ContractID == c.ContractID)).scalars().first()
-        if rr and (getattr(c, "Status", None) or "").lower() != "completed":
-            c.Status = "Completed"
-            db.add(c)
-            changed = True
-    if changed:
-        db.commit()
-    return [_contract_to_read(c, db) for c in contracts]
+async def list_contracts(
+    page: PageParams = Depends(page_params),
+    order_by: Literal["id", "start_date"] = Query(
+        "id", description="Sort key; start_date skips contracts without StartDate"
+    ),
+    status_filter: Optional[str] = Query(None, alias="status", description="Exact contract status"),
+    customer_id: Optional[int] = Query(None),
+    start_from: Optional[date] = Query(None, description="StartDate >= start_from"),
+    start_to: Optional[date] = Query(None, description="StartDate <= start_to"),
+    end_from: Optional[date] = Query(None, description="EndDate >= end_from"),
+    end_to: Optional[date] = Query(None, description="EndDate <= end_to"),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    # Read-only: "Completed" status sync from return receipts is done by app.reconciler
+    query = select(Contract)
+    if status_filter is not None:
+        query = query.where(Contract.Status == status_filter)
+    if customer_id is not None:
+        query = query.where(Contract.CustomerID == customer_id)
+    if start_from is not None:
+        query = query.where(Contract.StartDate >= start_from)
+    if start_to is not None:
+        query = query.where(Contract.StartDate <= start_to)
+    if end_from is not None:
+        query = query.where(Contract.EndDate >= end_from)
+    if end_to is not None:
+        query = query.where(Contract.EndDate <= end_to)
+
+    # Keyset pagination backed by the ix_contract_* composite indexes
+    keyset = _CONTRACT_KEYSETS[order_by]
+    if order_by == "start_date":
+        query = query.where(Contract.StartDate.is_not(None))
+    headers = await estimate_total_async(db, query) if page.with_total else {}
+    if if_none_match:
+        versions = (await db.execute(keyset.apply(_contract_versions(query), page))).all()
+        versions, probe_headers = keyset.page(versions, page, headers)
+        etag = _versions_etag(versions)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag, probe_headers)
+    contracts = (await db.execute(keyset.apply(query, page).options(*_CONTRACT_READ_OPTIONS))).scalars().all()
+    contracts, headers = keyset.page(contracts, page, headers)
+    headers["ETag"] = _contract_etag(contracts)
+    return json_response([_contract_row(c) for c in contracts], headers=headers)
 
 
 @router.post("", response_model=ContractRead, status_code=status.HTTP_201_CREATED)
-def create_contract(payload: ContractCreate, db: Session = Depends(get_db)):
-    # Create contract
-    new_contract = Contract(
-        CustomerID=payload.customer_id,
-        StartDate=payload.start_date,
-        EndDate=payload.end_date,
-        # Optional fields if present in model
-        **({"TotalAmount": payload.total_amount} if hasattr(Contract, "TotalAmount") else {}),
-        **({"Status": payload.status} if hasattr(Contract, "Status") else {}),
-        **({"Notes": payload.notes} if hasattr(Contract, "Notes") else {}),
-    )
-    db.add(new_contract)
-    db.flush()  # Have ContractID for relations
-
-    # Add cars
-    for item in payload.cars or []:
-        db.add(
-            ContractCar(
-                ContractID=new_contract.ContractID,
-                CarID=item.car_id,
-                Amount=item.amount,
-            )
+async def create_contract(payload: ContractCreate, db: AsyncSession = Depends(get_async_db)):
+    car_ids = {item.car_id for item in payload.cars or []}
+    cars = await _reserve_cars(db, car_ids)
+
+    # Create contract; the response is built from the RETURNING row and the payload
+    contract = (await db.execute(
+        insert(Contract).values(**_contract_values(payload)).returning(Contract)
+    )).scalar_one()
+
+    # Add cars (rows are locked by _reserve_cars until commit)
+    if payload.cars:
+        await db.execute(
+            insert(ContractCar),
+            [
+                {"ContractID": contract.ContractID, "CarID": item.car_id, "Amount": item.amount}
+                for item in payload.cars
+            ],
         )
-        car = db.get(Car, item.car_id)
-        if car:
-            car.Status = "Rented"
-            db.add(car)
+    await _mark_cars_rented(db, car_ids)
+    fleet = FleetDelta()
+    for car in cars.values():
+        fleet.car(car.OwnerBranchID, car.Status, RENTED_CAR_STATUS)
+    fleet.contract((car.OwnerBranchID for car in cars.values()), None, (contract.Status, contract.EndDate))
 
     # Add surcharges
-    for s in payload.surcharges or []:
-        db.add(
-            ContractSurcharge(
-                ContractID=new_contract.ContractID,
-                SurchargeID=s.surcharge_id if s.surcharge_id is not None else 0,
-                UnitPrice=s.unit_price,
-                Quantity=s.quantity,
-            )
+    if payload.surcharges:
+        await db.execute(
+            insert(ContractSurcharge),
+            [
+                {
+                    "ContractID": contract.ContractID,
+                    "SurchargeID": _surcharge_key(s),
+                    "UnitPrice": s.unit_price,
+                    "Quantity": s.quantity,
+                }
+                for s in payload.surcharges
+            ],
         )
 
-    db.commit()
-    db.refresh(new_contract)
-    return _contract_to_read(new_contract, db)
+    await fleet.apply_async(db)
+    await db.commit()
+    invalidate_if_past(contract.StartDate)
+    return _contract_to_read(
+        contract,
+        [
+            {"CarID": item.car_id, "DailyRate": cars[item.car_id].DailyRate, "Amount": item.amount}
+            for item in payload.cars or []
+        ],
+        [
+            {"SurchargeID": _surcharge_key(s), "UnitPrice": s.unit_price, "Quantity": s.quantity}
+            for s in payload.surcharges or []
+        ],
+    )
+
+
+@router.post("/bulk", response_model=List[ContractBulkItemResult])
+async def create_contracts_bulk(
+    payloads: List[ContractCreate] = Body(..., max_length=BULK_MAX_ITEMS),
+    db: AsyncSession = Depends(get_async_db),
+):
+    results = [ContractBulkItemResult(index=i, ok=False) for i in range(len(payloads))]
+
+    # Validate references with one query per table instead of one per item
+    customer_ids = {p.customer_id for p in payloads}
+    car_ids = {item.car_id for p in payloads for item in p.cars}
+    surcharge_ids = {_surcharge_key(s) for p in payloads for s in p.surcharges}
+    known_customers = await _existing_ids(db, Customer.CustomerID, customer_ids)
+    known_cars = await _existing_ids(db, Car.CarID, car_ids)
+    # Cars locked by a concurrent booking are skipped rather than waited for
+    bookable_cars: set = set()
+    car_rows: dict = {}
+    if car_ids:
+        rows = (await db.execute(
+            select(Car.CarID, Car.Status, Car.OwnerBranchID)
+            .where(Car.CarID.in_(car_ids))
+            .order_by(Car.CarID)
+            .with_for_update(skip_locked=True)
+        )).all()
+        car_rows = {r.CarID: r for r in rows}
+        bookable_cars = {r.CarID for r in rows if _is_car_available(r.Status)}
+    known_surcharges = await _existing_ids(db, Surcharge.SurchargeID, surcharge_ids)
+
+    accepted: List[int] = []
+    booked: set = set()
+    for i, p in enumerate(payloads):
+        p_cars = [item.car_id for item in p.cars]
+        p_surcharges = [_surcharge_key(s) for s in p.surcharges]
+        if p.customer_id not in known_customers:
+            results[i].error = f"Không tìm thấy khách hàng {p.customer_id}"
+        elif set(p_cars) - known_cars:
+            results[i].error = f"Không tìm thấy xe: {sorted(set(p_cars) - known_cars)}"
+        elif len(set(p_cars)) != len(p_cars) or booked.intersection(p_cars):
+            results[i].error = "Xe được đặt nhiều lần trong cùng lô"
+        elif set(p_cars) - bookable_cars:
+            results[i].error = f"Xe không sẵn sàng cho thuê: {sorted(set(p_cars) - bookable_cars)}"
+        elif len(set(p_surcharges)) != len(p_surcharges):
+            results[i].error = "Phụ phí bị trùng"
+        elif set(p_surcharges) - known_surcharges:
+            results[i].error = f"Không tìm thấy phụ phí: {sorted(set(p_surcharges) - known_surcharges)}"
+        else:
+            booked.update(p_cars)
+            accepted.append(i)
+
+    if not accepted:
+        return results
+
+    try:
+        # Multi-row INSERT ... RETURNING, ids come back in parameter order
+        contract_ids = (await db.execute(
+            insert(Contract).returning(Contract.ContractID, sort_by_parameter_order=True),
+            [
+                {
+                    "CustomerID": payloads[i].customer_id,
+                    "StartDate": payloads[i].start_date,
+                    "EndDate": payloads[i].end_date,
+                    "TotalAmount": payloads[i].total_amount,
+                    "Status": payloads[i].status,
+                    "Notes": payloads[i].notes,
+                }
+                for i in accepted
+            ],
+        )).scalars().all()
+        line_rows = [
+            {"ContractID": cid, "CarID": item.car_id, "Amount": item.amount}
+            for i, cid in zip(accepted, contract_ids)
+            for item in payloads[i].cars
+        ]
+        surcharge_rows = [
+            {
+                "ContractID": cid,
+                "SurchargeID": _surcharge_key(s),
+                "UnitPrice": s.unit_price,
+                "Quantity": s.quantity,
+            }
+            for i, cid in zip(accepted, contract_ids)
+            for s in payloads[i].surcharges
+        ]
+        if line_rows:
+            await db.execute(insert(ContractCar), line_rows)
+        if surcharge_rows:
+            await db.execute(insert(ContractSurcharge), surcharge_rows)
+        await _mark_cars_rented(db, booked)
+        fleet = FleetDelta()
+        for car_id in booked:
+            fleet.car(car_rows[car_id].OwnerBranchID, car_rows[car_id].Status, RENTED_CAR_STATUS)
+        for i in accepted:
+            fleet.contract(
+                (car_rows[item.car_id].OwnerBranchID for item in payloads[i].cars),
+                None,
+                (payloads[i].status, payloads[i].end_date),
+            )
+        await fleet.apply_async(db)
+        await db.commit()
+        invalidate_if_past(*(payloads[i].start_date for i in accepted))
+    except SQLAlchemyError as exc:
+        await db.rollback()
+        for i in accepted:
+            results[i].error = f"Lỗi cơ sở dữ liệu: {exc.__class__.__name__}"
+        return results
+
+    for i, cid in zip(accepted, contract_ids):
+        results[i].ok = True
+        results[i].contract_id = cid
+    return results
+
+
+@router.post("/quote", response_model=List[ContractQuote])
+async def quote_contracts(
+    payloads: List[ContractQuoteIn] = Body(..., max_length=QUOTE_MAX_ITEMS),
+    db: AsyncSession = Depends(get_async_db),
+):
+    # Prices candidate bookings from the cached rate tables (app.pricing); nothing is written
+    cars, surcharges = await rate_table.lookup(
+        db,
+        {car_id for p in payloads for car_id in p.car_ids},
+        {s.surcharge_id for p in payloads for s in p.surcharges},
+    )
+    results = quote(
+        [
+            (p.start_time, p.end_time, p.car_ids, [(s.surcharge_id, s.quantity) for s in p.surcharges])
+            for p in payloads
+        ],
+        cars,
+        surcharges,
+    )
+    return [ContractQuote(**r) for r in results]
+
+
+@router.get("/outstanding", response_model=List[ContractBalance])
+async def list_outstanding_contracts(
+    page: PageParams = Depends(page_params),
+    customer_id: Optional[int] = Query(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    # Range scan of the partial index ix_contract_balancedue_open (BalanceDue > 0), in ContractID order
+    query = select(*_BALANCE_COLUMNS).where(
+        Contract.BalanceDue > 0,
+        func.lower(func.coalesce(Contract.Status, "")).not_in(CANCELED_STATUSES),
+    )
+    if customer_id is not None:
+        query = query.where(Contract.CustomerID == customer_id)
+    headers = await estimate_total_async(db, query) if page.with_total else {}
+    keyset = _CONTRACT_KEYSETS["id"]
+    rows = (await db.execute(keyset.apply(query, page))).all()
+    rows, headers = keyset.page(rows, page, headers)
+    return json_response([dict(r._mapping) for r in rows], headers=headers)
+
+
+@router.get("/export")
+async def export_contracts(
+    fmt: ExportFormat = Query("csv", alias="format"),
+    start_from: Optional[date] = Query(None, description="StartDate >= start_from"),
+    start_to: Optional[date] = Query(None, description="StartDate <= start_to"),
+):
+    stmt = select(
+        Contract.ContractID.label("ContractID"),
+        Contract.CustomerID.label("CustomerID"),
+        Contract.StartDate.label("StartDate"),
+        Contract.EndDate.label("EndDate"),
+        Contract.TotalAmount.label("TotalAmount"),
+        Contract.Status.label("Status"),
+        Contract.Notes.label("Notes"),
+    )
+    order_by = [Contract.ContractID]
+    if start_from is not None:
+        stmt = stmt.where(Contract.StartDate >= start_from)
+    if start_to is not None:
+        stmt = stmt.where(Contract.StartDate <= start_to)
+    if start_from is not None or start_to is not None:
+        # Index order of ix_contract_startdate_id: rows stream without a sort of the range
+        order_by = [Contract.StartDate, Contract.ContractID]
+    return export_response(stmt.order_by(*order_by), fmt, "contracts")
 
 
 @router.get("/{contract_id}", response_model=ContractRead)
-def get_contract(contract_id: int, db: Session = Depends(get_db)):
-    contract = db.get(Contract, contract_id)
+async def get_contract(
+    contract_id: int,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    if if_none_match:
+        version = (await db.execute(
+            _contract_versions(select(Contract).where(Contract.ContractID == contract_id))
+        )).one_or_none()
+        if version is None:
+            raise HTTPException(status_code=404, detail="Không tìm thấy hợp đồng")
+        etag = _versions_etag([version])
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+    contract = await _load_contract(db, contract_id)
     if not contract:
         raise HTTPException(status_code=404, detail="Không tìm thấy hợp đồng")
-    return _contract_to_read(contract, db)
+    return json_response(_contract_row(contract), headers={"ETag": _contract_etag([contract])})
 
 
 @router.put("/{contract_id}", response_model=ContractRead)
-def update_contract(contract_id: int, payload: ContractUpdate, db: Session = Depends(get_db)):
-    contract = db.get(Contract, contract_id)
+async def update_contract(contract_id: int, payload: ContractUpdate, db: AsyncSession = Depends(get_async_db)):
+    values = _contract_values(payload)
+    new_status = (payload.status or "").lower()
+    if new_status in COMPLETED_STATUSES:
+        values["Status"] = "Completed"
+    elif new_status in CANCELED_STATUSES:
+        values["Status"] = "Canceled"
+
+    if values:
+        row = (await db.execute(_update_contract_returning_old(contract_id, values, Contract))).one_or_none()
+        contract, before = (row[0], (row[1], row[2])) if row else (None, None)
+    else:
+        contract = (await db.execute(select(Contract).where(Contract.ContractID == contract_id))).scalar_one_or_none()
+        before = (contract.Status, contract.EndDate) if contract else None
     if not contract:
         raise HTTPException(status_code=404, detail="Không tìm thấy hợp đồng")
 
-    if payload.customer_id is not None:
-        contract.CustomerID = payload.customer_id
-    if payload.start_date is not None:
-        contract.StartDate = payload.start_date
-    if payload.end_date is not None:
-        contract.EndDate = payload.end_date
-    if payload.total_amount is not None and hasattr(contract, "TotalAmount"):
-        contract.TotalAmount = payload.total_amount
-    if payload.status is not None and hasattr(contract, "Status"):
-        contract.Status = payload.status
-    if payload.notes is not None and hasattr(contract, "Notes"):
-        contract.Notes = payload.notes
-
-    # Status side-effects
-    if payload.status and payload.status.lower() in {"completed", "returned", "done"}:
-        existing_return = db.execute(
-            select(ReturnReceipt).where(ReturnReceipt.ContractID == contract.ContractID)
-        ).scalars().first()
-        if not existing_return:
-            db.add(
-                ReturnReceipt(
-                    ContractID=contract.ContractID,
-                    ReturnDate=payload.end_date or contract.EndDate,
-                    Notes="Auto-created on status update",
-                )
-            )
-        for cc in contract.contract_cars or []:
-            car = db.get(Car, cc.CarID)
-            if car:
-                car.Status = "Ready"
-                db.add(car)
-        if hasattr(contract, "Status"):
-            contract.Status = "Completed"
-    elif payload.status and payload.status.lower() in {"canceled", "cancelled"}:
-        for cc in contract.contract_cars or []:
-            car = db.get(Car, cc.CarID)
-            if car:
-                car.Status = "Ready"
-                db.add(car)
-        if hasattr(contract, "Status"):
-            contract.Status = "Canceled"
-
-    db.add(contract)
-    db.commit()
-    db.refresh(contract)
-    return _contract_to_read(contract, db)
+    cars, surcharges = await _contract_lines(db, contract_id)
+    # Status side effects (return receipt, car release) run in app.jobs workers after commit;
+    # the car ids travel in the payload, the contract may be deleted before the job runs
+    jobs = []
+    if new_status in COMPLETED_STATUSES:
+        jobs.append((AUTO_RETURN_RECEIPT, {"contract_id": contract_id}))
+    if new_status in COMPLETED_STATUSES or new_status in CANCELED_STATUSES:
+        jobs.append((RELEASE_CARS, {"contract_id": contract_id, "car_ids": [c["CarID"] for c in cars]}))
+    await enqueue_async(db, *jobs)
+
+    fleet = FleetDelta()
+    fleet.contract([c.pop("OwnerBranchID") for c in cars], before, (contract.Status, contract.EndDate))
+    await fleet.apply_async(db)
+    await db.commit()
+    if jobs:
+        job_queue.notify()
+    if "StartDate" in values:
+        # The contract may have left a closed report period
+        report_cache.invalidate()
+    elif values.keys() & {"TotalAmount", "Status"}:
+        invalidate_if_past(contract.StartDate)
+    return _contract_to_read(contract, cars, surcharges)
 
 
 @router.post("/{contract_id}/payments", status_code=status.HTTP_201_CREATED)
-def add_payment(
+async def add_payment(
     contract_id: int,
     amount: float = Query(..., ge=0),
     method: str = Query("Cash"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    if not db.get(Contract, contract_id):
+    value = Decimal(str(amount))
+    # One statement: the balance ledger update (row lock on the contract) and the payment
+    # insert commit together; nothing happens when the contract does not exist
+    paid = (
+        update(Contract)
+        .where(Contract.ContractID == contract_id)
+        .values(PaidAmount=Contract.PaidAmount + value, RowVersion=Contract.RowVersion + 1)
+        .returning(*_BALANCE_COLUMNS)
+        .cte("paid")
+    )
+    payment = (
+        insert(ContractPayment)
+        .from_select(
+            [ContractPayment.ContractID, ContractPayment.Amount, ContractPayment.PaymentMethod, ContractPayment.PaymentDate],
+            select(
+                paid.c.ContractID,
+                literal(value, ContractPayment.Amount.type),
+                literal(method, ContractPayment.PaymentMethod.type),
+                literal(date.today(), ContractPayment.PaymentDate.type),
+            ),
+        )
+        .returning(ContractPayment.PaymentID.label("PaymentID"), ContractPayment.ContractID.label("PaidContractID"))
+        .cte("payment")
+    )
+    row = (await db.execute(
+        select(payment.c.PaymentID, *paid.c).join_from(payment, paid, payment.c.PaidContractID == paid.c.ContractID)
+    )).mappings().one_or_none()
+    if row is None:
         raise HTTPException(status_code=404, detail="Không tìm thấy hợp đồng")
-    pay = ContractPayment(ContractID=contract_id, Amount=amount, PaymentMethod=method)
-    db.add(pay)
-    db.commit()
-    return {"PaymentID": pay.PaymentID}
+    await db.commit()
+    return json_response(dict(row), status_code=status.HTTP_201_CREATED)
 
 
-@router.post("/{contract_id}/delivery", status_code=status.HTTP_201_CREATED)
-def create_delivery(contract_id: int, body: DeliveryReceiptIn, db: Session = Depends(get_db)):
-    if not db.get(Contract, contract_id):
+@router.get("/{contract_id}/balance", response_model=ContractBalance)
+async def get_contract_balance(contract_id: int, db: AsyncSession = Depends(get_async_db)):
+    row = (await db.execute(
+        select(*_BALANCE_COLUMNS).where(Contract.ContractID == contract_id)
+    )).mappings().one_or_none()
+    if row is None:
         raise HTTPException(status_code=404, detail="Không tìm thấy hợp đồng")
-    rec = DeliveryReceipt(
-        ContractID=contract_id,
-        DeliveryEmployeeID=body.delivery_employee_id,
-        ReceiverEmployeeID=body.receiver_employee_id,
-        DeliveryDate=body.delivery_date,
-        CarConditionAtDelivery=body.car_condition_at_delivery,
-        Notes=body.notes,
+    return json_response(dict(row))
+
+
+@router.post("/{contract_id}/delivery", status_code=status.HTTP_201_CREATED)
+async def create_delivery(contract_id: int, body: DeliveryReceiptIn, db: AsyncSession = Depends(get_async_db)):
+    delivery_id = await _insert_for_contract(
+        db,
+        DeliveryReceipt,
+        contract_id,
+        {
+            "DeliveryEmployeeID": body.delivery_employee_id,
+            "ReceiverEmployeeID": body.receiver_employee_id,
+            "DeliveryDate": body.delivery_date,
+            "CarConditionAtDelivery": body.car_condition_at_delivery,
+            "Notes": body.notes,
+        },
     )
-    db.add(rec)
-    db.commit()
-    return {"DeliveryID": rec.DeliveryID}
+    if delivery_id is None:
+        raise HTTPException(status_code=404, detail="Không tìm thấy hợp đồng")
+    await db.commit()
+    return {"DeliveryID": delivery_id}
 
 
 @router.post("/{contract_id}/return", status_code=status.HTTP_201_CREATED)
-def create_return(contract_id: int, body: ReturnReceiptIn, db: Session = Depends(get_db)):
-    if not db.get(Contract, contract_id):
+async def create_return(contract_id: int, body: ReturnReceiptIn, db: AsyncSession = Depends(get_async_db)):
+    updated = (await db.execute(
+        _update_contract_returning_old(contract_id, {"Status": "Completed"}, Contract.Status, Contract.EndDate)
+    )).one_or_none()
+    if updated is None:
         raise HTTPException(status_code=404, detail="Không tìm thấy hợp đồng")
-    rec = ReturnReceipt(
-        ContractID=contract_id,
-        ReceiverEmployeeID=body.receiver_employee_id,
-        ReceiverBranchID=body.receiver_branch_id,
-        ReturnDate=body.return_date,
-        Notes=body.notes,
-    )
-    db.add(rec)
-    contract = db.get(Contract, contract_id)
-    if contract and hasattr(contract, "Status"):
-        contract.Status = "Completed"
-        for cc in contract.contract_cars or []:
-            car = db.get(Car, cc.CarID)
-            if car:
-                car.Status = "Ready"
-                db.add(car)
-        db.add(contract)
-    db.commit()
-    return {"ReturnID": rec.ReturnID}
+    return_id = (await db.execute(
+        insert(ReturnReceipt)
+        .values(
+            ContractID=contract_id,
+            ReceiverEmployeeID=body.receiver_employee_id,
+            ReceiverBranchID=body.receiver_branch_id,
+            ReturnDate=body.return_date,
+            Notes=body.notes,
+        )
+        .returning(ReturnReceipt.ReturnID)
+    )).scalar_one()
+    cars = await _contract_cars(db, contract_id)
+    await enqueue_async(db, (RELEASE_CARS, {"contract_id": contract_id, "car_ids": [car_id for car_id, _ in cars]}))
+    fleet = FleetDelta()
+    fleet.contract([branch_id for _, branch_id in cars], (updated[2], updated[3]), (updated[0], updated[1]))
+    await fleet.apply_async(db)
+    await db.commit()
+    job_queue.notify()
+    return {"ReturnID": return_id}
 
 
 @router.delete("/{contract_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_contract(contract_id: int, db: Session = Depends(get_db)):
-    contract = db.get(Contract, contract_id)
+async def delete_contract(contract_id: int, db: AsyncSession = Depends(get_async_db)):
+    # Row lock: a concurrent update or delete waits, so the fleet counts are subtracted once
+    contract = await db.get(Contract, contract_id, with_for_update=True)
     if not contract:
         raise HTTPException(status_code=404, detail="Không tìm thấy hợp đồng")
-    db.delete(contract)
-    db.commit()
+    if is_active_contract(contract.Status):
+        fleet = FleetDelta()
+        branches = [branch_id for _, branch_id in await _contract_cars(db, contract_id)]
+        fleet.contract(branches, (contract.Status, contract.EndDate), None)
+        await fleet.apply_async(db)
+    await db.delete(contract)
+    await db.commit()
+    # Its payments go with it, whatever their dates
+    report_cache.invalidate()
     return None
 
 
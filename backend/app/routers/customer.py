@@ -1,10 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Query
+from sqlalchemy import insert, select, update
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime, date
 
 from ..database import get_db
 from ..models import Customer
+from ..normalize import citizen_id_key, normalize_citizen_id, normalize_phone, phone_key
+from ..pagination import Keyset, PageParams, estimate_total, page_params
 from pydantic import BaseModel
 
 
@@ -42,91 +45,148 @@ class CustomerOut(CustomerBase):
         from_attributes = True
 
 
+def _customer_out(c: Customer) -> CustomerOut:
+    # map model attributes to the snake_case fields expected by frontend
+    return CustomerOut(
+        customer_id=c.CustomerID,
+        full_name=c.FullName,
+        phone=c.Phone.strip() if c.Phone else c.Phone,
+        email=c.Email,
+        address=c.Address,
+        national_id=c.CitizenID.strip() if c.CitizenID else c.CitizenID,
+        register_date=c.RegistrationDate,
+        is_deleted=c.IsDeleted,
+    )
+
+
+# Schema field -> model attribute, for INSERT/UPDATE ... RETURNING
+_CUSTOMER_FIELDS = {
+    "full_name": "FullName",
+    "phone": "Phone",
+    "email": "Email",
+    "address": "Address",
+    "national_id": "CitizenID",
+    "register_date": "RegistrationDate",
+    "is_deleted": "IsDeleted",
+}
+
+
+def _customer_values(payload: BaseModel) -> dict:
+    # Unset/None fields are left out: partial update, server defaults on insert
+    data = payload.model_dump(exclude_none=True)
+    if "full_name" in data:
+        data["full_name"] = data["full_name"].strip()
+    return {_CUSTOMER_FIELDS[k]: v for k, v in data.items()}
+
+
+_CUSTOMER_KEYSET = Keyset(Customer.CustomerID)
+
 router = APIRouter(prefix="/customers", tags=["customers"])
 
 
 @router.get("/", response_model=List[CustomerOut])
 def list_customers(
-    skip: int = 0,
-    limit: int = 50,
+    response: Response,
+    page: PageParams = Depends(page_params),
     search: Optional[str] = Query(None, description="Filter by name/phone/email (icontains)"),
     include_deleted: bool = Query(False, description="Include soft-deleted customers"),
     db: Session = Depends(get_db),
 ):
     query = db.query(Customer)
     if not include_deleted:
-        query = query.filter(Customer.is_deleted == False)  # noqa: E712
+        query = query.filter(Customer.IsDeleted == False)  # noqa: E712
     if search:
         like = f"%{search}%"
         query = query.filter(
-            (Customer.full_name.ilike(like))
-            | (Customer.email.ilike(like))
-            | (Customer.phone.ilike(like))
+            (Customer.FullName.ilike(like))
+            | (Customer.Email.ilike(like))
+            | (Customer.Phone.ilike(like))
         )
-    customers = query.order_by(Customer.customer_id).offset(skip).limit(limit).all()
-    return customers
+    if page.with_total:
+        response.headers.update(estimate_total(db, query))
+    customers, headers = _CUSTOMER_KEYSET.page(_CUSTOMER_KEYSET.apply(query, page).all(), page)
+    response.headers.update(headers)
+    return [_customer_out(c) for c in customers]
+
+
+@router.get("/by-phone", response_model=List[CustomerOut])
+def find_customers_by_phone(
+    phone: str = Query(..., description="Phone number; spaces, punctuation and +84 prefix are ignored"),
+    include_deleted: bool = Query(False, description="Include soft-deleted customers"),
+    db: Session = Depends(get_db),
+):
+    key = normalize_phone(phone)
+    if not key:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid phone number")
+    # Equality on the ix_customer_phone_key expression index
+    query = db.query(Customer).filter(phone_key(Customer.Phone) == key)
+    if not include_deleted:
+        query = query.filter(Customer.IsDeleted == False)  # noqa: E712
+    return [_customer_out(c) for c in query.order_by(Customer.CustomerID).all()]
+
+
+@router.get("/by-citizen-id", response_model=CustomerOut)
+def get_customer_by_citizen_id(
+    citizen_id: str = Query(..., description="CitizenID; whitespace is ignored"),
+    db: Session = Depends(get_db),
+):
+    key = normalize_citizen_id(citizen_id)
+    if not key:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid citizen id")
+    customer = (
+        db.query(Customer)
+        .filter(citizen_id_key(Customer.CitizenID) == key, Customer.IsDeleted == False)  # noqa: E712
+        .order_by(Customer.CustomerID)
+        .first()
+    )
+    if not customer:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Customer not found")
+    return _customer_out(customer)
 
 
 @router.get("/{customer_id}", response_model=CustomerOut)
 def get_customer(customer_id: int, db: Session = Depends(get_db)):
-    customer = db.query(Customer).filter(Customer.customer_id == customer_id).first()
+    customer = db.query(Customer).filter(Customer.CustomerID == customer_id).first()
     if not customer:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Customer not found")
-    return customer
+    return _customer_out(customer)
 
 
 @router.post("/", response_model=CustomerOut, status_code=status.HTTP_201_CREATED)
 def create_customer(payload: CustomerCreate, db: Session = Depends(get_db)):
-    customer = Customer(
-        full_name=payload.full_name.strip(),
-        phone=payload.phone,
-        email=payload.email,
-        address=payload.address,
-        national_id=payload.national_id,
-        register_date=payload.register_date,
-        is_deleted=payload.is_deleted or False,
-    )
-    db.add(customer)
+    customer = db.execute(insert(Customer).values(**_customer_values(payload)).returning(Customer)).scalar_one()
+    # Build the response before commit expires the RETURNING row
+    out = _customer_out(customer)
     db.commit()
-    db.refresh(customer)
-    return customer
+    return out
 
 
 @router.put("/{customer_id}", response_model=CustomerOut)
 def update_customer(customer_id: int, payload: CustomerUpdate, db: Session = Depends(get_db)):
-    customer = db.query(Customer).filter(Customer.customer_id == customer_id).first()
+    values = _customer_values(payload)
+    if values:
+        stmt = update(Customer).where(Customer.CustomerID == customer_id).values(**values).returning(Customer)
+    else:
+        stmt = select(Customer).where(Customer.CustomerID == customer_id)
+    customer = db.execute(stmt).scalar_one_or_none()
     if not customer:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Customer not found")
-
-    if payload.full_name is not None:
-        customer.full_name = payload.full_name.strip()
-    if payload.phone is not None:
-        customer.phone = payload.phone
-    if payload.email is not None:
-        customer.email = payload.email
-    if payload.address is not None:
-        customer.address = payload.address
-    if payload.national_id is not None:
-        customer.national_id = payload.national_id
-    if payload.register_date is not None:
-        customer.register_date = payload.register_date
-    if payload.is_deleted is not None:
-        customer.is_deleted = payload.is_deleted
-
-    db.add(customer)
+    out = _customer_out(customer)
     db.commit()
-    db.refresh(customer)
-    return customer
+    return out
 
 
 @router.delete("/{customer_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_customer(customer_id: int, db: Session = Depends(get_db)):
-    customer = db.query(Customer).filter(Customer.customer_id == customer_id).first()
-    if not customer:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Customer not found")
     # Soft delete to preserve history
-    customer.is_deleted = True
-    db.add(customer)
+    deleted = db.execute(
+        update(Customer)
+        .where(Customer.CustomerID == customer_id)
+        .values(IsDeleted=True)
+        .returning(Customer.CustomerID)
+    ).scalar_one_or_none()
+    if deleted is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Customer not found")
     db.commit()
     return None
 
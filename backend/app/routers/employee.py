@@ -1,10 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Query
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime, date
 
 from ..database import get_db
-from ..models import Employee, Role, Branch
+from ..db_errors import FOREIGN_KEY_VIOLATION, integrity_code, integrity_constraint
+from ..models import Employee
+from ..pagination import Keyset, PageParams, estimate_total, page_params
 from pydantic import BaseModel
 
 
@@ -49,13 +53,71 @@ class EmployeeOut(EmployeeBase):
         from_attributes = True
 
 
+def _employee_out(e: Employee) -> EmployeeOut:
+    # map model attributes to the snake_case fields expected by frontend
+    return EmployeeOut(
+        employee_id=e.EmployeeID,
+        full_name=e.FullName,
+        birth_date=e.BirthDate,
+        gender=e.Gender,
+        phone=e.Phone.strip() if e.Phone else e.Phone,
+        email=e.Email,
+        address=e.Address,
+        salary=e.Salary,
+        role_id=e.RoleID,
+        branch_id=e.BranchID,
+        is_deleted=e.IsDeleted,
+    )
+
+
+# Schema field -> model attribute, for INSERT/UPDATE ... RETURNING
+_EMPLOYEE_FIELDS = {
+    "full_name": "FullName",
+    "birth_date": "BirthDate",
+    "gender": "Gender",
+    "phone": "Phone",
+    "email": "Email",
+    "address": "Address",
+    "salary": "Salary",
+    "role_id": "RoleID",
+    "branch_id": "BranchID",
+    "is_deleted": "IsDeleted",
+}
+
+
+def _employee_values(payload: BaseModel) -> dict:
+    # Unset/None fields are left out: partial update, server defaults on insert
+    data = payload.model_dump(exclude_none=True)
+    if "full_name" in data:
+        data["full_name"] = data["full_name"].strip()
+    return {_EMPLOYEE_FIELDS[k]: v for k, v in data.items()}
+
+
+# Postgres default name of the Employee.RoleID foreign key (CreateTablesAndInsertDraft.sql and create_all)
+EMPLOYEE_ROLE_FK = "employee_roleid_fkey"
+
+
+def _write_employee(db: Session, stmt) -> Optional[Employee]:
+    # The role/branch foreign keys reject unknown ids in the same round trip
+    try:
+        return db.execute(stmt).scalar_one_or_none()
+    except IntegrityError as exc:
+        db.rollback()
+        if integrity_code(exc) == FOREIGN_KEY_VIOLATION:
+            missing = "Role" if integrity_constraint(exc) == EMPLOYEE_ROLE_FK else "Branch"
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"{missing} does not exist")
+        raise
+
+
+_EMPLOYEE_KEYSET = Keyset(Employee.EmployeeID)
+
 router = APIRouter(prefix="/employees", tags=["employees"])
 
 
 @router.get("/", response_model=List[EmployeeOut])
 def list_employees(
-    skip: int = 0,
-    limit: int = 50,
+    response: Response,
+    page: PageParams = Depends(page_params),
     search: Optional[str] = Query(None, description="Filter by name/email/phone (icontains)"),
     role_id: Optional[int] = Query(None, description="Filter by role_id"),
     branch_id: Optional[int] = Query(None, description="Filter by branch_id"),
@@ -64,108 +126,67 @@ def list_employees(
 ):
     query = db.query(Employee)
     if not include_deleted:
-        query = query.filter(Employee.is_deleted == False)  # noqa: E712
+        query = query.filter(Employee.IsDeleted == False)  # noqa: E712
     if search:
         like = f"%{search}%"
         query = query.filter(
-            (Employee.full_name.ilike(like))
-            | (Employee.email.ilike(like))
-            | (Employee.phone.ilike(like))
+            (Employee.FullName.ilike(like))
+            | (Employee.Email.ilike(like))
+            | (Employee.Phone.ilike(like))
         )
     if role_id is not None:
-        query = query.filter(Employee.role_id == role_id)
+        query = query.filter(Employee.RoleID == role_id)
     if branch_id is not None:
-        query = query.filter(Employee.branch_id == branch_id)
-    employees = query.order_by(Employee.employee_id).offset(skip).limit(limit).all()
-    return employees
+        query = query.filter(Employee.BranchID == branch_id)
+    if page.with_total:
+        response.headers.update(estimate_total(db, query))
+    employees, headers = _EMPLOYEE_KEYSET.page(_EMPLOYEE_KEYSET.apply(query, page).all(), page)
+    response.headers.update(headers)
+    return [_employee_out(e) for e in employees]
 
 
 @router.get("/{employee_id}", response_model=EmployeeOut)
 def get_employee(employee_id: int, db: Session = Depends(get_db)):
-    employee = db.query(Employee).filter(Employee.employee_id == employee_id).first()
+    employee = db.query(Employee).filter(Employee.EmployeeID == employee_id).first()
     if not employee:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Employee not found")
-    return employee
+    return _employee_out(employee)
 
 
 @router.post("/", response_model=EmployeeOut, status_code=status.HTTP_201_CREATED)
 def create_employee(payload: EmployeeCreate, db: Session = Depends(get_db)):
-    # Ensure role and branch exist
-    role = db.query(Role).filter(Role.role_id == payload.role_id).first()
-    if not role:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Role does not exist")
-    branch = db.query(Branch).filter(Branch.branch_id == payload.branch_id).first()
-    if not branch:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Branch does not exist")
-
-    employee = Employee(
-        full_name=payload.full_name.strip(),
-        birth_date=payload.birth_date,
-        gender=payload.gender,
-        phone=payload.phone,
-        email=payload.email,
-        address=payload.address,
-        salary=payload.salary,
-        role_id=payload.role_id,
-        branch_id=payload.branch_id,
-        is_deleted=payload.is_deleted or False,
-    )
-    db.add(employee)
+    employee = _write_employee(db, insert(Employee).values(**_employee_values(payload)).returning(Employee))
+    # Build the response before commit expires the RETURNING row
+    out = _employee_out(employee)
     db.commit()
-    db.refresh(employee)
-    return employee
+    return out
 
 
 @router.put("/{employee_id}", response_model=EmployeeOut)
 def update_employee(employee_id: int, payload: EmployeeUpdate, db: Session = Depends(get_db)):
-    employee = db.query(Employee).filter(Employee.employee_id == employee_id).first()
+    values = _employee_values(payload)
+    if values:
+        stmt = update(Employee).where(Employee.EmployeeID == employee_id).values(**values).returning(Employee)
+    else:
+        stmt = select(Employee).where(Employee.EmployeeID == employee_id)
+    employee = _write_employee(db, stmt)
     if not employee:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Employee not found")
-
-    if payload.role_id is not None:
-        role = db.query(Role).filter(Role.role_id == payload.role_id).first()
-        if not role:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Role does not exist")
-        employee.role_id = payload.role_id
-
-    if payload.branch_id is not None:
-        branch = db.query(Branch).filter(Branch.branch_id == payload.branch_id).first()
-        if not branch:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Branch does not exist")
-        employee.branch_id = payload.branch_id
-
-    if payload.full_name is not None:
-        employee.full_name = payload.full_name.strip()
-    if payload.birth_date is not None:
-        employee.birth_date = payload.birth_date
-    if payload.gender is not None:
-        employee.gender = payload.gender
-    if payload.phone is not None:
-        employee.phone = payload.phone
-    if payload.email is not None:
-        employee.email = payload.email
-    if payload.address is not None:
-        employee.address = payload.address
-    if payload.salary is not None:
-        employee.salary = payload.salary
-    if payload.is_deleted is not None:
-        employee.is_deleted = payload.is_deleted
-
-    db.add(employee)
+    out = _employee_out(employee)
     db.commit()
-    db.refresh(employee)
-    return employee
+    return out
 
 
 @router.delete("/{employee_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_employee(employee_id: int, db: Session = Depends(get_db)):
-    employee = db.query(Employee).filter(Employee.employee_id == employee_id).first()
-    if not employee:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Employee not found")
     # Soft delete to preserve history
-    employee.is_deleted = True
-    db.add(employee)
+    deleted = db.execute(
+        update(Employee)
+        .where(Employee.EmployeeID == employee_id)
+        .values(IsDeleted=True)
+        .returning(Employee.EmployeeID)
+    ).scalar_one_or_none()
+    if deleted is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Employee not found")
     db.commit()
     return None
-
-
@@ -0,0 +1,40 @@
+from datetime import date
+from typing import Dict, List, Optional
+
+from fastapi import APIRouter, Depends
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from ..database import get_db
+from ..fleet import rebuild, summary
+
+
+class FleetBranchSummary(BaseModel):
+    branch_id: Optional[int] = None  # None: cars without owner branch / contracts without cars
+    cars_by_status: Dict[str, int]
+    cars_total: int
+    active_contracts: int
+    overdue_contracts: int
+
+
+class FleetSummary(BaseModel):
+    as_of: date
+    branches: List[FleetBranchSummary]
+
+
+router = APIRouter(prefix="/fleet", tags=["fleet"])
+
+
+@router.get("/summary", response_model=FleetSummary)
+def fleet_summary(db: Session = Depends(get_db)):
+    # Served from fleetcarcount / fleetcontractcount, never from car or contract
+    today = date.today()
+    return {"as_of": today, "branches": summary(db, today)}
+
+
+@router.post("/summary/rebuild", response_model=FleetSummary)
+def rebuild_fleet_summary(db: Session = Depends(get_db)):
+    # Full recount: run once after creating the tables, or to repair drift from manual SQL
+    rebuild(db)
+    db.commit()
+    return fleet_summary(db)
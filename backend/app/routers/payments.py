@@ -0,0 +1,37 @@
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Query
+from sqlalchemy import select
+
+from ..export import ExportFormat, export_response
+from ..models import ContractPayment
+
+
+router = APIRouter(prefix="/payments", tags=["payments"])
+
+
+@router.get("/export")
+def export_payments(
+    fmt: ExportFormat = Query("csv", alias="format"),
+    date_from: Optional[date] = Query(None, description="PaymentDate >= date_from"),
+    date_to: Optional[date] = Query(None, description="PaymentDate <= date_to"),
+):
+    stmt = select(
+        ContractPayment.PaymentID.label("PaymentID"),
+        ContractPayment.ContractID.label("ContractID"),
+        ContractPayment.PaymentDate.label("PaymentDate"),
+        ContractPayment.PaymentMethod.label("PaymentMethod"),
+        ContractPayment.PaymentType.label("PaymentType"),
+        ContractPayment.Amount.label("Amount"),
+        ContractPayment.Notes.label("Notes"),
+    )
+    order_by = [ContractPayment.PaymentID]
+    if date_from is not None:
+        stmt = stmt.where(ContractPayment.PaymentDate >= date_from)
+    if date_to is not None:
+        stmt = stmt.where(ContractPayment.PaymentDate <= date_to)
+    if date_from is not None or date_to is not None:
+        # Index order of ix_contractpayment_paymentdate_id: rows stream without a sort of the range
+        order_by = [ContractPayment.PaymentDate, ContractPayment.PaymentID]
+    return export_response(stmt.order_by(*order_by), fmt, "payments")
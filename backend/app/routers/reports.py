@@ -0,0 +1,64 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from ..database import get_db
+from ..reports import MAX_REPORT_PERIODS, Granularity, PaymentDimension, RevenueDimension, period_count, run_report
+from ..serialization import json_response
+
+
+class ReportRow(BaseModel):
+    period: date  # first day of the day/week/month
+    branch_id: Optional[int] = None
+    payment_method: Optional[str] = None
+    amount: Decimal
+    count: int
+
+
+router = APIRouter(prefix="/reports", tags=["reports"])
+
+DEFAULT_REPORT_DAYS = 365
+
+
+def _range(date_from: Optional[date], date_to: Optional[date], granularity: Granularity):
+    date_to = date_to or date.today()
+    date_from = date_from or date_to - timedelta(days=DEFAULT_REPORT_DAYS)
+    if date_to < date_from:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="date_to must be on or after date_from")
+    # Bounds the rows returned and the report cache entries one request can create
+    limit = MAX_REPORT_PERIODS[granularity]
+    if period_count(date_from, date_to, granularity) > limit:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Range too long: at most {limit} {granularity} periods per request",
+        )
+    return date_from, date_to
+
+
+@router.get("/revenue", response_model=List[ReportRow])
+def revenue_report(
+    granularity: Granularity = Query("month"),
+    group_by: List[RevenueDimension] = Query([], description="Extra grouping besides the period"),
+    date_from: Optional[date] = Query(None, description="Contract StartDate >= date_from (widened to whole periods)"),
+    date_to: Optional[date] = Query(None, description="Contract StartDate <= date_to (widened to whole periods)"),
+    db: Session = Depends(get_db),
+):
+    # Sum of TotalAmount of non-canceled contracts by StartDate period
+    date_from, date_to = _range(date_from, date_to, granularity)
+    return json_response(run_report(db, "revenue", granularity, group_by, date_from, date_to))
+
+
+@router.get("/payments", response_model=List[ReportRow])
+def payments_report(
+    granularity: Granularity = Query("month"),
+    group_by: List[PaymentDimension] = Query([], description="Extra grouping besides the period"),
+    date_from: Optional[date] = Query(None, description="PaymentDate >= date_from (widened to whole periods)"),
+    date_to: Optional[date] = Query(None, description="PaymentDate <= date_to (widened to whole periods)"),
+    db: Session = Depends(get_db),
+):
+    date_from, date_to = _range(date_from, date_to, granularity)
+    return json_response(run_report(db, "payments", granularity, group_by, date_from, date_to))
@@ -1,10 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Query
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
 
+from ..catalog import catalog, icontains
 from ..database import get_db
+from ..db_errors import FOREIGN_KEY_VIOLATION, UNIQUE_VIOLATION, integrity_code
 from ..models import Role
+from ..pagination import PageParams, page_params
 from pydantic import BaseModel
 
 
@@ -30,77 +35,91 @@ class RoleOut(RoleBase):
         from_attributes = True
 
 
+def _role_out(x: Role) -> RoleOut:
+    # map model attributes to the snake_case fields expected by frontend
+    return RoleOut(role_id=x.RoleID, role_name=x.RoleName)
+
+
+def _write_role(db: Session, stmt) -> Optional[Role]:
+    # uq_role_rolename rejects duplicates in the same round trip (no check-then-write race)
+    try:
+        return db.execute(stmt).scalar_one_or_none()
+    except IntegrityError as exc:
+        db.rollback()
+        if integrity_code(exc) == UNIQUE_VIOLATION:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Role name already exists")
+        raise
+
+
+catalog.register("roles", "role_id", lambda db: [_role_out(x) for x in db.query(Role)])
+
 router = APIRouter(prefix="/roles", tags=["roles"])
 
 
 @router.get("/", response_model=List[RoleOut])
 def list_roles(
-    skip: int = 0,
-    limit: int = 50,
+    response: Response,
+    page: PageParams = Depends(page_params),
     search: Optional[str] = Query(None, description="Filter by role name (icontains)"),
-    db: Session = Depends(get_db),
 ):
-    query = db.query(Role)
-    if search:
-        query = query.filter(Role.role_name.ilike(f"%{search}%"))
-    roles = query.order_by(Role.role_id).offset(skip).limit(limit).all()
-    return roles
+    # Served from the in-process catalog snapshot (app.catalog)
+    match = (lambda x: icontains(x.role_name, search)) if search else None
+    rows, headers = catalog.page("roles", page, match)
+    response.headers.update(headers)
+    return rows
 
 
 @router.get("/{role_id}", response_model=RoleOut)
 def get_role(role_id: int, db: Session = Depends(get_db)):
-    role = db.query(Role).filter(Role.role_id == role_id).first()
+    role = db.query(Role).filter(Role.RoleID == role_id).first()
     if not role:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Role not found")
-    return role
+    return _role_out(role)
 
 
 @router.post("/", response_model=RoleOut, status_code=status.HTTP_201_CREATED)
 def create_role(payload: RoleCreate, db: Session = Depends(get_db)):
-    # Optional uniqueness check by name
-    existing = db.query(Role).filter(Role.role_name == payload.role_name.strip()).first()
-    if existing:
-        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Role name already exists")
-
-    role = Role(role_name=payload.role_name.strip())
-    db.add(role)
+    role = _write_role(db, insert(Role).values(RoleName=payload.role_name.strip()).returning(Role))
+    # Build the response before commit expires the RETURNING row
+    out = _role_out(role)
     db.commit()
-    db.refresh(role)
-    return role
+    catalog.upsert("roles", out)
+    return out
 
 
 @router.put("/{role_id}", response_model=RoleOut)
 def update_role(role_id: int, payload: RoleUpdate, db: Session = Depends(get_db)):
-    role = db.query(Role).filter(Role.role_id == role_id).first()
-    if not role:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Role not found")
-
     if payload.role_name is not None:
-        new_name = payload.role_name.strip()
-        # Uniqueness check when changing name
-        exists = (
-            db.query(Role)
-            .filter(Role.role_name == new_name, Role.role_id != role_id)
-            .first()
+        stmt = (
+            update(Role)
+            .where(Role.RoleID == role_id)
+            .values(RoleName=payload.role_name.strip())
+            .returning(Role)
         )
-        if exists:
-            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Role name already exists")
-        role.role_name = new_name
-
-    # updated_at handled by model on update
-    db.add(role)
+    else:
+        stmt = select(Role).where(Role.RoleID == role_id)
+    role = _write_role(db, stmt)
+    if not role:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Role not found")
+    out = _role_out(role)
     db.commit()
-    db.refresh(role)
-    return role
+    catalog.upsert("roles", out)
+    return out
 
 
 @router.delete("/{role_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_role(role_id: int, db: Session = Depends(get_db)):
-    role = db.query(Role).filter(Role.role_id == role_id).first()
-    if not role:
+    try:
+        deleted = db.execute(
+            delete(Role).where(Role.RoleID == role_id).returning(Role.RoleID)
+        ).scalar_one_or_none()
+    except IntegrityError as exc:
+        db.rollback()
+        if integrity_code(exc) == FOREIGN_KEY_VIOLATION:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Role is assigned to users")
+        raise
+    if deleted is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Role not found")
-    db.delete(role)
     db.commit()
+    catalog.remove("roles", role_id)
     return None
-
-
@@ -0,0 +1,37 @@
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..database import get_async_db
+from ..search import MIN_QUERY_LENGTH, SearchKind, search_query
+from ..serialization import json_response
+
+
+class SearchHit(BaseModel):
+    kind: SearchKind
+    id: int
+    label: Optional[str] = None
+    detail: Optional[str] = None
+    score: float
+
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+
+@router.get("", response_model=List[SearchHit])
+async def search(
+    q: str = Query(..., description="Customer or employee name, phone, email, license plate or contract note"),
+    kinds: List[SearchKind] = Query([], alias="kind", description="Restrict to these kinds (repeatable)"),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+):
+    q = q.strip()
+    if len(q) < MIN_QUERY_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"q must have at least {MIN_QUERY_LENGTH} characters besides surrounding spaces",
+        )
+    rows = (await db.execute(search_query(q, kinds, limit))).mappings().all()
+    return json_response([{**row, "score": round(float(row["score"]), 3)} for row in rows])
@@ -0,0 +1,41 @@
+from fastapi import APIRouter, Depends, Query, Response
+from typing import List, Optional
+
+from ..catalog import catalog, icontains
+from ..models import Surcharge
+from ..pagination import PageParams, page_params
+from pydantic import BaseModel
+
+
+class SurchargeOut(BaseModel):
+    surcharge_id: int
+    surcharge_name: Optional[str] = None
+    unit_price: Optional[float] = None
+    description: Optional[str] = None
+
+
+def _surcharge_out(s: Surcharge) -> SurchargeOut:
+    return SurchargeOut(
+        surcharge_id=s.SurchargeID,
+        surcharge_name=s.SurchargeName,
+        unit_price=float(s.UnitPrice) if s.UnitPrice is not None else None,
+        description=s.Description,
+    )
+
+
+catalog.register("surcharges", "surcharge_id", lambda db: [_surcharge_out(s) for s in db.query(Surcharge)])
+
+router = APIRouter(prefix="/surcharges", tags=["surcharges"])
+
+
+@router.get("/", response_model=List[SurchargeOut])
+def list_surcharges(
+    response: Response,
+    page: PageParams = Depends(page_params),
+    search: Optional[str] = Query(None, description="Filter by surcharge name (icontains)"),
+):
+    # Served from the in-process catalog snapshot (app.catalog)
+    match = (lambda s: icontains(s.surcharge_name, search)) if search else None
+    rows, headers = catalog.page("surcharges", page, match)
+    response.headers.update(headers)
+    return rows
@@ -1,10 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+import base64
+import hashlib
+import secrets
+
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Query
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
 
 from ..database import get_db
-from ..models import UserAccount, Role
+from ..db_errors import FOREIGN_KEY_VIOLATION, UNIQUE_VIOLATION, integrity_code
+from ..models import UserAccount
+from ..pagination import Keyset, PageParams, estimate_total, page_params
 from pydantic import BaseModel
 
 
@@ -35,97 +43,111 @@ class UserOut(BaseModel):
         from_attributes = True
 
 
+PASSWORD_HASH_ITERATIONS = 200_000
+
+
+def hash_password(password: str) -> str:
+    # pbkdf2_sha256$<iterations>$<salt>$<digest>, fits UserAccount.PasswordHash (100 chars)
+    salt = secrets.token_hex(8)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt.encode(), PASSWORD_HASH_ITERATIONS)
+    digest = base64.b64encode(digest).decode()
+    return f"pbkdf2_sha256${PASSWORD_HASH_ITERATIONS}${salt}${digest}"
+
+
+def _user_out(u: UserAccount) -> UserOut:
+    # map model attributes to the snake_case fields expected by frontend
+    return UserOut(user_id=u.UserID, role_id=u.RoleID, username=u.Username)
+
+
+def _user_values(payload: BaseModel) -> dict:
+    data = payload.model_dump(exclude_none=True)
+    values = {}
+    if "role_id" in data:
+        values["RoleID"] = data["role_id"]
+    if "username" in data:
+        values["Username"] = data["username"].strip()
+    if "password" in data:
+        values["PasswordHash"] = hash_password(data["password"])
+    return values
+
+
+def _write_user(db: Session, stmt) -> Optional[UserAccount]:
+    # uq_useraccount_username and the role foreign key are checked by the write itself
+    try:
+        return db.execute(stmt).scalar_one_or_none()
+    except IntegrityError as exc:
+        db.rollback()
+        code = integrity_code(exc)
+        if code == UNIQUE_VIOLATION:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Username already exists")
+        if code == FOREIGN_KEY_VIOLATION:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Role does not exist")
+        raise
+
+
+_USER_KEYSET = Keyset(UserAccount.UserID)
+
 router = APIRouter(prefix="/users", tags=["users"])
 
 
 @router.get("/", response_model=List[UserOut])
 def list_users(
-    skip: int = 0,
-    limit: int = 50,
+    response: Response,
+    page: PageParams = Depends(page_params),
     search: Optional[str] = Query(None, description="Filter by username (icontains)"),
     role_id: Optional[int] = Query(None, description="Filter by role_id"),
     db: Session = Depends(get_db),
 ):
     query = db.query(UserAccount)
     if search:
-        query = query.filter(UserAccount.username.ilike(f"%{search}%"))
+        query = query.filter(UserAccount.Username.ilike(f"%{search}%"))
     if role_id is not None:
-        query = query.filter(UserAccount.role_id == role_id)
-    users = query.order_by(UserAccount.user_id).offset(skip).limit(limit).all()
-    return users
+        query = query.filter(UserAccount.RoleID == role_id)
+    if page.with_total:
+        response.headers.update(estimate_total(db, query))
+    users, headers = _USER_KEYSET.page(_USER_KEYSET.apply(query, page).all(), page)
+    response.headers.update(headers)
+    return [_user_out(u) for u in users]
 
 
 @router.get("/{user_id}", response_model=UserOut)
 def get_user(user_id: int, db: Session = Depends(get_db)):
-    user = db.query(UserAccount).filter(UserAccount.user_id == user_id).first()
+    user = db.query(UserAccount).filter(UserAccount.UserID == user_id).first()
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-    return user
+    return _user_out(user)
 
 
 @router.post("/", response_model=UserOut, status_code=status.HTTP_201_CREATED)
 def create_user(payload: UserCreate, db: Session = Depends(get_db)):
-    # ensure role exists
-    role = db.query(Role).filter(Role.role_id == payload.role_id).first()
-    if not role:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Role does not exist")
-
-    # uniqueness check
-    existing = db.query(UserAccount).filter(UserAccount.username == payload.username.strip()).first()
-    if existing:
-        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Username already exists")
-
-    user = UserAccount(
-        role_id=payload.role_id,
-        username=payload.username.strip(),
-        password=payload.password,
-    )
-    db.add(user)
+    user = _write_user(db, insert(UserAccount).values(**_user_values(payload)).returning(UserAccount))
+    # Build the response before commit expires the RETURNING row
+    out = _user_out(user)
     db.commit()
-    db.refresh(user)
-    return user
+    return out
 
 
 @router.put("/{user_id}", response_model=UserOut)
 def update_user(user_id: int, payload: UserUpdate, db: Session = Depends(get_db)):
-    user = db.query(UserAccount).filter(UserAccount.user_id == user_id).first()
+    values = _user_values(payload)
+    if values:
+        stmt = update(UserAccount).where(UserAccount.UserID == user_id).values(**values).returning(UserAccount)
+    else:
+        stmt = select(UserAccount).where(UserAccount.UserID == user_id)
+    user = _write_user(db, stmt)
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-
-    if payload.role_id is not None:
-        # ensure role exists
-        role = db.query(Role).filter(Role.role_id == payload.role_id).first()
-        if not role:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Role does not exist")
-        user.role_id = payload.role_id
-
-    if payload.username is not None:
-        new_username = payload.username.strip()
-        exists = (
-            db.query(UserAccount)
-            .filter(UserAccount.username == new_username, UserAccount.user_id != user_id)
-            .first()
-        )
-        if exists:
-            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Username already exists")
-        user.username = new_username
-
-    if payload.password is not None:
-        user.password = payload.password
-
-    db.add(user)
+    out = _user_out(user)
     db.commit()
-    db.refresh(user)
-    return user
+    return out
 
 
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_user(user_id: int, db: Session = Depends(get_db)):
-    user = db.query(UserAccount).filter(UserAccount.user_id == user_id).first()
-    if not user:
+    deleted = db.execute(
+        delete(UserAccount).where(UserAccount.UserID == user_id).returning(UserAccount.UserID)
+    ).scalar_one_or_none()
+    if deleted is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-    db.delete(user)
     db.commit()
     return None
-
-
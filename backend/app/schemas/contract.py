@@ -1,8 +1,8 @@
-from datetime import date
+from datetime import date, datetime
 from decimal import Decimal
 from typing import Optional, List
 
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 
 
 class ContractBase(BaseModel):
@@ -81,3 +81,76 @@ class ContractRead(BaseModel):
     model_config = ConfigDict(populate_by_name=True, from_attributes=True)
 
 
+class ContractBalance(BaseModel):
+    id: int = Field(..., alias="ContractID")
+    customer_id: Optional[int] = Field(None, alias="CustomerID")
+    status: Optional[str] = Field(None, alias="Status")
+    total_amount: Optional[Decimal] = Field(None, alias="TotalAmount")
+    paid_amount: Decimal = Field(..., alias="PaidAmount")
+    balance_due: Decimal = Field(..., alias="BalanceDue")
+
+    model_config = ConfigDict(populate_by_name=True)
+
+
+class ContractBulkItemResult(BaseModel):
+    index: int
+    ok: bool
+    contract_id: Optional[int] = Field(None, alias="ContractID")
+    error: Optional[str] = None
+
+    model_config = ConfigDict(populate_by_name=True)
+
+
+class QuoteSurchargeItem(BaseModel):
+    surcharge_id: int = Field(..., alias="SurchargeID")
+    quantity: int = Field(1, ge=1, alias="Quantity")
+
+    model_config = ConfigDict(populate_by_name=True)
+
+
+class ContractQuoteIn(BaseModel):
+    start_time: datetime = Field(..., alias="StartTime")
+    end_time: datetime = Field(..., alias="EndTime")
+    car_ids: List[int] = Field(..., min_length=1, alias="CarIDs")
+    surcharges: List[QuoteSurchargeItem] = Field(default_factory=list, alias="Surcharges")
+
+    model_config = ConfigDict(populate_by_name=True)
+
+    @model_validator(mode="after")
+    def _same_timezone_kind(self):
+        # An aware and a naive time cannot be compared (422 instead of a TypeError while pricing)
+        if (self.start_time.tzinfo is None) != (self.end_time.tzinfo is None):
+            raise ValueError("StartTime và EndTime phải cùng có hoặc cùng không có múi giờ")
+        return self
+
+
+class QuoteCarLine(BaseModel):
+    car_id: int = Field(..., alias="CarID")
+    daily_rate: Optional[Decimal] = Field(None, alias="DailyRate")
+    hourly_rate: Optional[Decimal] = Field(None, alias="HourlyRate")
+    amount: Decimal = Field(..., alias="Amount")
+
+    model_config = ConfigDict(populate_by_name=True)
+
+
+class QuoteSurchargeLine(BaseModel):
+    surcharge_id: int = Field(..., alias="SurchargeID")
+    unit_price: Decimal = Field(..., alias="UnitPrice")
+    quantity: int = Field(..., alias="Quantity")
+    amount: Decimal = Field(..., alias="Amount")
+
+    model_config = ConfigDict(populate_by_name=True)
+
+
+class ContractQuote(BaseModel):
+    index: int
+    ok: bool
+    error: Optional[str] = None
+    hours: Optional[int] = Field(None, alias="Hours")
+    cars: List[QuoteCarLine] = Field(default_factory=list, alias="Cars")
+    surcharges: List[QuoteSurchargeLine] = Field(default_factory=list, alias="Surcharges")
+    cars_amount: Optional[Decimal] = Field(None, alias="CarsAmount")
+    surcharges_amount: Optional[Decimal] = Field(None, alias="SurchargesAmount")
+    total_amount: Optional[Decimal] = Field(None, alias="TotalAmount")
+
+    model_config = ConfigDict(populate_by_name=True)
@@ -0,0 +1,83 @@
+from typing import Iterable, Literal, Sequence
+
+from sqlalchemy import Select, func, literal_column, select, union_all
+
+from .models import Car, Contract, Customer, Employee
+from .normalize import phone_text
+
+
+SearchKind = Literal["customer", "employee", "car", "contract"]
+SEARCH_KINDS = ("customer", "employee", "car", "contract")
+# Trigrams need at least 3 characters to narrow the index scan
+MIN_QUERY_LENGTH = 3
+
+
+def _like_pattern(q: str) -> str:
+    escaped = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def _score(columns: Sequence, q: str):
+    return func.greatest(*(func.coalesce(func.similarity(c, q), 0) for c in columns))
+
+
+def _hits(kind: str, id_col, label, detail, columns: Sequence, q: str, limit: int, *where) -> list:
+    # Per column: `%` (similarity above pg_trgm.similarity_threshold) catches typos, ILIKE
+    # catches substrings of long values (e.g. part of a phone number). Each branch is a
+    # KNN scan of the column's *_gist index (ORDER BY col <-> q) that stops after `limit` rows.
+    score = _score(columns, q)
+    pattern = _like_pattern(q)
+    return [
+        select(
+            literal_column(f"'{kind}'").label("kind"),
+            id_col.label("id"),
+            label.label("label"),
+            detail.label("detail"),
+            score.label("score"),
+        )
+        .where(match, *where)
+        .order_by(column.op("<->")(q))
+        .limit(limit)
+        for column in columns
+        for match in (column.op("%")(q), column.ilike(pattern, escape="\\"))
+    ]
+
+
+def search_query(q: str, kinds: Iterable[str] = SEARCH_KINDS, limit: int = 20) -> Select:
+    # One statement: the branch hits are merged, a row matched by several branches is kept once
+    kinds = set(kinds) or set(SEARCH_KINDS)
+    parts = []
+    if "customer" in kinds:
+        parts += _hits(
+            "customer",
+            Customer.CustomerID,
+            Customer.FullName,
+            func.coalesce(phone_text(Customer.Phone), Customer.Email),
+            (Customer.FullName, phone_text(Customer.Phone), Customer.Email),
+            q,
+            limit,
+            Customer.IsDeleted.is_not(True),
+        )
+    if "employee" in kinds:
+        parts += _hits(
+            "employee",
+            Employee.EmployeeID,
+            Employee.FullName,
+            func.coalesce(phone_text(Employee.Phone), Employee.Email),
+            (Employee.FullName, phone_text(Employee.Phone), Employee.Email),
+            q,
+            limit,
+            Employee.IsDeleted.is_not(True),
+        )
+    if "car" in kinds:
+        parts += _hits("car", Car.CarID, Car.LicensePlate, Car.Status, (Car.LicensePlate,), q, limit)
+    if "contract" in kinds:
+        parts += _hits("contract", Contract.ContractID, Contract.Notes, Contract.Status, (Contract.Notes,), q, limit)
+    merged = union_all(*parts).subquery("hits")
+    hits = (
+        select(merged.c.kind, merged.c.id, merged.c.label, merged.c.detail, merged.c.score)
+        .distinct(merged.c.kind, merged.c.id)
+        .order_by(merged.c.kind, merged.c.id)
+        .subquery("unique_hits")
+    )
+    return select(hits).order_by(hits.c.score.desc(), hits.c.kind, hits.c.id).limit(limit)
@@ -0,0 +1,21 @@
+from typing import Any, Mapping, Optional
+
+from fastapi import Response
+from pydantic_core import to_json
+
+
+def json_response(
+    content: Any,
+    status_code: int = 200,
+    headers: Optional[Mapping[str, str]] = None,
+) -> Response:
+    # Encode plain dict/list rows straight to JSON bytes with pydantic-core's encoder
+    # (Decimal -> "1.00", date -> ISO string, same as response_model output). Returning a
+    # Response makes FastAPI skip its response_model validation + serialization pass, so
+    # rows must already be keyed by the response model's aliases.
+    return Response(
+        content=to_json(content),
+        status_code=status_code,
+        headers=headers,
+        media_type="application/json",
+    )
@@ -0,0 +1,48 @@
+"""Compare requests/s and p99 latency of the sync and async router paths.
+
+Start two servers against the same local Postgres (same DATABASE_URL):
+  - baseline: a checkout of the last sync-router revision, e.g.
+        git worktree add /tmp/hoa-sync <sync-commit> && cd /tmp/hoa-sync/backend
+        uvicorn app.main:app --port 8001 --workers 1
+  - candidate: this tree
+        uvicorn app.main:app --port 8000 --workers 1
+then run:
+    python -m bench.async_vs_sync --sync-url http://127.0.0.1:8001 --async-url http://127.0.0.1:8000
+"""
+
+import argparse
+import json
+
+from .loadgen import run_load
+
+
+DEFAULT_PATHS = ["/contracts?limit=50", "/contracts/1", "/cars/?limit=100", "/cars/1"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sync-url", default="http://127.0.0.1:8001")
+    parser.add_argument("--async-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--paths", nargs="+", default=DEFAULT_PATHS)
+    parser.add_argument("-c", "--concurrency", type=int, default=64)
+    parser.add_argument("-d", "--duration", type=float, default=15.0)
+    parser.add_argument("-o", "--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = []
+    for path in args.paths:
+        sync = run_load(args.sync_url, path, args.concurrency, args.duration)
+        async_ = run_load(args.async_url, path, args.concurrency, args.duration)
+        results.append({"path": path, "sync": sync, "async": async_})
+        print(
+            f"{path:<28} sync {sync['rps'] or 0:>8.1f} rps p99 {sync['p99_ms'] or 0:>8.1f} ms | "
+            f"async {async_['rps'] or 0:>8.1f} rps p99 {async_['p99_ms'] or 0:>8.1f} ms"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
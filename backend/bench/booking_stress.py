@@ -0,0 +1,69 @@
+"""Fire parallel bookings at the same car and report outcome counts and throughput.
+
+Run against a live server, e.g.:
+    python -m bench.booking_stress --base-url http://127.0.0.1:8000 --car-id 1 --customer-id 1 -c 32 -n 200
+
+Exactly one request should get 201; all others must get 409 (car rented / locked).
+"""
+
+import argparse
+import json
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _book(base_url: str, customer_id: int, car_id: int) -> int:
+    body = json.dumps({"CustomerID": customer_id, "Cars": [{"CarID": car_id}]}).encode()
+    req = urllib.request.Request(
+        f"{base_url.rstrip('/')}/contracts",
+        data=body,
+        method="POST",
+        headers={"Content-Type": "application/json"},
+    )
+    try:
+        with urllib.request.urlopen(req, timeout=30) as resp:
+            return resp.status
+    except urllib.error.HTTPError as exc:
+        return exc.code
+    except urllib.error.URLError:
+        return -1
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--car-id", type=int, required=True)
+    parser.add_argument("--customer-id", type=int, required=True)
+    parser.add_argument("-c", "--concurrency", type=int, default=16)
+    parser.add_argument("-n", "--requests", type=int, default=100)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        codes = list(
+            pool.map(
+                lambda _: _book(args.base_url, args.customer_id, args.car_id),
+                range(args.requests),
+            )
+        )
+    elapsed = time.perf_counter() - started
+
+    counts = Counter(codes)
+    print(json.dumps(
+        {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "elapsed_s": round(elapsed, 3),
+            "throughput_rps": round(args.requests / elapsed, 1) if elapsed else None,
+            "status_counts": {str(k): v for k, v in sorted(counts.items())},
+            "double_booked": counts.get(201, 0) > 1,
+        },
+        indent=2,
+    ))
+
+
+if __name__ == "__main__":
+    main()
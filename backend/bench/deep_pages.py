@@ -0,0 +1,71 @@
+"""Page latency by depth: OFFSET/LIMIT vs the shared Keyset paginator (app.pagination).
+
+Runs against DATABASE_URL directly (no server); use a database with enough rows
+to make deep pages meaningful:
+    python -m bench.deep_pages --table contract --depths 0 1000 10000 100000 1000000
+"""
+
+import argparse
+import json
+import time
+
+from sqlalchemy import select
+
+from app.database import SessionLocal
+from app.models import Branch, Car, Contract, Customer
+from app.pagination import Keyset, PageParams, encode_cursor
+
+
+TABLES = {
+    "contract": Contract.ContractID,
+    "car": Car.CarID,
+    "customer": Customer.CustomerID,
+    "branch": Branch.BranchID,
+}
+
+
+def _best_ms(db, stmt, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        db.execute(stmt).all()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--table", choices=sorted(TABLES), default="contract")
+    parser.add_argument("--depths", type=int, nargs="+", default=[0, 1_000, 10_000, 100_000])
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("-o", "--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    key = TABLES[args.table]
+    keyset = Keyset(key)
+    query = select(key.class_)
+    results = []
+    with SessionLocal() as db:
+        for depth in args.depths:
+            offset_ms = _best_ms(db, query.order_by(key).offset(depth).limit(args.limit), args.repeat)
+            # Cursor a client would hold after reading `depth` rows (lookup not timed)
+            cursor = None
+            if depth:
+                last = db.execute(select(key).order_by(key).offset(depth - 1).limit(1)).scalar()
+                if last is None:
+                    print(f"depth {depth}: table has fewer rows, stopping")
+                    break
+                cursor = encode_cursor(last)
+            page = PageParams(limit=args.limit, cursor=cursor, with_total=False)
+            keyset_ms = _best_ms(db, keyset.apply(query, page), args.repeat)
+            results.append({"depth": depth, "offset_ms": round(offset_ms, 3), "keyset_ms": round(keyset_ms, 3)})
+            print(f"{args.table:<9} depth {depth:>9}  offset {offset_ms:9.2f} ms  keyset {keyset_ms:9.2f} ms")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
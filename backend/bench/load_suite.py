@@ -0,0 +1,197 @@
+"""Drive every router of a running server and report throughput and p50/p95/p99 per endpoint.
+
+Seed a scratch Postgres first (python -m bench.seed_fleet), start the server against
+it, then run from backend/ with the same DATABASE_URL (used only to read id ranges):
+    python -m bench.load_suite --base-url http://127.0.0.1:8000 -c 8 32 -d 10 -o run.json
+Compare two runs:
+    python -m bench.load_suite --compare before.json after.json
+"""
+
+import argparse
+import json
+import random
+import subprocess
+import sys
+import time
+from datetime import date, timedelta
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import func, select
+
+from app.database import SessionLocal
+from app.models import Car, Contract, Customer
+
+from .loadgen import run_load
+
+
+class Scenario(NamedTuple):
+    name: str
+    next_path: Callable[[], str]
+    method: str = "GET"
+    body: Optional[bytes] = None
+    write: bool = False
+
+
+def _id_ranges() -> Dict[str, tuple]:
+    with SessionLocal() as db:
+        return {
+            name: tuple(db.execute(select(func.min(column), func.max(column))).one())
+            for name, column in (("car", Car.CarID), ("customer", Customer.CustomerID), ("contract", Contract.ContractID))
+        }
+
+
+def _quote_body(cars: tuple, candidates: int) -> bytes:
+    start = date.today() + timedelta(days=7)
+    return json.dumps([
+        {
+            "StartTime": f"{start}T09:00:00",
+            "EndTime": f"{start + timedelta(days=1 + i % 5)}T{8 + i % 10:02d}:00:00",
+            "CarIDs": [random.randint(*cars)],
+        }
+        for i in range(candidates)
+    ]).encode()
+
+
+def scenarios(ranges: Dict[str, tuple]) -> List[Scenario]:
+    def rand(kind: str) -> int:
+        return random.randint(*ranges[kind])
+
+    def availability() -> str:
+        start = date.today() + timedelta(days=random.randint(0, 60))
+        return f"/cars/availability?start={start}&end={start + timedelta(days=3)}&limit=50"
+
+    fixed = lambda path: lambda: path  # noqa: E731
+    return [
+        Scenario("GET /contracts", fixed("/contracts?limit=50")),
+        Scenario("GET /contracts (status, start_date)", fixed("/contracts?status=Active&order_by=start_date&limit=50")),
+        Scenario("GET /contracts/{id}", lambda: f"/contracts/{rand('contract')}"),
+        Scenario("GET /contracts/{id}/balance", lambda: f"/contracts/{rand('contract')}/balance"),
+        Scenario("GET /contracts/outstanding", fixed("/contracts/outstanding?limit=50")),
+        Scenario("POST /contracts/quote (100)", fixed("/contracts/quote"), "POST", _quote_body(ranges["car"], 100)),
+        Scenario("GET /cars/", fixed("/cars/?limit=100")),
+        Scenario("GET /cars/{id}", lambda: f"/cars/{rand('car')}"),
+        Scenario("GET /cars/availability", availability),
+        Scenario("GET /vehicles/", fixed("/vehicles/?limit=100")),
+        Scenario("GET /customers/", fixed("/customers/?limit=50")),
+        Scenario("GET /customers/{id}", lambda: f"/customers/{rand('customer')}"),
+        Scenario("GET /customers/by-phone", lambda: f"/customers/by-phone?phone=09{rand('customer') % 100000000:08d}"),
+        Scenario("GET /search", lambda: f"/search?q=Customer%20{rand('customer')}"),
+        Scenario("GET /branches/", fixed("/branches/")),
+        Scenario("GET /car-types/", fixed("/car-types/")),
+        Scenario("GET /car-brands/", fixed("/car-brands/")),
+        Scenario("GET /roles/", fixed("/roles/")),
+        Scenario("GET /surcharges/", fixed("/surcharges/")),
+        Scenario("GET /users/", fixed("/users/")),
+        Scenario("GET /fleet/summary", fixed("/fleet/summary")),
+        Scenario("GET /reports/revenue", fixed("/reports/revenue?granularity=month&group_by=branch")),
+        Scenario("GET /reports/payments", fixed("/reports/payments?granularity=week&group_by=method")),
+        Scenario(
+            "POST /contracts/{id}/payments",
+            lambda: f"/contracts/{rand('contract')}/payments?amount=1000&method=Cash",
+            "POST",
+            write=True,
+        ),
+        Scenario(
+            "POST /customers/",
+            fixed("/customers/"),
+            "POST",
+            json.dumps({"full_name": "Load test"}).encode(),
+            write=True,
+        ),
+    ]
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(before_path: str, after_path: str) -> None:
+    with open(before_path, encoding="utf-8") as f:
+        before = {(r["name"], r["concurrency"]): r for r in json.load(f)["results"]}
+    with open(after_path, encoding="utf-8") as f:
+        after = json.load(f)["results"]
+
+    def change(old, new) -> str:
+        if not old or new is None:
+            return "     n/a"
+        return f"{(new - old) / old * 100:>+7.1f}%"
+
+    print(f"{'endpoint':<40} {'c':>4} {'rps':>9} {'Δrps':>8} {'p99 ms':>9} {'Δp99':>8}")
+    for r in after:
+        old = before.get((r["name"], r["concurrency"]))
+        if old is None:
+            continue
+        print(
+            f"{r['name']:<40} {r['concurrency']:>4} {r['rps'] or 0:>9.1f} {change(old['rps'], r['rps'])} "
+            f"{r['p99_ms'] or 0:>9.1f} {change(old['p99_ms'], r['p99_ms'])}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("-c", "--concurrency", type=int, nargs="+", default=[8, 32])
+    parser.add_argument("-d", "--duration", type=float, default=10.0, help="Seconds per endpoint and concurrency")
+    parser.add_argument("--only", nargs="+", help="Run endpoints whose name contains one of these strings")
+    parser.add_argument("--writes", action="store_true", help="Also run the write endpoints (adds rows)")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed for the generated ids")
+    parser.add_argument("-o", "--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="Compare two result files and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    random.seed(args.seed)
+    ranges = _id_ranges()
+    if any(lo is None for lo, _ in ranges.values()):
+        sys.exit("no cars/customers/contracts in DATABASE_URL: run python -m bench.seed_fleet first")
+    selected = [
+        s for s in scenarios(ranges)
+        if (args.writes or not s.write) and (not args.only or any(o in s.name for o in args.only))
+    ]
+
+    started_at = time.strftime("%Y-%m-%dT%H:%M:%S%z")
+    results = []
+    print(f"{'endpoint':<40} {'c':>4} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}  status")
+    for concurrency in args.concurrency:
+        for s in selected:
+            headers = {"Content-Type": "application/json"} if s.body else None
+            r = run_load(
+                args.base_url, s.name, concurrency, args.duration, s.method, s.body, headers, next_path=s.next_path
+            )
+            r["name"] = r.pop("path")
+            results.append(r)
+            print(
+                f"{s.name:<40} {concurrency:>4} {r['rps'] or 0:>9.1f} {r['p50_ms'] or 0:>9.1f} "
+                f"{r['p95_ms'] or 0:>9.1f} {r['p99_ms'] or 0:>9.1f}  {r['status_counts']}"
+            )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "meta": {
+                        "started_at": started_at,
+                        "base_url": args.base_url,
+                        "duration_s": args.duration,
+                        "concurrency": args.concurrency,
+                        "git_revision": _git_revision(),
+                        "id_ranges": ranges,
+                        "seed": args.seed,
+                    },
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Minimal closed-loop HTTP load generator (stdlib only)."""
+
+import http.client
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+
+def percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    k = max(0, min(len(sorted_values) - 1, int(round(pct / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[k]
+
+
+def run_load(
+    base_url: str,
+    path: str,
+    concurrency: int = 16,
+    duration_s: float = 10.0,
+    method: str = "GET",
+    body: Optional[bytes] = None,
+    headers: Optional[Dict[str, str]] = None,
+    next_path: Optional[Callable[[], str]] = None,
+) -> dict:
+    # Each worker keeps one keep-alive connection and issues requests back to back;
+    # next_path (e.g. random ids) replaces the fixed path for every request
+    parts = urlsplit(base_url)
+    conn_cls = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+    prefix = parts.path.rstrip("/")
+    deadline = time.perf_counter() + duration_s
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    lock = threading.Lock()
+
+    def worker() -> None:
+        conn = conn_cls(parts.hostname, parts.port, timeout=30)
+        local_lat: List[float] = []
+        local_status: Counter = Counter()
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                conn.request(method, prefix + (next_path() if next_path else path), body=body, headers=headers or {})
+                resp = conn.getresponse()
+                resp.read()
+                local_status[resp.status] += 1
+            except (OSError, http.client.HTTPException):
+                local_status["error"] += 1
+                conn.close()
+                conn = conn_cls(parts.hostname, parts.port, timeout=30)
+                continue
+            local_lat.append(time.perf_counter() - started)
+        conn.close()
+        with lock:
+            latencies.extend(local_lat)
+            statuses.update(local_status)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    ms = lambda v: round(v * 1000, 2) if v is not None else None  # noqa: E731
+    return {
+        "path": path,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "elapsed_s": round(elapsed, 3),
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "status_counts": {str(k): v for k, v in statuses.items()},
+    }
@@ -0,0 +1,186 @@
+"""Seed DATABASE_URL (Postgres) with synthetic fleet data at realistic volumes.
+
+Rows are generated server-side with INSERT ... SELECT generate_series, in chunks of
+--chunk rows per transaction, and appended after the current max ids, so a seeded
+database can be grown in steps. Afterwards the id sequences, the fleet aggregates
+and the planner statistics are brought up to date.
+    python -m bench.seed_fleet --cars 10000 --customers 500000 --contracts 2000000
+Use a scratch database: the rows are not tagged and are not removed.
+"""
+
+import argparse
+import time
+
+from sqlalchemy import text
+
+from app import fleet
+from app.database import Base, SessionLocal, engine
+import app.models  # noqa: F401  (registers the tables for the sequence reset)
+
+
+CAR_STATUSES = "ARRAY['Ready', 'Ready', 'Ready', 'Rented', 'Maintenance']"
+
+# :lo/:hi are the generated ids (offset already applied); other params per table
+STATEMENTS = {
+    "branch": """
+        INSERT INTO branch (branchid, branchname, address, phone)
+        SELECT g, 'Bench branch ' || g || ' ' || :tag, 'Street ' || g, '028' || lpad(g::text, 8, '0')
+        FROM generate_series(:lo, :hi) g
+    """,
+    "car": f"""
+        INSERT INTO car (carid, licenseplate, dailyrate, hourlyrate, status, ownerbranchid)
+        SELECT g, 'BX' || :tag || '-' || g,
+               (300 + (random() * 17)::int * 100) * 1000,
+               (40 + (random() * 16)::int * 5) * 1000,
+               ({CAR_STATUSES})[1 + (random() * 4)::int],
+               :branch_lo + (g % :branches)
+        FROM generate_series(:lo, :hi) g
+    """,
+    "customer": """
+        INSERT INTO customer (customerid, fullname, phone, email, address, citizenid)
+        SELECT g, 'Customer ' || g, '09' || lpad((g % 100000000)::text, 8, '0'),
+               'customer' || g || '@example.com', 'Address ' || g, lpad(g::text, 12, '0')
+        FROM generate_series(:lo, :hi) g
+    """,
+    # Start dates over the last --years years; old contracts are mostly completed,
+    # 5% canceled, the ones still running Active. PaidAmount matches the payments
+    # inserted below (30% deposit, the rest once completed), so no ledger pass is needed
+    "contract": """
+        INSERT INTO contract (contractid, customerid, startdate, enddate, totalamount, status, notes, paidamount)
+        SELECT g, customerid, s, s + d, total, status, notes,
+               CASE status WHEN 'Completed' THEN total WHEN 'Active' THEN round(total * 0.3, 2) ELSE 0 END
+        FROM (
+            SELECT g, s, d, :customer_lo + (hashint % :customers) AS customerid,
+                   (d + 1) * (300 + (hashint % 17) * 100) * 1000 AS total,
+                   CASE WHEN hashint % 20 = 0 THEN 'Canceled'
+                        WHEN s + d < CURRENT_DATE THEN 'Completed'
+                        ELSE 'Active' END AS status,
+                   CASE WHEN hashint % 10 = 0 THEN 'note ' || g END AS notes
+            FROM (
+                SELECT g, abs(hashint4(g)::bigint) AS hashint,
+                       CURRENT_DATE - (random() * :days)::int AS s, 1 + (random() * 13)::int AS d
+                FROM generate_series(:lo, :hi) g
+            ) x
+        ) y
+    """,
+    # One car per contract, a second one for every tenth
+    "contractcar": """
+        INSERT INTO contractcar (contractid, carid, amount)
+        SELECT c.contractid, :car_lo + ((c.contractid * 7919 + k) % :cars), c.totalamount / (1 + (c.contractid % 10 = 0)::int)
+        FROM contract c, generate_series(0, 1) k
+        WHERE c.contractid BETWEEN :lo AND :hi AND (k = 0 OR c.contractid % 10 = 0)
+    """,
+    "contractsurcharge": """
+        INSERT INTO contractsurcharge (contractid, surchargeid, unitprice, quantity)
+        SELECT c.contractid, s.surchargeid, s.unitprice, 1 + c.contractid % 3
+        FROM contract c JOIN surcharge s ON s.surchargeid = (SELECT min(surchargeid) FROM surcharge) + c.contractid % 3
+        WHERE c.contractid BETWEEN :lo AND :hi AND c.contractid % 3 = 0
+    """,
+    # Deposit at start, the rest at the end for completed contracts
+    "contractpayment": """
+        INSERT INTO contractpayment (contractid, paymentdate, paymentmethod, paymenttype, amount)
+        SELECT c.contractid, CASE WHEN k = 0 THEN c.startdate ELSE c.enddate END,
+               (ARRAY['Cash', 'Card', 'Transfer'])[1 + c.contractid % 3],
+               1 + k,  -- PaymentType: 1 deposit, 2 final payment
+               CASE WHEN k = 0 THEN round(c.totalamount * 0.3, 2) ELSE c.totalamount - round(c.totalamount * 0.3, 2) END
+        FROM contract c, generate_series(0, 1) k
+        WHERE c.contractid BETWEEN :lo AND :hi AND c.status <> 'Canceled' AND (k = 0 OR c.status = 'Completed')
+    """,
+    "returnreceipt": """
+        INSERT INTO returnreceipt (contractid, returndate, notes)
+        SELECT contractid, enddate, 'bench'
+        FROM contract WHERE contractid BETWEEN :lo AND :hi AND status = 'Completed'
+    """,
+}
+
+def _max_id(conn, table: str, column: str) -> int:
+    return conn.execute(text(f"SELECT coalesce(max({column}), 0) FROM {table}")).scalar_one()
+
+
+def _chunks(lo: int, hi: int, size: int):
+    while lo <= hi:
+        yield lo, min(hi, lo + size - 1)
+        lo += size
+
+
+def _run(label: str, sql: str, lo: int, hi: int, chunk: int, **params) -> None:
+    started = time.perf_counter()
+    rows = 0
+    for a, b in _chunks(lo, hi, chunk):
+        with engine.begin() as conn:
+            rows += conn.execute(text(sql), {"lo": a, "hi": b, **params}).rowcount
+    print(f"{label:<20} {rows:>10} rows {time.perf_counter() - started:>8.1f} s")
+
+
+def reset_sequences() -> None:
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            pk = list(table.primary_key.columns)
+            if len(pk) != 1 or pk[0].type.python_type is not int:
+                continue
+            sequence = conn.execute(
+                text("SELECT pg_get_serial_sequence(:t, :c)"), {"t": table.name, "c": pk[0].name}
+            ).scalar_one()
+            if sequence:
+                conn.execute(
+                    text(f"SELECT setval(:s, (SELECT coalesce(max({pk[0].name}), 0) + 1 FROM {table.name}), false)"),
+                    {"s": sequence},
+                )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--branches", type=int, default=20)
+    parser.add_argument("--cars", type=int, default=10_000)
+    parser.add_argument("--customers", type=int, default=500_000)
+    parser.add_argument("--contracts", type=int, default=2_000_000)
+    parser.add_argument("--years", type=float, default=3.0, help="Spread of contract start dates")
+    parser.add_argument("--chunk", type=int, default=100_000, help="Rows per INSERT / transaction")
+    args = parser.parse_args()
+    if engine.dialect.name != "postgresql":
+        parser.error("Postgres only (generate_series, hashint4)")
+
+    with engine.connect() as conn:
+        branch_lo = _max_id(conn, "branch", "branchid") + 1
+        car_lo = _max_id(conn, "car", "carid") + 1
+        customer_lo = _max_id(conn, "customer", "customerid") + 1
+        contract_lo = _max_id(conn, "contract", "contractid") + 1
+        has_surcharges = _max_id(conn, "surcharge", "surchargeid") > 0
+    tag = f"{int(time.time()) % 100000:05d}"
+
+    with engine.begin() as conn:
+        if not has_surcharges:
+            conn.execute(text(
+                "INSERT INTO surcharge (surchargename, unitprice, description) VALUES "
+                "('Giao xe tận nơi', 200000, 'bench'), ('Ghế trẻ em', 100000, 'bench'), ('Vệ sinh', 150000, 'bench')"
+            ))
+
+    branch_hi = branch_lo + args.branches - 1
+    car_hi = car_lo + args.cars - 1
+    customer_hi = customer_lo + args.customers - 1
+    contract_hi = contract_lo + args.contracts - 1
+    _run("branch", STATEMENTS["branch"], branch_lo, branch_hi, args.chunk, tag=tag)
+    _run("car", STATEMENTS["car"], car_lo, car_hi, args.chunk, tag=tag, branch_lo=branch_lo, branches=args.branches)
+    _run("customer", STATEMENTS["customer"], customer_lo, customer_hi, args.chunk)
+    _run(
+        "contract", STATEMENTS["contract"], contract_lo, contract_hi, args.chunk,
+        customer_lo=customer_lo, customers=args.customers, days=int(args.years * 365),
+    )
+    for table in ("contractcar", "contractsurcharge", "contractpayment", "returnreceipt"):
+        _run(table, STATEMENTS[table], contract_lo, contract_hi, args.chunk, car_lo=car_lo, cars=args.cars)
+
+    started = time.perf_counter()
+    reset_sequences()
+    with SessionLocal() as db:
+        fleet.rebuild(db)
+        db.commit()
+    with engine.connect() as conn:
+        conn.execution_options(isolation_level="AUTOCOMMIT").execute(text("ANALYZE"))
+    print(f"{'sequences/fleet/analyze':<20} {'':>10}      {time.perf_counter() - started:>8.1f} s")
+    print(
+        f"ids: car {car_lo}-{car_hi}, customer {customer_lo}-{customer_hi}, contract {contract_lo}-{contract_hi}"
+    )
+
+
+if __name__ == "__main__":
+    main()
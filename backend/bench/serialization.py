@@ -0,0 +1,144 @@
+"""Compare list-response serialization: validated models + FastAPI response_model
+pass (previous path) vs plain row dicts encoded by app.serialization.json_response.
+
+No database needed:
+    python -m bench.serialization --rows 10000
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+from typing import List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.routers.car import CarOut, _car_row
+from app.routers.contracts import _contract_row
+from app.serialization import json_response
+from app.schemas.contract import ContractCarItem, ContractRead, ContractSurchargeItem
+
+
+def _fake_contracts(n: int) -> list:
+    start = date(2025, 1, 1)
+    rows = []
+    for i in range(1, n + 1):
+        cars = [
+            SimpleNamespace(
+                CarID=i * 2 + k,
+                Amount=Decimal("120.50"),
+                car=SimpleNamespace(DailyRate=Decimal("60.25")),
+            )
+            for k in range(2)
+        ]
+        surcharges = [SimpleNamespace(SurchargeID=1, UnitPrice=Decimal("15.00"), Quantity=1)]
+        rows.append(
+            SimpleNamespace(
+                ContractID=i,
+                CustomerID=i % 500 + 1,
+                StartDate=start + timedelta(days=i % 365),
+                EndDate=start + timedelta(days=i % 365 + 3),
+                TotalAmount=Decimal("256.00"),
+                Status="Active",
+                Notes="Short-term rental",
+                contract_cars=cars,
+                surcharges=surcharges,
+            )
+        )
+    return rows
+
+
+def _fake_cars(n: int) -> list:
+    return [
+        SimpleNamespace(
+            CarID=i,
+            LicensePlate=f"51A-{i:05d}",
+            DailyRate=Decimal("60.25"),
+            HourlyRate=Decimal("8.00"),
+            Status="Ready",
+        )
+        for i in range(1, n + 1)
+    ]
+
+
+def _legacy_contract_to_read(c) -> ContractRead:
+    # Previous construction: every nested model is validated
+    return ContractRead(
+        id=c.ContractID,
+        customer_id=c.CustomerID,
+        start_date=c.StartDate,
+        end_date=c.EndDate,
+        total_amount=c.TotalAmount,
+        status=c.Status,
+        notes=c.Notes,
+        cars=[ContractCarItem(CarID=cc.CarID, DailyRate=cc.car.DailyRate, Amount=cc.Amount) for cc in c.contract_cars],
+        surcharges=[
+            ContractSurchargeItem(SurchargeID=cs.SurchargeID, UnitPrice=cs.UnitPrice or 0, Quantity=cs.Quantity or 0)
+            for cs in c.surcharges
+        ],
+    )
+
+
+def _legacy_car_out(c) -> CarOut:
+    return CarOut(
+        car_id=c.CarID,
+        license_plate=c.LicensePlate,
+        daily_rate=float(c.DailyRate or 0),
+        hourly_rate=float(c.HourlyRate or 0),
+        status=c.Status,
+    )
+
+
+def _legacy_body(field, content) -> bytes:
+    # What FastAPI does for a non-Response return value: validate + serialize + json.dumps
+    value = asyncio.run(serialize_response(field=field, response_content=content))
+    return JSONResponse(value).body
+
+
+def _best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    contracts = _fake_contracts(args.rows)
+    cars = _fake_cars(args.rows)
+    contract_field = create_model_field("Response", List[ContractRead], mode="serialization")
+    car_field = create_model_field("Response", List[CarOut], mode="serialization")
+
+    cases = {
+        "contracts": (
+            lambda: _legacy_body(contract_field, [_legacy_contract_to_read(c) for c in contracts]),
+            lambda: json_response([_contract_row(c) for c in contracts]).body,
+        ),
+        "cars": (
+            lambda: _legacy_body(car_field, [_legacy_car_out(c) for c in cars]),
+            lambda: json_response([_car_row(c) for c in cars]).body,
+        ),
+    }
+    for name, (legacy, fast) in cases.items():
+        assert json.loads(legacy()) == json.loads(fast()), f"{name}: output differs"
+        t_legacy = _best_of(legacy, args.repeat)
+        t_fast = _best_of(fast, args.repeat)
+        print(
+            f"{name:<10} rows={args.rows} legacy {t_legacy * 1000:8.1f} ms  "
+            f"row_json {t_fast * 1000:8.1f} ms  speedup x{t_legacy / t_fast:.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
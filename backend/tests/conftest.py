@@ -0,0 +1,132 @@
+"""Tests run against TEST_DATABASE_URL, a Postgres database with the schema already created
+(CreateTablesAndInsertDraft.sql + CreateIndexes.sql). Everything a test writes, through
+the API or its own seeding, is rolled back at the end of the test.
+    TEST_DATABASE_URL=postgresql+psycopg2://postgres@127.0.0.1/car_rental_test pytest
+"""
+
+import os
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL", "").strip()
+if TEST_DATABASE_URL:
+    os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+    os.environ["ASYNC_DATABASE_URL"] = os.getenv("TEST_ASYNC_DATABASE_URL", "")
+# Statement counts must come from the request alone: no background reconciler or job workers
+os.environ["RECONCILER_ENABLED"] = "false"
+os.environ["JOBS_ENABLED"] = "false"
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.database import async_engine, engine, get_async_db, get_db  # noqa: E402
+from app.main import app  # noqa: E402
+
+
+# Emitted by the test transaction wrapping each request session, not by the routers
+_SAVEPOINT_PREFIXES = ("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")
+
+
+class StatementCounter:
+    """SQL statements run on the test connections (COMMIT and savepoints excluded)."""
+
+    def __init__(self, *connections):
+        self.count = 0
+        for conn in connections:
+            event.listen(conn, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if not statement.lstrip().upper().startswith(_SAVEPOINT_PREFIXES):
+            self.count += 1
+
+    def reset(self) -> None:
+        self.count = 0
+
+
+class TestDatabase:
+    """One sync and one async connection, each inside a transaction rolled back after the test.
+
+    Request sessions join them with join_transaction_mode="create_savepoint", so a router's
+    commit only releases a savepoint. Rows seeded with seed() are visible to the async
+    routers (contracts, cars); rows created through the sync routers are not, and the
+    other way round.
+    """
+
+    __test__ = False
+
+    def __init__(self, client: TestClient):
+        self._portal = client.portal
+        self.conn = engine.connect()
+        self._transaction = self.conn.begin()
+        self.aconn = self._portal.call(self._begin_async)
+        self.statements = StatementCounter(self.conn, self.aconn.sync_connection)
+
+    async def _begin_async(self):
+        aconn = await async_engine.connect()
+        await aconn.begin()
+        return aconn
+
+    def session(self) -> Session:
+        return Session(bind=self.conn, join_transaction_mode="create_savepoint", autoflush=False)
+
+    def async_session(self) -> AsyncSession:
+        return AsyncSession(
+            bind=self.aconn, join_transaction_mode="create_savepoint", autoflush=False, expire_on_commit=False
+        )
+
+    def seed(self, fn):
+        # fn(session) on the async connection; returns its result
+        async def run():
+            def in_sync(sync_conn):
+                with Session(bind=sync_conn, join_transaction_mode="create_savepoint") as session:
+                    result = fn(session)
+                    session.commit()  # releases the savepoint only
+                    return result
+
+            return await self.aconn.run_sync(in_sync)
+
+        result = self._portal.call(run)
+        self.statements.reset()
+        return result
+
+    def close(self) -> None:
+        async def rollback():
+            await self.aconn.rollback()
+            await self.aconn.close()
+
+        self._portal.call(rollback)
+        self._transaction.rollback()
+        self.conn.close()
+
+
+@pytest.fixture(scope="session")
+def client():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    # One event loop for every request: asyncpg connections are bound to it
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def db(client):
+    database = TestDatabase(client)
+
+    def get_test_db():
+        with database.session() as session:
+            yield session
+
+    async def get_test_async_db():
+        async with database.async_session() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = get_test_db
+    app.dependency_overrides[get_async_db] = get_test_async_db
+    try:
+        yield database
+    finally:
+        app.dependency_overrides.clear()
+        database.close()
@@ -0,0 +1,61 @@
+import uuid
+
+from app.models import Car, Contract, ContractCar, ContractSurcharge, Customer, ReturnReceipt, Surcharge
+
+
+def _seed_contracts(db, contracts: int, lines: int = 1):
+    # `contracts` contracts of one customer, each with `lines` cars and surcharges and a return receipt
+    def seed(session):
+        tag = uuid.uuid4().hex[:8]
+        customer = Customer(FullName=f"Test {tag}")
+        surcharges = [Surcharge(SurchargeName=f"Test {tag} {i}", UnitPrice=1000) for i in range(lines)]
+        session.add(customer)
+        session.add_all(surcharges)
+        session.flush()
+        ids = []
+        for n in range(contracts):
+            contract = Contract(CustomerID=customer.CustomerID, Status="Active")
+            cars = [Car(LicensePlate=f"T{tag}-{n}-{i}", DailyRate=500000, Status="Rented") for i in range(lines)]
+            session.add(contract)
+            session.add_all(cars)
+            session.flush()
+            session.add_all(ContractCar(ContractID=contract.ContractID, CarID=car.CarID, Amount=500000) for car in cars)
+            session.add_all(
+                ContractSurcharge(ContractID=contract.ContractID, SurchargeID=s.SurchargeID, UnitPrice=1000, Quantity=1)
+                for s in surcharges
+            )
+            session.add(ReturnReceipt(ContractID=contract.ContractID))
+            ids.append(contract.ContractID)
+        return customer.CustomerID, ids
+
+    return db.seed(seed)
+
+
+def _statements(db, client, path: str):
+    db.statements.reset()
+    response = client.get(path)
+    assert response.status_code == 200, response.text
+    return db.statements.count, response.json()
+
+
+def test_list_contracts_statement_count_is_independent_of_page_size(db, client):
+    one_customer, _ = _seed_contracts(db, 1)
+    many_customer, _ = _seed_contracts(db, 8, lines=3)
+
+    one, body = _statements(db, client, f"/contracts?customer_id={one_customer}")
+    assert len(body) == 1
+    many, body = _statements(db, client, f"/contracts?customer_id={many_customer}")
+    assert len(body) == 8
+    assert all(len(c["Cars"]) == 3 and len(c["Surcharges"]) == 3 for c in body)
+    assert one == many
+
+
+def test_get_contract_statement_count_is_independent_of_lines(db, client):
+    _, (small,) = _seed_contracts(db, 1)
+    _, (large,) = _seed_contracts(db, 1, lines=6)
+
+    one, body = _statements(db, client, f"/contracts/{small}")
+    assert len(body["Cars"]) == 1
+    many, body = _statements(db, client, f"/contracts/{large}")
+    assert len(body["Cars"]) == 6 and len(body["Surcharges"]) == 6
+    assert one == many
@@ -0,0 +1,51 @@
+import uuid
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.jobs import AUTO_RETURN_RECEIPT, RELEASE_CARS, JobQueue, auto_return_receipt, release_cars
+from app.models import Car, Customer, OutboxJob
+
+
+def _run_jobs(db) -> int:
+    # Drain the outbox on the async connection, where the contract routes queued the jobs
+    def drain(session):
+        conn = session.connection()
+        queue = JobQueue(session_factory=lambda: Session(bind=conn, join_transaction_mode="create_savepoint"))
+        queue.register(RELEASE_CARS, release_cars)
+        queue.register(AUTO_RETURN_RECEIPT, auto_return_receipt)
+        return queue.drain()
+
+    return db.seed(drain)
+
+
+def _car_statuses(db, car_ids):
+    query = select(Car.CarID, Car.Status).where(Car.CarID.in_(car_ids))
+    return db.seed(lambda session: dict(session.execute(query).all()))
+
+
+def test_cars_released_when_contract_deleted_before_job_runs(db, client):
+    def seed(session):
+        tag = uuid.uuid4().hex[:8]
+        customer = Customer(FullName=f"Jobs {tag}")
+        cars = [Car(LicensePlate=f"JOB-{tag}-{i}", DailyRate=500000, Status="Ready") for i in range(2)]
+        session.add(customer)
+        session.add_all(cars)
+        session.flush()
+        return customer.CustomerID, [car.CarID for car in cars]
+
+    customer_id, car_ids = db.seed(seed)
+    response = client.post(
+        "/contracts",
+        json={"CustomerID": customer_id, "Status": "Active", "Cars": [{"CarID": c, "Amount": 500000} for c in car_ids]},
+    )
+    assert response.status_code == 201, response.text
+    contract_id = response.json()["ContractID"]
+    assert set(_car_statuses(db, car_ids).values()) == {"Rented"}
+
+    assert client.put(f"/contracts/{contract_id}", json={"Status": "Canceled"}).status_code == 200
+    assert client.delete(f"/contracts/{contract_id}").status_code == 204
+
+    assert _run_jobs(db) >= 1
+    assert _car_statuses(db, car_ids) == {c: "Ready" for c in car_ids}
+    assert db.seed(lambda session: session.execute(select(OutboxJob.JobID)).all()) == []
@@ -0,0 +1,137 @@
+import uuid
+
+import pytest
+
+from app.models import Branch, Car, Customer, Role, Surcharge
+
+
+# Endpoint -> max SQL statements per request (COMMIT excluded)
+BUDGETS = {
+    "POST /customers/": 1,
+    "PUT /customers/{id}": 1,
+    "DELETE /customers/{id}": 1,
+    "POST /branches/": 1,  # duplicate names rejected by uq_branch_branchname
+    "PUT /branches/{id}": 1,
+    "DELETE /branches/{id}": 1,
+    "POST /roles/": 1,  # duplicate names rejected by uq_role_rolename
+    "PUT /roles/{id}": 1,
+    "DELETE /roles/{id}": 1,
+    "POST /car-brands/": 1,  # duplicate names rejected by uq_carbrand_brandname
+    "PUT /car-brands/{id}": 1,
+    "DELETE /car-brands/{id}": 1,
+    "POST /users/": 1,  # duplicate usernames by uq_useraccount_username, unknown role by the foreign key
+    "PUT /users/{id}": 1,
+    "DELETE /users/{id}": 1,
+    "POST /employees/": 1,  # unknown role or branch rejected by the foreign keys
+    "PUT /employees/{id}": 1,
+    "DELETE /employees/{id}": 1,  # soft delete
+    "POST /contracts": 7,  # lock cars, contract, cars, car status, surcharges, fleet car + contract counts
+    "PUT /contracts/{id}": 3,  # contract, car lines, surcharge lines
+    "PUT /contracts/{id} (completed)": 5,  # + outbox jobs (receipt, car release), fleet contract counts
+    "POST /contracts/{id}/payments": 1,  # balance ledger update + payment insert in one statement
+    "POST /contracts/{id}/delivery": 1,
+    "POST /contracts/{id}/return": 5,  # contract, receipt, outbox job (car release), car branches, fleet counts
+}
+
+
+def _measure(db, client, name, method, path, **kwargs):
+    db.statements.reset()
+    response = client.request(method, path, **kwargs)
+    assert response.status_code < 400, f"{name}: HTTP {response.status_code} {response.text}"
+    assert db.statements.count <= BUDGETS[name], f"{name}: {db.statements.count} statements, budget {BUDGETS[name]}"
+    return response.json() if response.content else None
+
+
+@pytest.fixture
+def refs(db):
+    # Role and branch on the sync connection used by the reference-data routes
+    with db.session() as session:
+        tag = uuid.uuid4().hex[:8]
+        role = Role(RoleName=f"Round trip {tag}")
+        branch = Branch(BranchName=f"Round trip {tag}")
+        session.add_all([role, branch])
+        session.flush()
+        ids = {"role_id": role.RoleID, "branch_id": branch.BranchID}
+        session.commit()  # releases the savepoint only
+    db.statements.reset()
+    return ids
+
+
+# Resource -> (id field, create body, update body); bodies are built from a unique tag (and the refs ids)
+WRITES = {
+    "customers": (
+        "customer_id",
+        lambda tag, refs: {"full_name": "Round trip"},
+        lambda tag: {"email": "rt@example.com"},
+    ),
+    "branches": (
+        "branch_id",
+        lambda tag, refs: {"branch_name": f"Round trip {tag}"},
+        lambda tag: {"phone": "0900000000"},
+    ),
+    "roles": (
+        "role_id",
+        lambda tag, refs: {"role_name": f"Round trip {tag}"},
+        lambda tag: {"role_name": f"Round trip {tag} renamed"},
+    ),
+    "car-brands": (
+        "brand_id",
+        lambda tag, refs: {"brand_name": f"Round trip {tag}"},
+        lambda tag: {"brand_name": f"Round trip {tag} renamed"},
+    ),
+    "users": (
+        "user_id",
+        lambda tag, refs: {"role_id": refs["role_id"], "username": f"rt-{tag}", "password": "round-trip"},
+        lambda tag: {"username": f"rt-{tag}-renamed", "password": "round-trip-2"},
+    ),
+    "employees": (
+        "employee_id",
+        lambda tag, refs: {"full_name": "Round trip", **refs},
+        lambda tag: {"phone": "0900000000", "salary": 1000},
+    ),
+}
+
+
+@pytest.mark.parametrize("resource", WRITES)
+def test_reference_writes(db, client, refs, resource):
+    key, create, change = WRITES[resource]
+    tag = uuid.uuid4().hex[:8]
+    row = _measure(db, client, f"POST /{resource}/", "POST", f"/{resource}/", json=create(tag, refs))
+    path = f"/{resource}/{row[key]}"
+    _measure(db, client, f"PUT /{resource}/{{id}}", "PUT", path, json=change(tag))
+    _measure(db, client, f"DELETE /{resource}/{{id}}", "DELETE", path)
+
+
+@pytest.fixture
+def booking(db):
+    # Customer, car and surcharge on the async connection used by the contract routes
+    def seed(session):
+        tag = uuid.uuid4().hex[:8]
+        customer = Customer(FullName=f"Round trip {tag}")
+        car = Car(LicensePlate=f"RT-{tag}", DailyRate=500000, HourlyRate=50000, Status="Ready")
+        surcharge = Surcharge(SurchargeName=f"Round trip {tag}", UnitPrice=100000)
+        session.add_all([customer, car, surcharge])
+        session.flush()
+        return {
+            "CustomerID": customer.CustomerID,
+            "Status": "Active",
+            "Cars": [{"CarID": car.CarID, "Amount": 500000}],
+            "Surcharges": [{"SurchargeID": surcharge.SurchargeID, "UnitPrice": 100000, "Quantity": 1}],
+        }
+
+    return db.seed(seed)
+
+
+def test_contract_writes(db, client, booking):
+    contract = _measure(db, client, "POST /contracts", "POST", "/contracts", json=booking)
+    contract_id = contract["ContractID"]
+    _measure(db, client, "PUT /contracts/{id}", "PUT", f"/contracts/{contract_id}", json={"Notes": "rt"})
+    _measure(
+        db, client, "POST /contracts/{id}/payments", "POST", f"/contracts/{contract_id}/payments",
+        params={"amount": 100},
+    )
+    _measure(db, client, "POST /contracts/{id}/delivery", "POST", f"/contracts/{contract_id}/delivery", json={})
+    _measure(db, client, "POST /contracts/{id}/return", "POST", f"/contracts/{contract_id}/return", json={})
+    _measure(
+        db, client, "PUT /contracts/{id} (completed)", "PUT", f"/contracts/{contract_id}", json={"Status": "Completed"}
+    )